@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Checksum manifest of the publishable artifacts (jars under each module's
+build/libs), used to skip snapshot publishes that would upload the same
+bytes as the last successful one.
+
+Files are hashed in parallel on a thread pool; each is memory-mapped so
+hashlib reads it without copying and without holding the GIL, which keeps
+hundreds of jars to a few seconds. The comparison relies on the archives
+being reproducible (no file timestamps, a stable entry order), which the
+conventions.viaduct-publishing plugin configures for every published module.
+
+Usage:
+  python3 artifact_manifest.py [--root <dir>] [--compare <manifest.json>] [--write <manifest.json>]
+Example:
+  python3 artifact_manifest.py --compare ~/.cache/viaduct/publish-manifest.json
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Where publish_release.py keeps the manifest of the last successful publish: outside
+# the checkout, which `./gradlew clean` and fresh CI checkouts wipe (release.yml
+# restores it per branch with actions/cache)
+PUBLISH_MANIFEST_ENV = "VIADUCT_PUBLISH_MANIFEST"
+DEFAULT_PUBLISH_MANIFEST = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "viaduct" / "publish-manifest.json"
+)
+
+ARTIFACT_SUFFIXES = (".jar",)
+
+# Never published, or not build outputs
+SKIPPED_DIRS = {".git", ".gradle", "node_modules", "demoapps"}
+
+
+def find_artifacts(root):
+    """Paths of the artifacts in <module>/build/libs anywhere under root, sorted."""
+    artifacts = []
+    for directory, dirs, _ in os.walk(root):
+        if "build" in dirs:
+            libs = Path(directory) / "build" / "libs"
+            if libs.is_dir():
+                artifacts.extend(p for p in libs.iterdir() if p.is_file() and p.name.endswith(ARTIFACT_SUFFIXES))
+        # Build outputs are not walked further: libs/ is all we need from them
+        dirs[:] = [d for d in dirs if d != "build" and d not in SKIPPED_DIRS]
+    return sorted(artifacts)
+
+
+def hash_file(path):
+    """The SHA-256 hex digest of a file."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return hashlib.sha256(data).hexdigest()
+
+
+def build_manifest(root, version=None, jobs=None):
+    """
+    {"version": ..., "artifacts": {relative path: {"sha256": ..., "size": ...}}}
+    for every artifact under root.
+    """
+    root = Path(root)
+    paths = find_artifacts(root)
+    with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) * 2)) as executor:
+        digests = list(executor.map(hash_file, paths))
+    return {
+        "version": version,
+        "artifacts": {
+            path.relative_to(root).as_posix(): {"sha256": digest, "size": path.stat().st_size}
+            for path, digest in zip(paths, digests)
+        },
+    }
+
+
+def diff_manifests(previous, current):
+    """The artifact paths that were added, changed or removed, sorted."""
+    old, new = previous["artifacts"], current["artifacts"]
+    return sorted(
+        path for path in old.keys() | new.keys()
+        if old.get(path, {}).get("sha256") != new.get(path, {}).get("sha256")
+    )
+
+
+def changed_modules(paths):
+    """The module directories ("engine/api") the given artifact paths belong to."""
+    return sorted({path.rsplit("/build/libs/", 1)[0] for path in paths})
+
+
+def load_manifest(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(manifest, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+
+
+def unchanged_since(previous, current):
+    """Whether current has the same version and artifact bytes as previous (and has artifacts at all)."""
+    return (
+        previous is not None
+        and bool(current["artifacts"])
+        and previous.get("version") == current.get("version")
+        and not diff_manifests(previous, current)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hash the publishable artifacts and compare with a previous manifest.")
+    parser.add_argument("--root", default=Path(__file__).parent.parent.parent, help="Repository root")
+    parser.add_argument("--compare", help="Manifest to compare against")
+    parser.add_argument("--write", help="Write the manifest to this path")
+    args = parser.parse_args(argv)
+
+    start = time.monotonic()
+    manifest = build_manifest(args.root)
+    artifacts = manifest["artifacts"]
+    total_mb = sum(a["size"] for a in artifacts.values()) / 1024 / 1024
+    print(f"⏱ Hashed {len(artifacts)} artifacts ({total_mb:.1f} MB) in {time.monotonic() - start:.2f}s")
+
+    if args.write:
+        write_manifest(manifest, args.write)
+
+    if args.compare:
+        previous = load_manifest(args.compare)
+        if previous is None:
+            print(f"⚠️  No manifest at {args.compare}")
+            return 1
+        changed = diff_manifests(previous, manifest)
+        if not changed:
+            print("✅ No artifact changed")
+            return 0
+        print(f"{len(changed)} artifacts changed in: {', '.join(changed_modules(changed))}")
+        for path in changed:
+            print(f"  {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
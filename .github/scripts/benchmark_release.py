@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the release flow end to end against local stand-ins.
+
+A sandbox repository is built from a copy of these scripts plus stand-ins for
+everything remote or expensive:
+  - a stub gradlew (root and every demo app) that sleeps for configurable
+    per-task latencies, plus a JVM startup latency for --no-daemon builds
+  - a fake tools/copybara/run that commits the exported demo app into a
+    local bare repository per destination (exit code 4 when nothing changed)
+  - a local HTTP server serving the plugin's maven-metadata.xml
+    (publish_release.py reads it through VIADUCT_PLUGIN_METADATA_URL)
+
+validate_demoapp.py, publish_release.py, publish_all_demoapps.py and
+demoapps_to_external_push.py then run as they do in CI, once per
+configuration, and the wall time of every phase is reported side by side.
+
+  serial    demo apps validated one after another, publish_all_demoapps.py --jobs 1
+  parallel  demo apps validated concurrently, publish_all_demoapps.py --jobs <number of apps>
+
+After the sync, one demo app is pushed again with every exporter in
+--exporters (push-copybara, push-fast-import), so the copybara path and the
+git fast-import path (fast_export.py) are timed against the same, current
+destination.
+
+--source-modes also pushes one demo app with demoapps_to_external_push.py
+--source-mode sparse and --source-mode full, and reports the files
+materialized for the export and copybara's wall time and block I/O for each.
+The sandbox is padded with --monorepo-files files outside demoapps/ standing
+in for the rest of the monorepo, which the fake copybara reads like an origin
+scan would. Real copybara numbers still need a JVM; these compare what the
+source mode changes on the Python and git side.
+
+Usage:
+  python3 benchmark_release.py [--configs serial,parallel] [--repeat <n>] [--latency <task>=<seconds>]...
+                               [--startup <seconds>] [--copybara-latency <seconds>] [--json <path>]
+                               [--exporters copybara,fast-import] [--source-modes] [--monorepo-files <n>]
+Example:
+  python3 benchmark_release.py --latency build=2 --startup 1.5 --repeat 3
+  python3 benchmark_release.py --configs serial --source-modes --monorepo-files 20000
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from demoapp_registry import CONFIG_PATH, scan
+
+SCRIPTS_DIR = Path(__file__).parent.resolve()
+REPO_ROOT = SCRIPTS_DIR.parent.parent
+
+BENCH_VERSION = "0.7.0"
+
+DEFAULT_LATENCIES = {
+    "build": 1.0,
+    "help": 0.1,
+    "publishPlugins": 0.5,
+    "publishToMavenCentral": 1.0,
+    "printVersion": 0.2,
+}
+DEFAULT_STARTUP = 0.5
+DEFAULT_COPYBARA_LATENCY = 0.5
+
+CONFIGS = ("serial", "parallel")
+EXPORTERS = ("copybara", "fast-import")
+
+
+def benchmark_phases(exporters=EXPORTERS):
+    """The phases of a configuration: the release steps, then one push per exporter."""
+    return ("validate", "publish-release", "sync") + tuple(f"push-{exporter}" for exporter in exporters)
+
+
+PHASES = benchmark_phases()
+
+SOURCE_MODES = ("sparse", "full")
+# Files outside demoapps/ in the sandbox, standing in for the rest of the monorepo
+DEFAULT_MONOREPO_FILES = 2000
+MONOREPO_FILE_SIZE = 4096
+
+# Environment variables that would switch the publishers to CI mode or change
+# how Gradle is invoked, removed so every run starts from the same state
+SCRUBBED_ENV = (
+    "CI", "GITHUB_ACTIONS", "JENKINS_HOME", "CIRCLECI", "TRAVIS", "GITLAB_CI", "BUILDKITE",
+    "GRADLE_USER_HOME", "GIT_DIR", "GIT_WORK_TREE",
+)
+
+STUB_GRADLEW = """#!/usr/bin/env python3
+# Stand-in for gradlew: sleeps for the configured latencies instead of building
+import json, os, sys, time
+
+latencies = json.loads(os.environ.get("BENCH_GRADLE_LATENCIES", "{}"))
+args = sys.argv[1:]
+if "--stop" in args:
+    sys.exit(0)
+
+time.sleep(latencies.get("warm_startup" if "--daemon" in args else "startup", 0))
+
+tasks = []
+skip_value = False
+for arg in args:
+    if skip_value:
+        skip_value = False
+    elif arg in ("--gradle-user-home", "--init-script", "-I", "-p", "--project-dir"):
+        skip_value = True
+    elif not arg.startswith("-"):
+        tasks.append(arg.split(":")[-1])
+
+for task in tasks:
+    time.sleep(latencies.get(task, latencies.get("default", 0)))
+    if task == "printVersion":
+        print("computedVersion=" + os.environ.get("BENCH_VERSION", "0.0.0"))
+print("BUILD SUCCESSFUL", file=sys.stderr)
+"""
+
+FAKE_COPYBARA_RUN = """#!/usr/bin/env python3
+# Stand-in for tools/copybara/run: commits demoapps/<name> of the source ref
+# into a local bare repository named after the destination URL
+import os, subprocess, sys, tempfile, time
+from pathlib import Path
+
+time.sleep(float(os.environ.get("BENCH_COPYBARA_LATENCY", "0")))
+args = sys.argv[1:]
+name = args[2][len("airbnb-viaduct-to-"):]
+source = Path(args[3]) if len(args) > 3 and not args[3].startswith("-") else Path.cwd()
+if source.is_dir():
+    # Like copybara's origin checkout, read the whole source tree before filtering it
+    for directory, dirnames, filenames in os.walk(source):
+        if ".git" in dirnames:
+            dirnames.remove(".git")
+        for filename in filenames:
+            with open(os.path.join(directory, filename), "rb") as f:
+                f.read()
+url = next(arg.split("=", 1)[1] for arg in args if arg.startswith("--git-destination-url="))
+repo_name = url.rstrip("/").split("/")[-1]
+destination = Path(os.environ["BENCH_DESTINATIONS"]) / (repo_name if repo_name.endswith(".git") else repo_name + ".git")
+
+with tempfile.TemporaryDirectory() as tmp:
+    env = dict(
+        os.environ,
+        GIT_DIR=str(destination),
+        GIT_WORK_TREE=str(source / "demoapps" / name),
+        GIT_INDEX_FILE=os.path.join(tmp, "index"),
+    )
+    def git(*git_args, check=True):
+        return subprocess.run(
+            ["git", "-c", "user.name=ViaBot", "-c", "user.email=viabot@ductworks.io", *git_args],
+            env=env, capture_output=True, check=check,
+        )
+    has_head = git("rev-parse", "--verify", "--quiet", "HEAD", check=False).returncode == 0
+    if has_head:
+        git("read-tree", "HEAD")
+    git("add", "-A")
+    if has_head and git("diff", "--cached", "--quiet", "HEAD", check=False).returncode == 0:
+        sys.exit(4)  # NO_OP
+    git("commit", "-q", "-m", "Sync " + name + " from airbnb/viaduct")
+"""
+
+METADATA_PATH = "/m2/com/airbnb/viaduct/module-gradle-plugin/maven-metadata.xml"
+
+
+class MetadataHandler(BaseHTTPRequestHandler):
+    """Serves maven-metadata.xml listing the server's published versions."""
+
+    def do_GET(self):
+        if self.path != METADATA_PATH:
+            self.send_error(404)
+            return
+        versions = "".join(f"<version>{v}</version>" for v in self.server.published_versions)
+        body = f"<metadata><versioning><versions>{versions}</versions></versioning></metadata>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetadataServer:
+    """A local stand-in for the Gradle Plugin Portal's metadata endpoint."""
+
+    def __init__(self, published_versions=()):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), MetadataHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.published_versions = list(published_versions)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{METADATA_PATH}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def write_executable(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    path.chmod(0o755)
+
+
+def git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=Bench", "-c", "user.email=bench@example.com", *args],
+        cwd=cwd,
+        capture_output=True,
+        check=True,
+    )
+
+
+# Declares one workflow the sandbox's demo app registry is read from
+COPYBARA_WORKFLOW = 'core.workflow(name = "airbnb-viaduct-to-%s")\n'
+
+
+def registered_demo_apps():
+    """The demo apps of this checkout, read without writing its registry cache into the checkout."""
+    return scan(REPO_ROOT).pairs()
+
+
+def build_sandbox(root, demo_apps, version=BENCH_VERSION, monorepo_files=0):
+    """Create the sandbox repository on a release branch and return its path."""
+    repo = Path(root) / "repo"
+    shutil.copytree(
+        SCRIPTS_DIR, repo / ".github" / "scripts", ignore=shutil.ignore_patterns("tests", "__pycache__")
+    )
+    (repo / "VERSION").write_text(f"{version}\n")
+    write_executable(repo / "gradlew", STUB_GRADLEW)
+    write_executable(repo / "tools" / "copybara" / "run", FAKE_COPYBARA_RUN)
+    (repo / CONFIG_PATH).parent.mkdir(parents=True)
+    (repo / CONFIG_PATH).write_text("".join(COPYBARA_WORKFLOW % name for name, _ in demo_apps))
+    for name, _ in demo_apps:
+        app = repo / "demoapps" / name
+        write_executable(app / "gradlew", STUB_GRADLEW)
+        (app / "gradle.properties").write_text(f"viaductVersion={version}\n")
+        (app / "gradle" / "wrapper").mkdir(parents=True)
+        (app / "gradle" / "wrapper" / "gradle-wrapper.properties").write_text(
+            "distributionUrl=https\\://services.gradle.org/distributions/gradle-9.1.0-bin.zip\n"
+        )
+        (app / "src").mkdir()
+        (app / "src" / "App.kt").write_text(f'fun main() = println("{name}")\n')
+    for index in range(monorepo_files):
+        path = repo / "engine" / f"module-{index // 100}" / f"File{index}.kt"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"// {index}\n".ljust(MONOREPO_FILE_SIZE, "x"))
+    (repo / ".gitignore").write_text("build/\n__pycache__/\n")
+
+    git(root, "init", "-q", "-b", f"release/v{version}", str(repo))
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "Benchmark sandbox")
+    return repo
+
+
+def destination_path(directory, github_repo):
+    """The local bare repository standing in for github_repo (the fake copybara derives the same name)."""
+    return Path(directory) / (github_repo.split("/")[-1] + ".git")
+
+
+def reset_destinations(directory, demo_apps):
+    """Fresh, empty bare repositories, so every configuration syncs real changes."""
+    shutil.rmtree(directory, ignore_errors=True)
+    for _, github_repo in demo_apps:
+        git(Path(directory).parent, "init", "-q", "--bare", "-b", "main", str(destination_path(directory, github_repo)))
+
+
+def run_script(repo, env, log_path, script, *args):
+    """Run one of the sandbox's release scripts and return whether it succeeded."""
+    with open(log_path, "a") as log:
+        result = subprocess.run(
+            [sys.executable, str(repo / ".github" / "scripts" / script), *args],
+            cwd=repo,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    return result.returncode == 0
+
+
+def run_phase(repo, env, logs_dir, config, phase, demo_apps):
+    """Run one phase of one configuration; returns (seconds, succeeded)."""
+    log_path = logs_dir / f"{config}-{phase}.log"
+    jobs = len(demo_apps) if config == "parallel" else 1
+    start = time.monotonic()
+    if phase == "validate":
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(
+                lambda name: run_script(repo, env, logs_dir / f"{config}-{phase}-{name}.log", "validate_demoapp.py", name),
+                [name for name, _ in demo_apps],
+            ))
+        succeeded = all(results)
+    elif phase == "publish-release":
+        succeeded = run_script(repo, env, log_path, "publish_release.py")
+    elif phase == "sync":
+        succeeded = run_script(repo, env, log_path, "publish_all_demoapps.py", "--jobs", str(jobs))
+    elif phase == "push-copybara":
+        name, github_repo = demo_apps[0]
+        # Push again after the sync: measures the copybara path when the destination is current
+        succeeded = run_script(repo, env, log_path, "demoapps_to_external_push.py", name, github_repo)
+    elif phase == "push-fast-import":
+        name, github_repo = demo_apps[0]
+        destination = destination_path(env["BENCH_DESTINATIONS"], github_repo)
+        succeeded = run_script(
+            repo, env, log_path, "demoapps_to_external_push.py", name, github_repo,
+            "--exporter", "fast-import", "--destination", str(destination),
+        )
+    else:
+        raise ValueError(f"Unknown phase: {phase}")
+    return time.monotonic() - start, succeeded
+
+
+def sandbox_env(gradle_latencies, copybara_latency, destinations, metadata_url):
+    """The environment the sandbox's release scripts run with."""
+    env = {k: v for k, v in os.environ.items() if k not in SCRUBBED_ENV and not k.startswith("VIADUCT_")}
+    env.update({
+        "BENCH_GRADLE_LATENCIES": json.dumps(gradle_latencies),
+        "BENCH_COPYBARA_LATENCY": str(copybara_latency),
+        "BENCH_DESTINATIONS": str(destinations),
+        "BENCH_VERSION": BENCH_VERSION,
+        "VIADUCT_PLUGIN_METADATA_URL": metadata_url,
+    })
+    return env
+
+
+def run_benchmark(
+    configs=CONFIGS,
+    latencies=None,
+    startup=DEFAULT_STARTUP,
+    copybara_latency=DEFAULT_COPYBARA_LATENCY,
+    repeat=1,
+    work_dir=None,
+    demo_apps=None,
+    exporters=EXPORTERS,
+):
+    """
+    Run every phase for every configuration `repeat` times, with the given
+    (name, github_repo) demo apps (default: those of this checkout) and one
+    push phase per exporter.
+
+    Returns {config: {phase: {"seconds": median wall time, "ok": bool}}}.
+    """
+    # publish_all_demoapps.py publishes all of them, so the sandbox has every one
+    demo_apps = registered_demo_apps() if demo_apps is None else demo_apps
+    gradle_latencies = dict(DEFAULT_LATENCIES if latencies is None else latencies)
+    gradle_latencies.setdefault("startup", startup)
+    gradle_latencies.setdefault("warm_startup", 0)
+
+    with tempfile.TemporaryDirectory(prefix="viaduct-bench-", dir=work_dir) as tmp, MetadataServer() as metadata:
+        root = Path(tmp)
+        repo = build_sandbox(root, demo_apps)
+        destinations = root / "destinations"
+        logs_dir = root / "logs"
+        logs_dir.mkdir()
+
+        env = sandbox_env(gradle_latencies, copybara_latency, destinations, metadata.url)
+
+        phases = benchmark_phases(exporters)
+        samples = {config: {phase: [] for phase in phases} for config in configs}
+        failed = set()
+        for _ in range(repeat):
+            for config in configs:
+                reset_destinations(destinations, demo_apps)
+                for phase in phases:
+                    seconds, succeeded = run_phase(repo, env, logs_dir, config, phase, demo_apps)
+                    samples[config][phase].append(seconds)
+                    if not succeeded:
+                        failed.add((config, phase))
+                        print(f"❌ {config} {phase} failed, see logs below")
+                        for log in sorted(logs_dir.glob(f"{config}-{phase}*.log")):
+                            print(log.read_text()[-2000:])
+
+        return {
+            config: {
+                phase: {"seconds": statistics.median(samples[config][phase]), "ok": (config, phase) not in failed}
+                for phase in phases
+            }
+            for config in configs
+        }
+
+
+# What demoapps_to_external_push.py reports about the export checkout and the copybara run
+MATERIALIZED_PATTERN = re.compile(r"(\d+) files, ([\d.]+) MiB materialized in ([\d.]+)s")
+COPYBARA_PATTERN = re.compile(r"copybara \(\w+ source\): ([\d.]+)s wall, (\d+) blocks read, (\d+) blocks written")
+
+
+def parse_push_log(text):
+    """The export and copybara measurements of one push log, or None if they are missing."""
+    materialized = MATERIALIZED_PATTERN.search(text)
+    copybara = COPYBARA_PATTERN.search(text)
+    if not materialized or not copybara:
+        return None
+    return {
+        "files": int(materialized.group(1)),
+        "mib": float(materialized.group(2)),
+        "checkout_seconds": float(materialized.group(3)),
+        "copybara_seconds": float(copybara.group(1)),
+        "blocks_read": int(copybara.group(2)),
+        "blocks_written": int(copybara.group(3)),
+    }
+
+
+def compare_source_modes(
+    copybara_latency=0.0,
+    monorepo_files=DEFAULT_MONOREPO_FILES,
+    repeat=1,
+    work_dir=None,
+    demo_apps=None,
+):
+    """
+    Push the first demo app with every source mode `repeat` times, each time
+    into an empty destination.
+
+    Returns {mode: {"ok": bool, measurement: median}} with the measurements
+    of parse_push_log.
+    """
+    demo_apps = registered_demo_apps() if demo_apps is None else demo_apps
+    name, github_repo = demo_apps[0]
+    gradle_latencies = {"startup": 0, "warm_startup": 0}
+
+    with tempfile.TemporaryDirectory(prefix="viaduct-bench-", dir=work_dir) as tmp, MetadataServer() as metadata:
+        root = Path(tmp)
+        repo = build_sandbox(root, demo_apps, monorepo_files=monorepo_files)
+        destinations = root / "destinations"
+        logs_dir = root / "logs"
+        logs_dir.mkdir()
+        env = sandbox_env(gradle_latencies, copybara_latency, destinations, metadata.url)
+
+        samples = {mode: [] for mode in SOURCE_MODES}
+        failed = set()
+        for run in range(repeat):
+            for mode in SOURCE_MODES:
+                reset_destinations(destinations, demo_apps)
+                log_path = logs_dir / f"source-{mode}-{run}.log"
+                succeeded = run_script(
+                    repo, env, log_path, "demoapps_to_external_push.py", name, github_repo, "--source-mode", mode
+                )
+                measurements = parse_push_log(log_path.read_text())
+                if not succeeded or measurements is None:
+                    failed.add(mode)
+                    print(f"❌ push with {mode} source failed, see log below")
+                    print(log_path.read_text()[-2000:])
+                else:
+                    samples[mode].append(measurements)
+
+        results = {}
+        for mode in SOURCE_MODES:
+            results[mode] = {"ok": mode not in failed}
+            if samples[mode]:
+                results[mode].update({
+                    key: statistics.median(sample[key] for sample in samples[mode]) for key in samples[mode][0]
+                })
+        return results
+
+
+def format_source_modes(results):
+    columns = [
+        ("files", "files", "{:>15.0f}"),
+        ("mib", "MiB", "{:>15.1f}"),
+        ("checkout_seconds", "checkout", "{:>14.2f}s"),
+        ("copybara_seconds", "copybara", "{:>14.2f}s"),
+        ("blocks_read", "blocks read", "{:>15.0f}"),
+        ("blocks_written", "blocks written", "{:>15.0f}"),
+    ]
+    lines = [f"{'Source':<10}" + "".join(f"{title:>15}" for _, title, _ in columns)]
+    for mode, entry in results.items():
+        if entry["ok"]:
+            lines.append(f"{mode:<10}" + "".join(fmt.format(entry[key]) for key, _, fmt in columns))
+        else:
+            lines.append(f"{mode:<10}{'FAILED':>15}")
+    return "\n".join(lines)
+
+
+def format_report(results):
+    configs = list(results)
+    lines = [f"{'Phase':<16}" + "".join(f"{config:>12}" for config in configs)]
+    if len(configs) == 2:
+        lines[0] += f"{'speedup':>10}"
+    totals = {config: 0.0 for config in configs}
+    for phase in results[configs[0]]:
+        line = f"{phase:<16}"
+        for config in configs:
+            entry = results[config][phase]
+            totals[config] += entry["seconds"]
+            line += f"{entry['seconds']:>11.2f}s" if entry["ok"] else f"{'FAILED':>12}"
+        if len(configs) == 2:
+            first, second = (results[c][phase]["seconds"] for c in configs)
+            line += f"{first / second:>9.2f}x" if second else f"{'-':>10}"
+        lines.append(line)
+    line = f"{'total':<16}" + "".join(f"{totals[config]:>11.2f}s" for config in configs)
+    if len(configs) == 2 and totals[configs[1]]:
+        line += f"{totals[configs[0]] / totals[configs[1]]:>9.2f}x"
+    lines.append(line)
+    return "\n".join(lines)
+
+
+def parse_latency(text):
+    task, _, seconds = text.partition("=")
+    if not task or not seconds:
+        raise argparse.ArgumentTypeError(f"expected <task>=<seconds>, got {text}")
+    return task, float(seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the release flow against local stand-ins.")
+    parser.add_argument("--configs", default=",".join(CONFIGS), help="Comma-separated configurations (default: serial,parallel)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per configuration; the median is reported")
+    parser.add_argument(
+        "--latency",
+        type=parse_latency,
+        action="append",
+        default=[],
+        metavar="TASK=SECONDS",
+        help="Latency of a Gradle task in the stub gradlew (repeatable)",
+    )
+    parser.add_argument("--startup", type=float, default=DEFAULT_STARTUP, help="JVM startup latency of --no-daemon builds")
+    parser.add_argument("--copybara-latency", type=float, default=DEFAULT_COPYBARA_LATENCY, help="Latency of each copybara run")
+    parser.add_argument(
+        "--exporters",
+        default=",".join(EXPORTERS),
+        help=f"Comma-separated exporters to time the push with (default: {','.join(EXPORTERS)})",
+    )
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    parser.add_argument(
+        "--source-modes",
+        action="store_true",
+        help="Also compare the sparse and full export sources of demoapps_to_external_push.py",
+    )
+    parser.add_argument(
+        "--monorepo-files",
+        type=int,
+        default=DEFAULT_MONOREPO_FILES,
+        help=f"Files outside demoapps/ for --source-modes (default: {DEFAULT_MONOREPO_FILES})",
+    )
+    args = parser.parse_args(argv)
+
+    configs = [c.strip() for c in args.configs.split(",") if c.strip()]
+    unknown = [c for c in configs if c not in CONFIGS]
+    if unknown:
+        parser.error(f"unknown configurations: {', '.join(unknown)}")
+
+    exporters = [e.strip() for e in args.exporters.split(",") if e.strip()]
+    unknown = [e for e in exporters if e not in EXPORTERS]
+    if unknown:
+        parser.error(f"unknown exporters: {', '.join(unknown)}")
+
+    latencies = dict(DEFAULT_LATENCIES)
+    latencies.update(args.latency)
+
+    results = run_benchmark(
+        configs, latencies, args.startup, args.copybara_latency, args.repeat, exporters=exporters
+    )
+    print(format_report(results))
+    ok = all(entry["ok"] for phases in results.values() for entry in phases.values())
+    if args.source_modes:
+        source_modes = compare_source_modes(args.copybara_latency, args.monorepo_files, args.repeat)
+        print()
+        print(format_source_modes(source_modes))
+        results = {"configs": results, "source_modes": source_modes}
+        ok = ok and all(entry["ok"] for entry in source_modes.values())
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2) + "\n")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
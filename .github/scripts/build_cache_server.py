@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+A lightweight local Gradle HTTP build cache, backed by a size-bounded LRU directory.
+
+The demo apps under demoapps/ are separate Gradle builds, so without a shared
+remote cache they never reuse each other's task outputs. The release scripts
+can start this server for the length of a run and point every demo app build
+at it (via an init script), so repeated and sibling builds hit the cache.
+
+Gradle's HTTP build cache protocol is plain GET/PUT of /<path>/<cache-key>.
+
+Usage:
+  python3 build_cache_server.py [--dir <directory>] [--max-mb <n>] [--port <n>]
+Example:
+  python3 build_cache_server.py --dir /tmp/gradle-cache --max-mb 2048 --port 5071
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from gradle_runner import GradleRunner, stable_init_script
+from run_locks import ResourceLock, locks_dir, run_workspace
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# A shared cache listens on a port derived from its directory when that port is free, so its
+# URL, and with it the init script and the builds' configuration cache keys, stay the same
+# from run to run
+STABLE_PORT_BASE = 20000
+STABLE_PORT_COUNT = 20000
+
+CACHE_KEY_PATTERN = re.compile(r"^/cache/([A-Za-z0-9._-]+)$")
+
+BUILD_CACHE_INIT_SCRIPT = """\
+settingsEvaluated { settings ->
+    settings.buildCache {
+        remote(HttpBuildCache) {
+            url = "%(url)s"
+            push = true
+            allowInsecureProtocol = true
+        }
+    }
+}
+"""
+
+
+class LruCacheStore:
+    """Cache entries stored as files, evicting the least recently used once max_bytes is exceeded."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        # Entries left by a previous run, oldest access first
+        existing = [p for p in self.directory.iterdir() if p.is_file() and not p.name.startswith(".")]
+        for path in sorted(existing, key=lambda p: p.stat().st_mtime):
+            size = path.stat().st_size
+            self.entries[path.name] = size
+            self.total_bytes += size
+        with self.lock:
+            self._evict()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        path = self.directory / key
+        try:
+            data = path.read_bytes()
+            # Persist recency for the next run's ordering
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return False
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, prefix=".upload-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, self.directory / key)
+        with self.lock:
+            self.total_bytes -= self.entries.pop(key, 0)
+            self.entries[key] = len(data)
+            self.total_bytes += len(data)
+            self._evict()
+        return True
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                (self.directory / key).unlink()
+            except FileNotFoundError:
+                pass
+
+
+class BuildCacheHandler(BaseHTTPRequestHandler):
+    """Serves GET/HEAD/PUT of /cache/<key> from the server's LruCacheStore."""
+
+    def _key(self):
+        match = CACHE_KEY_PATTERN.match(self.path)
+        if not match:
+            self.send_error(404)
+            return None
+        return match.group(1)
+
+    def do_GET(self):
+        key = self._key()
+        if key is None:
+            return
+        data = self.server.store.get(key)
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    do_HEAD = do_GET
+
+    def do_PUT(self):
+        key = self._key()
+        if key is None:
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length)
+        # 413 tells Gradle the entry is too large, which it treats as a non-fatal skip
+        self.send_response(200 if self.server.store.put(key, data) else 413)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BuildCacheServer:
+    """Runs the build cache on a background thread for the length of a release run."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, host="127.0.0.1", port=0):
+        self.store = LruCacheStore(directory, max_bytes)
+        self.httpd = ThreadingHTTPServer((host, port), BuildCacheHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.store = self.store
+        self.thread = None
+        # Held while this server owns its directory (see start_shared_build_cache)
+        self.directory_lock = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/cache/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+        if self.directory_lock:
+            self.directory_lock.release()
+
+    def write_init_script(self, directory=None):
+        """Write an init script pointing a build at this cache and return its path (see stable_init_script())."""
+        return stable_init_script("viaduct-build-cache.gradle", BUILD_CACHE_INIT_SCRIPT % {"url": self.url}, directory)
+
+    def summary(self):
+        return (
+            f"{self.store.hits} hits, {self.store.misses} misses, "
+            f"{len(self.store.entries)} entries ({self.store.total_bytes / (1024 * 1024):.1f} MiB)"
+        )
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def stable_port(directory):
+    digest = hashlib.sha256(str(Path(directory).resolve()).encode()).digest()
+    return STABLE_PORT_BASE + int.from_bytes(digest[:4], "big") % STABLE_PORT_COUNT
+
+
+def start_shared_build_cache(repo_root, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Start a build cache server for this run under build/demoapps-build-cache and
+    point every GradleRunner build, including those of child processes, at it.
+    The caller stops the returned server at the end of the run.
+
+    The directory's index lives in the server, so only one server may use it: when
+    another run holds it, this run gets a cache of its own in its workspace.
+    """
+    directory_lock = ResourceLock("build-cache", directory=locks_dir(repo_root))
+    if directory_lock.try_acquire():
+        directory = Path(repo_root) / "build" / "demoapps-build-cache"
+    else:
+        directory = run_workspace() / "build-cache"
+        directory_lock = None
+        print(f"⚠️  build/demoapps-build-cache is in use by another run, using {directory} for this run")
+    try:
+        server = BuildCacheServer(directory, max_bytes, port=stable_port(directory))
+    except OSError:
+        server = BuildCacheServer(directory, max_bytes)
+    server.start()
+    server.directory_lock = directory_lock
+    runner = GradleRunner.from_environment()
+    runner.init_scripts.append(server.write_init_script())
+    runner.build_cache = True
+    os.environ.update(runner.environment())
+    print(f"Using local build cache at {server.url}")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local Gradle HTTP build cache.")
+    parser.add_argument("--dir", default="build/demoapps-build-cache", help="Cache directory")
+    parser.add_argument("--max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="Cache size bound")
+    parser.add_argument("--port", type=int, default=5071, help="Port to listen on (default: 5071)")
+    args = parser.parse_args(argv)
+
+    server = BuildCacheServer(args.dir, args.max_mb * 1024 * 1024, port=args.port)
+    print(f"Serving Gradle build cache at {server.url} from {args.dir} (max {args.max_mb} MiB)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(f"Build cache: {server.summary()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Record and replay the external calls of a release script run.
+
+While a Cassette is active, subprocess.run, Watchdog.run (the watched runs
+of process_watchdog.py) and urllib.request.urlopen are intercepted. In record mode every call runs for real and its arguments,
+exit code, output and duration are saved into a gzip-compressed JSON
+cassette. In replay mode nothing runs: each call is answered from the
+cassette, optionally sleeping for the recorded duration scaled by
+latency_scale (0 by default, so a replayed run only costs the Python
+orchestration itself).
+
+Calls are matched by their arguments; paths under the temporary directory
+are normalized, so per-run export directories still match. Calls that stream
+their output (no capture_output) are recorded with their exit code only.
+Long-lived pipes (subprocess.Popen, used by fast_export.py) are not intercepted.
+
+Usage:
+  python3 cassette.py record <cassette> <script.py> [args...]
+  python3 cassette.py replay <cassette> [--latency-scale <x>] <script.py> [args...]
+Example:
+  python3 cassette.py record /tmp/release.json.gz release.py pipeline --steps validate,sync
+  python3 cassette.py replay /tmp/release.json.gz release.py pipeline --steps validate,sync
+"""
+
+import argparse
+import base64
+import gzip
+import io
+import json
+import re
+import runpy
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict, deque
+from pathlib import Path
+
+from process_watchdog import Watchdog
+
+MODES = ("record", "replay")
+
+TEMP_PATH_PATTERN = re.compile(re.escape(tempfile.gettempdir().rstrip("/")) + r"/[^/\s'\"]+")
+
+
+class CassetteMiss(RuntimeError):
+    """A replayed call that the cassette has no (more) recordings for."""
+
+
+def normalize(value):
+    """Make a call argument comparable across runs."""
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    return TEMP_PATH_PATTERN.sub("<tmp>", str(value))
+
+
+def encode_output(output):
+    if output is None or isinstance(output, str):
+        return output
+    return {"base64": base64.b64encode(output).decode("ascii")}
+
+
+def decode_output(recorded, text):
+    if recorded is None:
+        return None
+    if isinstance(recorded, dict):
+        data = base64.b64decode(recorded["base64"])
+        return data.decode() if text else data
+    return recorded if text else recorded.encode()
+
+
+class ReplayedResponse(io.BytesIO):
+    """What urlopen returns on replay: a readable body with the recorded status."""
+
+    def __init__(self, body, status, url):
+        super().__init__(body)
+        self.status = status
+        self.url = url
+
+    def getcode(self):
+        return self.status
+
+
+class Cassette:
+    """Intercepts subprocess.run and urlopen for the life of a `with` block."""
+
+    def __init__(self, path, mode="replay", latency_scale=0.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.calls = []
+        self.queues = defaultdict(deque)
+        self.real_run = None
+        self.real_watched_run = None
+        self.real_urlopen = None
+        # Set while a call is being recorded, so the calls it makes itself are not recorded again
+        self.local = threading.local()
+
+    # Keys
+
+    @staticmethod
+    def run_key(args, kwargs):
+        return json.dumps(["run", normalize(args), normalize(kwargs.get("cwd") or "")])
+
+    @staticmethod
+    def url_key(url):
+        if isinstance(url, urllib.request.Request):
+            url = url.full_url
+        return json.dumps(["urlopen", normalize(url)])
+
+    # Recording
+
+    def recording_run(self, args, *popenargs, **kwargs):
+        return self.record_run(self.real_run, args, *popenargs, **kwargs)
+
+    def recording_watched_run(self, watchdog, args, **kwargs):
+        return self.record_run(lambda *a, **kw: self.real_watched_run(watchdog, *a, **kw), args, **kwargs)
+
+    def record_run(self, run, args, *popenargs, **kwargs):
+        if getattr(self.local, "recording", False):
+            return run(args, *popenargs, **kwargs)
+        check = kwargs.pop("check", False)
+        start = time.monotonic()
+        self.local.recording = True
+        try:
+            result = run(args, *popenargs, **kwargs)
+        finally:
+            self.local.recording = False
+        self.calls.append({
+            "key": self.run_key(args, kwargs),
+            "returncode": result.returncode,
+            "stdout": encode_output(result.stdout),
+            "stderr": encode_output(result.stderr),
+            "duration": time.monotonic() - start,
+        })
+        if check:
+            result.check_returncode()
+        return result
+
+    def recording_urlopen(self, url, *args, **kwargs):
+        start = time.monotonic()
+        call = {"key": self.url_key(url)}
+        try:
+            with self.real_urlopen(url, *args, **kwargs) as response:
+                body = response.read()
+                call.update(status=response.status, body=encode_output(body))
+        except urllib.error.HTTPError as e:
+            call.update(error="http", status=e.code, reason=str(e.reason))
+        except urllib.error.URLError as e:
+            call.update(error="url", reason=str(e.reason))
+        call["duration"] = time.monotonic() - start
+        self.calls.append(call)
+        return self.replay_urlopen_call(call, url)
+
+    # Replaying
+
+    def next_call(self, key):
+        if not self.queues[key]:
+            raise CassetteMiss(f"No recorded call left for {key}")
+        call = self.queues[key].popleft()
+        if self.latency_scale:
+            time.sleep(call["duration"] * self.latency_scale)
+        return call
+
+    def replaying_run(self, args, *popenargs, **kwargs):
+        call = self.next_call(self.run_key(args, kwargs))
+        text = bool(kwargs.get("text") or kwargs.get("universal_newlines") or kwargs.get("encoding"))
+        result = subprocess.CompletedProcess(
+            args, call["returncode"], decode_output(call["stdout"], text), decode_output(call["stderr"], text)
+        )
+        if kwargs.get("check"):
+            result.check_returncode()
+        return result
+
+    def replaying_watched_run(self, watchdog, args, **kwargs):
+        result = self.replaying_run(args, **kwargs)
+        if kwargs.get("echo") and kwargs.get("capture_output"):
+            # Passed through as well as captured when it was recorded
+            for output, stream in ((result.stdout, sys.stdout), (result.stderr, sys.stderr)):
+                stream.write(output if isinstance(output, str) else output.decode(errors="replace"))
+        result.stalled = False
+        return result
+
+    def replay_urlopen_call(self, call, url):
+        full_url = url.full_url if isinstance(url, urllib.request.Request) else url
+        if call.get("error") == "http":
+            raise urllib.error.HTTPError(full_url, call["status"], call["reason"], {}, io.BytesIO())
+        if call.get("error") == "url":
+            raise urllib.error.URLError(call["reason"])
+        return ReplayedResponse(decode_output(call["body"], False), call["status"], full_url)
+
+    def replaying_urlopen(self, url, *args, **kwargs):
+        return self.replay_urlopen_call(self.next_call(self.url_key(url)), url)
+
+    # Lifecycle
+
+    def load(self):
+        with gzip.open(self.path, "rt") as f:
+            for call in json.load(f)["calls"]:
+                self.queues[call["key"]].append(call)
+
+    def save(self):
+        with gzip.open(self.path, "wt") as f:
+            json.dump({"version": 1, "calls": self.calls}, f, separators=(",", ":"))
+
+    def __enter__(self):
+        self.real_run = subprocess.run
+        self.real_watched_run = Watchdog.run
+        self.real_urlopen = urllib.request.urlopen
+        if self.mode == "record":
+            subprocess.run = self.recording_run
+            Watchdog.run = lambda watchdog, args, **kwargs: self.recording_watched_run(watchdog, args, **kwargs)
+            urllib.request.urlopen = self.recording_urlopen
+        else:
+            self.load()
+            subprocess.run = self.replaying_run
+            Watchdog.run = lambda watchdog, args, **kwargs: self.replaying_watched_run(watchdog, args, **kwargs)
+            urllib.request.urlopen = self.replaying_urlopen
+        return self
+
+    def __exit__(self, *exc):
+        subprocess.run = self.real_run
+        Watchdog.run = self.real_watched_run
+        urllib.request.urlopen = self.real_urlopen
+        if self.mode == "record":
+            self.save()
+
+    def summary(self):
+        if self.mode == "record":
+            return f"{len(self.calls)} calls recorded, {sum(c['duration'] for c in self.calls):.2f}s external time"
+        return f"{sum(len(q) for q in self.queues.values())} recorded calls left unused"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record or replay the external calls of a release script.")
+    parser.add_argument("mode", choices=MODES)
+    parser.add_argument("cassette", help="Cassette file (gzip-compressed JSON)")
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=0.0,
+        help="On replay, sleep for the recorded durations times this factor (default: 0)",
+    )
+    parser.add_argument("script", help="Script to run, e.g. release.py")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    script = Path(args.script)
+    if not script.exists():
+        script = Path(__file__).parent / args.script
+    sys.argv = [str(script)] + args.script_args
+    sys.path.insert(0, str(script.parent.resolve()))
+
+    returncode = 0
+    start = time.monotonic()
+    with Cassette(args.cassette, args.mode, args.latency_scale) as cassette:
+        try:
+            runpy.run_path(str(script), run_name="__main__")
+        except SystemExit as e:
+            returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    print(f"⏱ {args.mode} of {script.name} took {time.monotonic() - start:.2f}s ({cassette.summary()})", file=sys.stderr)
+    return returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Runs copybara workflows directly on a JVM, without a Gradle startup per workflow.
+
+tools/copybara/run goes through `./gradlew :tools:runCopybara`, which pays for a
+Gradle startup and configuration on every migration. CopybaraRunner resolves the
+copybara jar once per run (downloading it through `:tools:downloadCopybara` only
+when it is missing) and then launches `java -jar` for each workflow, reporting
+every workflow's exit code separately.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from process_watchdog import run_watched
+from run_locks import resource_lock
+
+# Google's copybara returns 4 for NO_OP (no changes to sync)
+# See: https://github.com/google/copybara/blob/master/copybara/integration/tool_test.sh#L24
+NO_OP_EXIT_CODE = 4
+
+
+def is_successful_exit(returncode):
+    """Whether a copybara exit code means the destination is in sync."""
+    return returncode == 0 or returncode == NO_OP_EXIT_CODE
+
+
+def describe_exit(returncode):
+    if returncode == 0:
+        return "synced"
+    if returncode == NO_OP_EXIT_CODE:
+        return "NO_OP, nothing to sync"
+    return "failed"
+
+
+class CopybaraRunner:
+    """Launches copybara from a jar resolved once and shared by every workflow in a run."""
+
+    def __init__(self, repo_root):
+        self.repo_root = Path(repo_root)
+        # Same location tools/copybara.gradle.kts downloads the jar to
+        self.jar = self.repo_root / "tools" / "copybara" / "copybara_deploy.jar"
+        self.java = self.find_java()
+
+    @staticmethod
+    def find_java():
+        java_home = os.environ.get("JAVA_HOME")
+        if java_home:
+            return str(Path(java_home) / "bin" / "java")
+        return "java"
+
+    def ensure_jar(self):
+        """Resolve the copybara jar, downloading it through Gradle only if it is not cached yet."""
+        if self.jar.exists():
+            return self.jar
+
+        print("Resolving copybara jar via :tools:downloadCopybara...")
+        run_watched(
+            # The task is not compatible with the configuration cache
+            ["./gradlew", ":tools:downloadCopybara", "--console=plain", "--quiet", "--no-configuration-cache"],
+            cwd=self.repo_root,
+            check=True,
+        )
+        if not self.jar.exists():
+            raise RuntimeError(f"Copybara jar not found at {self.jar} after download")
+        return self.jar
+
+    def command(self, args):
+        """Build the java command line for one copybara invocation."""
+        args = list(args)
+        if not any(arg.startswith("--config-root") for arg in args):
+            args.append(f"--config-root={self.repo_root}")
+        return [self.java, "-jar", str(self.ensure_jar())] + args
+
+    def run(self, args, env=None):
+        """Run one copybara invocation from the repository root and return its exit code."""
+        env = dict(os.environ if env is None else env)
+        env["COPYBARA_REPO_ROOT"] = str(self.repo_root)
+        result = run_watched(self.command(args), cwd=self.repo_root, env=env)
+        return result.returncode
+
+    def run_locked(self, args, env=None, lock=None):
+        """run() while holding the named resource lock (see run_locks.py), if one is given."""
+        if lock is None:
+            return self.run(args, env)
+        with resource_lock(lock):
+            return self.run(args, env)
+
+    def migrate_all(self, migrations, max_workers=1, locks=None):
+        """
+        Run several migrations and return {name: exit code}.
+
+        migrations is a list of (name, args, env) tuples; args are the copybara
+        arguments starting with "migrate". locks maps a migration's name to the
+        resource lock held while it runs, e.g. that of its destination repository.
+        """
+        self.ensure_jar()
+        locks = locks or {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = [
+                (name, executor.submit(self.run_locked, args, env, locks.get(name))) for name, args, env in migrations
+            ]
+            return {name: future.result() for name, future in futures}
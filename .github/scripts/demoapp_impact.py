@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Maps changed repository paths to the demo apps they affect.
+
+A demo app is affected by changes inside its own directory (demoapps/<name>/),
+to the core modules it is built against, as declared per app in
+DEMOAPP_DEPENDENCIES, and to the inputs every demo app build and sync shares
+(SHARED_INPUTS). Everything else is skipped.
+
+Usage:
+  python3 demoapp_impact.py <git-ref>
+Example:
+  python3 demoapp_impact.py v0.7.0
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+# Inputs of every demo app: the root build files, the version catalog
+# (gradle/libs.versions.toml) and the BOM decide which versions the core
+# artifacts resolve to, and the copybara config generates the sync workflow
+# of every demo app it lists.
+SHARED_INPUTS = (
+    ".github/copybara/",
+    "VERSION",
+    "build.gradle.kts",
+    "build-logic/",
+    "gradle.properties",
+    "gradle/",
+    "included-builds/",
+    "settings.gradle.kts",
+    "viaduct-bom/",
+)
+
+# The Gradle plugins, the artifacts they put on a demo app's classpath and run
+# for codegen (ViaductPluginCommon.BOM), and the core modules those depend on.
+# x/, shared/apiannotations and the tenant tutorials and integration tests are
+# not among them.
+VIADUCT_PLUGIN_MODULES = (
+    "gradle-plugins/",
+    "engine/api/",
+    "engine/runtime/",
+    "engine/wiring/",
+    "service/api/",
+    "service/runtime/",
+    "service/wiring/",
+    "shared/arbitrary/",
+    "shared/codegen/",
+    "shared/dataloader/",
+    "shared/deferred/",
+    "shared/graphql/",
+    "shared/invariants/",
+    "shared/logging/",
+    "shared/mapping/",
+    "shared/utils/",
+    "shared/viaductschema/",
+    "snipped/errors/",
+    "tenant/api/",
+    "tenant/codegen/",
+    "tenant/runtime/",
+    "tenant/wiring/",
+)
+
+# Core modules per demo app, on top of its own directory and SHARED_INPUTS
+DEMOAPP_DEPENDENCIES = {
+    # Apply the application and module plugins
+    "cli-starter": VIADUCT_PLUGIN_MODULES,
+    "jetty-starter": VIADUCT_PLUGIN_MODULES,
+    "ktor-starter": VIADUCT_PLUGIN_MODULES,
+    # Applies both plugins, and uses engine-wiring and tenant-api directly
+    "starwars": VIADUCT_PLUGIN_MODULES + ("engine/wiring/", "tenant/api/"),
+}
+
+
+def dependencies_for(demoapp_name):
+    """Return the path prefixes a demo app depends on, including its own directory."""
+    # An app that is not declared yet is assumed to use the plugins like the others
+    modules = DEMOAPP_DEPENDENCIES.get(demoapp_name, VIADUCT_PLUGIN_MODULES)
+    return (f"demoapps/{demoapp_name}/",) + SHARED_INPUTS + tuple(dict.fromkeys(modules))
+
+
+def is_affected(demoapp_name, changed_path):
+    """Whether a changed path (relative to the repository root) affects a demo app."""
+    for prefix in dependencies_for(demoapp_name):
+        if prefix.endswith("/"):
+            if changed_path.startswith(prefix):
+                return True
+        elif changed_path == prefix:
+            return True
+    return False
+
+
+def affected_demoapps(demoapp_names, changed_paths):
+    """Return the demo apps, in input order, affected by any of the changed paths."""
+    changed_paths = list(changed_paths)
+    return [
+        name for name in demoapp_names
+        if any(is_affected(name, path) for path in changed_paths)
+    ]
+
+
+def changed_paths_since(ref, cwd=None):
+    """Return the paths changed between a git ref and HEAD."""
+    result = subprocess.run(
+        ["git", "diff", "--name-only", ref, "HEAD"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [line for line in result.stdout.splitlines() if line]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Error: Missing required argument")
+        print("Usage: demoapp_impact.py <git-ref>")
+        return 1
+
+    repo_root = Path(__file__).parent.resolve().parent.parent
+    demoapp_names = sorted(p.name for p in (repo_root / "demoapps").iterdir() if p.is_dir())
+
+    affected = affected_demoapps(demoapp_names, changed_paths_since(argv[0], cwd=repo_root))
+    for name in affected:
+        print(name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+The demo apps to publish, derived from the copybara config and demoapps/.
+
+The airbnb-viaduct-to-<app> workflows of .github/copybara/copy.bara.sky are
+the source of truth for which demo apps are synced, and to which
+viaduct-graphql repository. The config is Starlark; rather than evaluating
+it, the registry reads one shape of workflow definition, with the name as the
+first argument and a string literal:
+
+  core.workflow(
+      name = "airbnb-viaduct-to-starwars",
+      ...
+  )
+
+Any other core.workflow() call (a name built with +, % or .format(), or
+taken from a variable) is reported along with that shape, and keeps the demo
+apps from being published until the workflow is written out that way.
+
+Each workflow is matched with its demoapps/<app> directory: a workflow
+without a directory, and a directory without a workflow (an app that would
+silently not be published), are both reported, and a workflow name that is
+not in the config is rejected before copybara or Gradle starts.
+
+The result is cached in build/demoapp-registry.json, keyed on the mtimes of
+the config and of the demoapps/ directories, so the scripts of one release
+run share one parse.
+
+Usage:
+  python3 demoapp_registry.py [--check]
+"""
+
+import argparse
+import dataclasses
+import difflib
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+
+CONFIG_PATH = Path(".github") / "copybara" / "copy.bara.sky"
+CACHE_PATH = Path("build") / "demoapp-registry.json"
+# Bumped whenever the cached format or the parsing changes
+CACHE_VERSION = 2
+
+WORKFLOW_PREFIX = "airbnb-viaduct-to-"
+DESTINATION_ORG = "viaduct-graphql"
+
+WORKFLOW_SHAPE = 'core.workflow(name = "airbnb-viaduct-to-<app>", ...)'
+WORKFLOW_CALL_PATTERN = re.compile(r"\bcore\.workflow\(")
+NAME_PATTERN = re.compile(r'\s*name\s*=\s*"([A-Za-z0-9._-]+)"\s*[,)]')
+# Whole-line comments are blanked, so a commented-out workflow is not read and line numbers stay put
+COMMENT_LINE_PATTERN = re.compile(r"^[ \t]*#[^\n]*$", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class DemoApp:
+    name: str
+    github_repo: str
+    workflow: str
+
+
+@dataclass
+class Registry:
+    """The demo apps with a copybara workflow, and what does not add up."""
+
+    apps: list = field(default_factory=list)
+    # Workflows whose demoapps/<name> directory does not exist
+    missing: list = field(default_factory=list)
+    # demoapps/ directories without a workflow
+    unregistered: list = field(default_factory=list)
+    # Workflow definitions that could not be read
+    problems: list = field(default_factory=list)
+    config_found: bool = True
+
+    def names(self):
+        return [app.name for app in self.apps]
+
+    def pairs(self):
+        """(name, github_repo) of every demo app, in config order."""
+        return [(app.name, app.github_repo) for app in self.apps]
+
+    def find(self, name):
+        for app in self.apps:
+            if app.name == name:
+                return app
+        return None
+
+    def workflow_problem(self, name):
+        """Why the demo app's workflow cannot run, or None when it can."""
+        if not self.config_found:
+            return f"no copybara config at {CONFIG_PATH}"
+        if self.find(name):
+            return None
+        if name in self.missing:
+            return f"{WORKFLOW_PREFIX}{name} is configured, but demoapps/{name} does not exist"
+        message = f"no copybara workflow {WORKFLOW_PREFIX}{name} in {CONFIG_PATH}"
+        close = difflib.get_close_matches(name, self.names(), n=1)
+        return f"{message} (did you mean {close[0]}?)" if close else message
+
+    def errors(self):
+        """What keeps the demo apps from being published."""
+        errors = [] if self.config_found else [f"no copybara config at {CONFIG_PATH}"]
+        errors += self.problems
+        return errors + [f"{WORKFLOW_PREFIX}{name}: demoapps/{name} does not exist" for name in self.missing]
+
+    def to_json(self):
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(**{**data, "apps": [DemoApp(**app) for app in data["apps"]]})
+
+
+def parse_workflows(text):
+    """(workflow names in definition order, problems) of a copybara config."""
+    text = COMMENT_LINE_PATTERN.sub("", text)
+    workflows = []
+    problems = []
+    for call in WORKFLOW_CALL_PATTERN.finditer(text):
+        match = NAME_PATTERN.match(text, call.end())
+        if not match:
+            line = text.count("\n", 0, call.start()) + 1
+            problems.append(f"{CONFIG_PATH}:{line}: cannot read the workflow name, write it as {WORKFLOW_SHAPE}")
+        elif match.group(1) not in workflows:
+            workflows.append(match.group(1))
+    return workflows, problems
+
+
+def demoapp_dirs(repo_root):
+    directory = Path(repo_root) / "demoapps"
+    if not directory.is_dir():
+        return []
+    return sorted(p for p in directory.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+
+def scan(repo_root):
+    """Build the registry from the config and demoapps/ without the cache."""
+    repo_root = Path(repo_root)
+    config = repo_root / CONFIG_PATH
+    registry = Registry()
+    present = [p.name for p in demoapp_dirs(repo_root)]
+    if config.is_file():
+        workflows, registry.problems = parse_workflows(config.read_text())
+        names = [w[len(WORKFLOW_PREFIX):] for w in workflows if w.startswith(WORKFLOW_PREFIX)]
+    else:
+        # The directories are still listed (e.g. for validation), but nothing is published
+        # and only the missing config is reported
+        registry.config_found = False
+        names = present
+    for name in names:
+        if name in present:
+            registry.apps.append(DemoApp(name, f"{DESTINATION_ORG}/{name}", WORKFLOW_PREFIX + name))
+        else:
+            registry.missing.append(name)
+    registry.unregistered = sorted(set(present) - set(names))
+    return registry
+
+
+def cache_key(repo_root):
+    """What the registry depends on: the config's and every demo app directory's mtime."""
+    repo_root = Path(repo_root)
+    config = repo_root / CONFIG_PATH
+    try:
+        config_stat = config.stat()
+        config_key = [config_stat.st_mtime_ns, config_stat.st_size]
+    except FileNotFoundError:
+        config_key = None
+    demoapps = repo_root / "demoapps"
+    return {
+        "version": CACHE_VERSION,
+        "config": config_key,
+        "demoapps": demoapps.stat().st_mtime_ns if demoapps.is_dir() else None,
+        # Creating or removing a demo app's files changes its directory's mtime
+        "apps": {p.name: p.stat().st_mtime_ns for p in demoapp_dirs(repo_root)},
+    }
+
+
+_loaded = {}
+
+
+def load_registry(repo_root=None):
+    """The registry of the checkout at repo_root (default: this one), from the cache when it is current."""
+    repo_root = Path(repo_root or REPO_ROOT).resolve()
+    key = cache_key(repo_root)
+    memo_key = (repo_root, json.dumps(key, sort_keys=True))
+    if memo_key in _loaded:
+        return _loaded[memo_key]
+
+    cache_path = repo_root / CACHE_PATH
+    try:
+        cached = json.loads(cache_path.read_text())
+        registry = Registry.from_json(cached["registry"]) if cached.get("key") == key else None
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        registry = None
+    if registry is None:
+        registry = scan(repo_root)
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # Written aside and renamed, so a concurrent reader never sees half a file
+            partial = cache_path.with_name(f"{cache_path.name}.{os.getpid()}")
+            partial.write_text(json.dumps({"key": key, "registry": registry.to_json()}, indent=2) + "\n")
+            partial.replace(cache_path)
+        except OSError:
+            pass
+    _loaded[memo_key] = registry
+    return registry
+
+
+def demo_apps(repo_root=None):
+    """(name, github_repo) of every demo app to publish."""
+    return load_registry(repo_root).pairs()
+
+
+def report(registry):
+    """Print what does not add up; returns whether the demo apps can be published."""
+    for name in registry.unregistered:
+        print(f"⚠️  demoapps/{name} has no {WORKFLOW_PREFIX}{name} workflow and will not be published")
+    errors = registry.errors()
+    for error in errors:
+        print(f"❌ {error}")
+    return not errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List the demo apps the copybara config publishes.")
+    parser.add_argument("--check", action="store_true", help="Exit with 1 if any workflow does not add up")
+    args = parser.parse_args(argv)
+
+    registry = load_registry()
+    for app in registry.apps:
+        print(f"{app.name:<16} {app.workflow:<36} {app.github_repo}")
+    ok = report(registry)
+    return 1 if args.check and not ok else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,26 +2,60 @@
 """
 Generic script to push demo apps from airbnb/viaduct to viaduct-graphql org repositories.
 This script is called by the individual demo app wrapper scripts.
-Usage: demoapp_to_external_push.py <demoapp-name> <github-repo>
+Usage: demoapp_to_external_push.py <demoapp-name> <github-repo> [--exporter copybara|fast-import] [--destination <path>]
 Example: demoapp_to_external_push.py starwars viaduct-graphql/starwars
+         demoapp_to_external_push.py starwars viaduct-graphql/starwars --exporter fast-import --destination /tmp/starwars.git
+
+The fast-import exporter (see fast_export.py) writes into a local destination
+repository without starting a JVM; use it for dry runs and local verification.
+
+--source-mode full hands copybara a complete worktree instead of the default
+sparse checkout of the demo app, to compare copybara wall time and block I/O.
 """
 
+import argparse
 import os
+import resource
 import sys
+import shutil
 import subprocess
-import re
 import atexit
+import time
 from pathlib import Path
 
+from copybara_runner import describe_exit, is_successful_exit
+from demoapp_registry import WORKFLOW_PREFIX, load_registry
+from fast_export import export_demoapp
+from git_meta import current_branch, head_commit, toplevel
+from gradle_runner import GradleRunner
+from log_signatures import BUILD_LOG, report_failed_build
+from process_watchdog import run_watched
+from run_locks import lock_name, project_lock, resource_lock, run_workspace
+from task_timings import run_timed_build
+from version_index import build_index
+from version_rewrite import rewrite_versions
+
 
 class DemoAppPublisher:
     """Handles publishing a demo app to an external GitHub repository."""
 
-    def __init__(self, demoapp_name, github_repo):
+    EXPORTERS = ("copybara", "fast-import")
+    SOURCE_MODES = ("sparse", "full")
+
+    # Paths the copybara workflow needs in the export source besides the demo app itself
+    COPYBARA_SOURCE_PATHS = (".github/copybara",)
+
+    def __init__(self, demoapp_name, github_repo, exporter="copybara", destination=None, source_mode="sparse", repo_root=None):
+        if exporter not in self.EXPORTERS:
+            raise ValueError(f"Unknown exporter: {exporter}")
+        if exporter == "fast-import" and not destination:
+            raise ValueError("The fast-import exporter requires a local destination repository")
         self.demoapp_name = demoapp_name
         self.github_repo = github_repo
+        self.exporter = exporter
+        self.source_mode = source_mode
         self.script_dir = Path(__file__).parent.resolve()
-        self.repo_root = self.script_dir.parent.parent
+        self.repo_root = Path(repo_root) if repo_root else self.script_dir.parent.parent
         self.demoapps_dir = self.repo_root / "demoapps"
         self.demoapp_dir = self.demoapps_dir / demoapp_name
         self.copybara_config = self.repo_root / ".github" / "copybara" / "copy.bara.sky"
@@ -42,14 +76,20 @@ class DemoAppPublisher:
             self.destination_repo = f"git@github.com:{github_repo}.git"
             self.auth_method = "SSH (local)"
 
+        if exporter == "fast-import":
+            # Local destination repository, no authentication involved
+            self.destination_repo = str(Path(destination).resolve())
+            self.auth_method = "local git fast-import"
+
         print(f"Using {self.auth_method} for {self.destination_repo}")
 
         # Register cleanup handler
         atexit.register(self.cleanup)
 
         # Track what we modified
-        self.netrc_modified = False
         self.source_repo = None
+        self.export_dir = None
+        self.published_version = None
 
     @staticmethod
     def detect_ci_environment():
@@ -74,125 +114,191 @@ class DemoAppPublisher:
 
     def cleanup(self):
         """Restore modified files on exit."""
-        # Clean up netrc if we added to it
-        if self.netrc_modified:
-            netrc_path = Path.home() / ".netrc"
-            if netrc_path.exists():
-                try:
-                    content = netrc_path.read_text()
-                    # Remove our section
-                    content = re.sub(
-                        r"# BEGIN TEMP GIT ACCESS\n.*?# END TEMP GIT ACCESS\n",
-                        "",
-                        content,
-                        flags=re.DOTALL,
-                    )
-                    netrc_path.write_text(content)
-                except Exception as e:
-                    print(f"Warning: Could not clean up .netrc: {e}")
-
-        # Restore modified gradle.properties
-        gradle_props = self.demoapp_dir / "gradle.properties"
-        if gradle_props.exists():
-            try:
-                subprocess.run(
-                    ["git", "checkout", "--", str(gradle_props)],
-                    cwd=self.script_dir,
-                    capture_output=True,
-                    check=False,
-                )
-            except Exception:
-                pass
-
-    def setup_netrc(self):
-        """Set up .netrc for HTTPS authentication (CI only)."""
-        if not self.is_ci:
-            # Local execution uses SSH, no netrc needed
-            return
-
-        if not self.github_token:
-            # No token available, skip netrc setup
-            return
-
-        netrc_path = Path.home() / ".netrc"
-        netrc_entry = f"""# BEGIN TEMP GIT ACCESS
-machine github.com
-login x-access-token
-password {self.github_token}
-# END TEMP GIT ACCESS
-"""
-
-        with open(netrc_path, "a") as f:
-            f.write(netrc_entry)
-
-        netrc_path.chmod(0o600)
-        self.netrc_modified = True
+        # Remove the export worktree (the shared checkout is never modified)
+        if self.export_dir:
+            self.remove_export_worktree()
+
+    def git_credential_env(self):
+        """
+        Build the environment for git child processes (CI only adds credentials).
+
+        The token is handed to git through an environment-scoped credential helper
+        (GIT_CONFIG_COUNT/KEY/VALUE), so nothing is written to ~/.netrc or any other
+        shared file and concurrent publishers cannot clobber each other's credentials.
+        """
+        env = os.environ.copy()
+        if not self.is_ci or not self.github_token:
+            # Local execution uses SSH, no credentials needed
+            return env
+
+        count = int(env.get("GIT_CONFIG_COUNT", "0"))
+        helper_key = "credential.https://github.com.helper"
+        config = [
+            # An empty value resets any helper configured globally
+            (helper_key, ""),
+            (
+                helper_key,
+                '!f() { test "$1" = get && echo username=x-access-token'
+                ' && echo "password=$VIADUCT_GIT_CREDENTIAL_TOKEN"; }; f',
+            ),
+        ]
+        for offset, (key, value) in enumerate(config):
+            env[f"GIT_CONFIG_KEY_{count + offset}"] = key
+            env[f"GIT_CONFIG_VALUE_{count + offset}"] = value
+        env["GIT_CONFIG_COUNT"] = str(count + len(config))
+        env["VIADUCT_GIT_CREDENTIAL_TOKEN"] = self.github_token
+        env["GIT_TERMINAL_PROMPT"] = "0"
+        return env
 
     def determine_source_repo(self):
         """Determine source repository location."""
-        result = subprocess.run(
-            ["git", "rev-parse", "--show-toplevel"],
-            cwd=self.script_dir,
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        git_root = result.stdout.strip()
-        if not git_root:
-            raise RuntimeError("Could not determine git repository root")
+        if self.export_dir:
+            source_repo = f"file://{self.export_dir}"
+            print(f"Using repository location: {source_repo}")
+            return source_repo
+
+        git_root = toplevel(self.script_dir)
 
         source_repo = f"file://{git_root}"
         print(f"Using repository location: {source_repo}")
         return source_repo
 
-    def update_gradle_properties(self, published_version):
-        """Update gradle.properties with the published version."""
-        props_file = self.demoapp_dir / "gradle.properties"
+    def create_export_worktree(self):
+        """
+        Materialize HEAD into a private, detached checkout for this export.
+
+        The version override is applied there, so the shared checkout is never
+        modified and several publishers (or a publisher and a validator) can run
+        at the same time.
+
+        With the default "sparse" source mode, the checkout is a --shared clone
+        (objects are borrowed through alternates, nothing is copied) limited by a
+        cone-mode sparse checkout to demoapps/<name> plus the copybara config, so
+        copybara scans one demo app instead of the whole monorepo. The "full"
+        source mode checks out the complete tree in a git worktree instead.
+        """
+        # Inside this run's workspace, so concurrent runs never share an export checkout
+        self.export_dir = run_workspace() / f"export-{self.demoapp_name}"
+        shutil.rmtree(self.export_dir, ignore_errors=True)
+        self.export_dir.mkdir(parents=True)
+        start = time.monotonic()
+
+        if self.source_mode == "sparse":
+            head = head_commit(self.repo_root)
+            commands = [
+                ["git", "clone", "--shared", "--no-checkout", "--single-branch", "--no-tags", "--quiet",
+                 str(self.repo_root), str(self.export_dir)],
+                ["git", "-C", str(self.export_dir), "sparse-checkout", "set", "--cone",
+                 f"demoapps/{self.demoapp_name}", *self.COPYBARA_SOURCE_PATHS],
+                ["git", "-C", str(self.export_dir), "checkout", "--quiet", "--detach", head],
+            ]
+        else:
+            commands = [
+                ["git", "worktree", "add", "--detach", "--quiet", str(self.export_dir), "HEAD"],
+            ]
+
+        try:
+            for cmd in commands:
+                subprocess.run(cmd, cwd=self.repo_root, check=True)
+        except (OSError, subprocess.CalledProcessError):
+            # Leave no half-made checkout (or registered worktree) behind
+            self.remove_export_worktree()
+            raise
+
+        file_count, total_bytes = self.measure_tree(self.export_dir)
+        print(f"Exporting from {self.source_mode} checkout: {self.export_dir}")
         print(
-            f"Updating {self.demoapp_name} gradle.properties to use published version: {published_version}"
+            f"   {file_count} files, {total_bytes / (1024 * 1024):.1f} MiB materialized "
+            f"in {time.monotonic() - start:.2f}s"
         )
+        return self.export_dir
+
+    @staticmethod
+    def measure_tree(root):
+        """Return (file count, total bytes) of a checkout, excluding .git."""
+        file_count = 0
+        total_bytes = 0
+        for directory, dirnames, filenames in os.walk(root):
+            if ".git" in dirnames:
+                dirnames.remove(".git")
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if not os.path.islink(path):
+                    file_count += 1
+                    total_bytes += os.path.getsize(path)
+        return file_count, total_bytes
+
+    def remove_export_worktree(self):
+        """Remove the export checkout and, for worktrees, their administrative files."""
+        if self.source_mode == "full":
+            subprocess.run(
+                ["git", "worktree", "remove", "--force", str(self.export_dir)],
+                cwd=self.repo_root,
+                capture_output=True,
+                check=False,
+            )
+        shutil.rmtree(self.export_dir, ignore_errors=True)
+        if self.source_mode == "full":
+            subprocess.run(
+                ["git", "worktree", "prune"],
+                cwd=self.repo_root,
+                capture_output=True,
+                check=False,
+            )
+        self.export_dir = None
 
-        content = props_file.read_text()
-        content = re.sub(
-            r"^viaductVersion=.*",
-            f"viaductVersion={published_version}",
-            content,
-            flags=re.MULTILINE,
+    def update_gradle_properties(self, published_version, root=None):
+        """Update gradle.properties with the published version inside the given tree (default: export worktree)."""
+        if root is None:
+            root = self.export_dir or self.repo_root
+        props_file = Path(root) / "demoapps" / self.demoapp_name / "gradle.properties"
+        print(
+            f"Updating {self.demoapp_name} gradle.properties to use published version: {published_version}"
         )
-        props_file.write_text(content)
 
-    def run_copybara(self):
-        """Run copybara to sync the demo app using shared config."""
+        locations = build_index(root).for_path(props_file)
+        # The export checkout is private to this run: a lock there would guard nothing
+        # and leave build/locks/ in the copybara source
+        rewrite_versions(root, published_version, locations, lock=Path(root) != self.export_dir)
+
+    @property
+    def workflow_name(self):
         # Workflow name matches the pattern airbnb-viaduct-to-<demoapp>
         # These are generated dynamically in the copybara config
-        workflow_name = f"airbnb-viaduct-to-{self.demoapp_name}"
-
-        # Prepare destination URL with authentication for CI
-        if self.is_ci and self.github_token:
-            # CI: Use HTTPS with token
-            final_repo = self.destination_repo.replace(
-                "https://", f"https://x-access-token:{self.github_token}@"
-            )
-        else:
-            # Local: Use SSH (no modification needed)
-            final_repo = self.destination_repo
+        return f"{WORKFLOW_PREFIX}{self.demoapp_name}"
+
+    @property
+    def copybara_lock(self):
+        # Two runs pushing to one destination would race on its branch and copybara's cache of it
+        return lock_name("copybara", self.github_repo)
+
+    def verify_workflow(self):
+        """Verify the copybara config defines this demo app's workflow (see demoapp_registry.py)."""
+        problem = load_registry(self.repo_root).workflow_problem(self.demoapp_name)
+        if problem:
+            print(f"❌ Cannot sync {self.demoapp_name}: {problem}")
+            return False
+        return True
 
-        print(f"Running copybara for {self.demoapp_name} (workflow: {workflow_name})")
-        print(f"Environment: {'CI' if self.is_ci else 'Local'}")
-        print(f"Source: {self.source_repo}")
-        print(f"Destination: {self.destination_repo}")
-        print(f"Config: {self.copybara_config}")
+    def copybara_args(self):
+        """Build the copybara arguments for this demo app's migration."""
+        # Credentials are supplied per process by git_credential_env(), so the
+        # token never appears in the destination URL or on the command line
+        final_repo = self.destination_repo
 
-        # Build copybara command
-        # Copybara requires: copybara migrate <config> <workflow> [options]
+        # Copybara requires: copybara migrate <config> <workflow> [source_ref] [options]
         # Origin is the current checked out repository (copybara runs from repo root)
         # Destination URL is overridden at runtime to handle CI vs local differences
-        # Note: --config-root is automatically added by tools/copybara/run
-        cmd = [
-            "tools/copybara/run",
+        # Note: --config-root is added by tools/copybara/run and CopybaraRunner
+        args = [
             "migrate",
             str(self.copybara_config),
-            workflow_name,
+            self.workflow_name,
+        ]
+        if self.export_dir:
+            # Source ref: the export worktree holding the version override
+            args.append(str(self.export_dir))
+        args += [
             f"--git-destination-url={final_repo}",
             "--git-committer-email",
             "viabot@ductworks.io",
@@ -200,39 +306,61 @@ password {self.github_token}
             "ViaBot",
             "--force",  # Force migration even if last-rev cannot be found
         ]
+        return args
 
-        result = subprocess.run(cmd, check=False)
+    def run_copybara(self, runner=None):
+        """
+        Run copybara to sync the demo app using shared config.
 
-        # Google's copybara returns 4 for NO_OP (no changes to sync)
-        # See: https://github.com/google/copybara/blob/master/copybara/integration/tool_test.sh#L24
-        NO_OP_EXIT_CODE = 4
+        With a CopybaraRunner, copybara is launched directly on a JVM; otherwise
+        it goes through tools/copybara/run.
+        """
+        print(f"Running copybara for {self.demoapp_name} (workflow: {self.workflow_name})")
+        print(f"Environment: {'CI' if self.is_ci else 'Local'}")
+        print(f"Source: {self.source_repo}")
+        print(f"Destination: {self.destination_repo}")
+        print(f"Config: {self.copybara_config}")
 
-        if result.returncode == 0 or result.returncode == NO_OP_EXIT_CODE:
-            print(f"Successfully synced {self.demoapp_name} to external repository")
+        usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        start = time.monotonic()
+        with resource_lock(self.copybara_lock):
+            if runner is not None:
+                returncode = runner.run(self.copybara_args(), env=self.git_credential_env())
+            else:
+                cmd = ["tools/copybara/run"] + self.copybara_args()
+                returncode = run_watched(cmd, cwd=self.repo_root, env=self.git_credential_env()).returncode
+        usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        # Block counts are in 512-byte units and only include I/O that reached the disk
+        print(
+            f"⏱  copybara ({self.source_mode} source): {time.monotonic() - start:.2f}s wall, "
+            f"{usage_after.ru_inblock - usage_before.ru_inblock} blocks read, "
+            f"{usage_after.ru_oublock - usage_before.ru_oublock} blocks written"
+        )
+        return self.report_copybara_result(returncode)
+
+    def report_copybara_result(self, returncode):
+        """Print the outcome of a copybara run and return 0 on success (including NO_OP)."""
+        if is_successful_exit(returncode):
+            print(f"Successfully synced {self.demoapp_name} to external repository ({describe_exit(returncode)})")
             return 0
         else:
             print(
-                f"Failed to sync {self.demoapp_name} (exit code: {result.returncode})"
+                f"Failed to sync {self.demoapp_name} (exit code: {returncode})"
             )
-            return result.returncode
+            return returncode
 
     def verify_individual_build(self):
         """Verify that the demo app builds independently."""
         print(f"Verifying {self.demoapp_name} builds independently...")
 
         # Change to the demoapp directory and run gradlew
-        result = subprocess.run(
-            ["./gradlew", "build", "--no-daemon"],
-            cwd=self.demoapp_dir,
-            capture_output=True,
-            text=True,
-        )
-
-        if result.returncode != 0:
-            print(f"❌ {self.demoapp_name} failed to build independently")
-            print(f"stdout: {result.stdout}")
-            print(f"stderr: {result.stderr}")
-            return False
+        with project_lock(self.demoapp_dir):
+            result = run_timed_build(GradleRunner.from_environment(), ["build"], self.demoapp_dir)
+            if result.returncode != 0:
+                print(f"❌ {self.demoapp_name} failed to build independently")
+                report_failed_build(result, Path(self.demoapp_dir) / BUILD_LOG)
+                return False
 
         print(f"✅ {self.demoapp_name} builds successfully")
         return True
@@ -240,14 +368,7 @@ password {self.github_token}
     def verify_release_version_matches_branch(self):
         """Verify that the release version in gradle.properties matches the branch name."""
         # Get current branch name
-        result = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-            cwd=self.script_dir,
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        branch_name = result.stdout.strip()
+        branch_name = current_branch(self.script_dir)
 
         # Check if we're on a release branch (release/vX.Y.Z)
         if not branch_name.startswith("release/v"):
@@ -264,14 +385,12 @@ password {self.github_token}
             print(f"❌ gradle.properties not found at {props_file}")
             return False
 
-        content = props_file.read_text()
-        version_match = re.search(r"^viaductVersion=(.+)$", content, re.MULTILINE)
-
-        if not version_match:
+        declarations = build_index(self.repo_root).for_path(props_file)
+        if not declarations:
             print(f"❌ viaductVersion not found in {props_file}")
             return False
 
-        demoapp_version = version_match.group(1)
+        demoapp_version = declarations[0].value
 
         # Compare versions
         if demoapp_version != branch_version:
@@ -283,8 +402,12 @@ password {self.github_token}
         print(f"✅ Version matches branch: {branch_version}")
         return True
 
-    def publish(self):
-        """Main publish workflow."""
+    def prepare(self):
+        """Run every step before copybara: checks, build and the export worktree. Returns 0 on success."""
+        # Reject an unknown workflow before any JVM starts
+        if self.exporter == "copybara" and not self.verify_workflow():
+            return 1
+
         # Verify we're on a release branch and version matches
         if not self.verify_release_version_matches_branch():
             return 1
@@ -294,27 +417,14 @@ password {self.github_token}
             return 1
 
         # Validate auth for CI
-        if self.is_ci and not self.github_token:
+        if self.exporter == "copybara" and self.is_ci and not self.github_token:
             print(
                 "Error: VIADUCT_GRAPHQL_GITHUB_ACCESS_TOKEN environment variable is required in CI"
             )
             return 1
 
-        # Setup authentication (CI only - sets up .netrc for HTTPS)
-        self.setup_netrc()
-
-        # Determine source repository
-        self.source_repo = self.determine_source_repo()
-
         # Extract version from branch name (e.g., release/v0.7.0 -> 0.7.0)
-        result = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-            cwd=self.script_dir,
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        branch_name = result.stdout.strip()
+        branch_name = current_branch(self.script_dir)
         if branch_name.startswith("release/v"):
             published_version = branch_name[len("release/v"):]
             print(f"Using version from branch: {published_version}")
@@ -322,24 +432,87 @@ password {self.github_token}
             print(f"Error: Not on a release branch. Current branch: {branch_name}")
             return 1
 
-        # Update gradle.properties with published version
-        self.update_gradle_properties(published_version)
+        self.published_version = published_version
+
+        if self.exporter == "fast-import":
+            # The version override is applied while streaming, no worktree needed
+            self.source_repo = f"file://{self.repo_root}"
+            return 0
+
+        # Apply the published version in a private export worktree
+        self.create_export_worktree()
+        try:
+            self.update_gradle_properties(published_version)
+        except Exception:
+            self.remove_export_worktree()
+            raise
+
+        # Determine source repository
+        self.source_repo = self.determine_source_repo()
+        return 0
 
-        # Run copybara with shared config
-        return self.run_copybara()
+    def run_fast_export(self):
+        """Export the demo app into the local destination repository with git fast-import."""
+        print(f"Exporting {self.demoapp_name} with git fast-import")
+        print(f"Source: {self.source_repo}")
+        print(f"Destination: {self.destination_repo}")
 
+        try:
+            # Exports into one destination take turns, like copybara runs do
+            with resource_lock(lock_name("fast-import", self.destination_repo)):
+                commit = export_demoapp(
+                    self.repo_root, self.demoapp_name, self.destination_repo, self.published_version
+                )
+        except (RuntimeError, subprocess.CalledProcessError) as e:
+            print(f"Failed to export {self.demoapp_name}: {e}")
+            return 1
 
-def main():
-    if len(sys.argv) < 3:
-        print("Error: Missing required arguments")
-        print("Usage: demoapp_to_external_push.py <demoapp-name> <github-repo>")
-        print("Example: demoapp_to_external_push.py starwars viaduct-graphql/starwars")
-        return 1
+        if commit:
+            print(f"Successfully exported {self.demoapp_name} ({commit[:12]})")
+        else:
+            print(f"Successfully exported {self.demoapp_name} (NO_OP, nothing to sync)")
+        return 0
 
-    demoapp_name = sys.argv[1]
-    github_repo = sys.argv[2]
+    def publish(self, runner=None):
+        """Main publish workflow."""
+        if self.prepare() != 0:
+            return 1
 
-    publisher = DemoAppPublisher(demoapp_name, github_repo)
+        start = time.monotonic()
+        if self.exporter == "fast-import":
+            returncode = self.run_fast_export()
+        else:
+            # Run copybara with shared config
+            returncode = self.run_copybara(runner)
+        print(f"⏱  {self.exporter} export of {self.demoapp_name} took {time.monotonic() - start:.2f}s")
+        return returncode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Push a demo app to its external repository.")
+    parser.add_argument("demoapp_name", help="Demo app directory name under demoapps/ (e.g., starwars)")
+    parser.add_argument("github_repo", help="Destination GitHub repository (e.g., viaduct-graphql/starwars)")
+    parser.add_argument(
+        "--exporter",
+        choices=DemoAppPublisher.EXPORTERS,
+        default="copybara",
+        help="Export backend (default: copybara)",
+    )
+    parser.add_argument("--destination", help="Local destination repository for the fast-import exporter")
+    parser.add_argument(
+        "--source-mode",
+        choices=DemoAppPublisher.SOURCE_MODES,
+        default="sparse",
+        help="Copybara source checkout: sparse shared clone of the demo app (default) or full worktree",
+    )
+    args = parser.parse_args(argv)
+
+    if args.exporter == "fast-import" and not args.destination:
+        parser.error("--exporter fast-import requires --destination")
+
+    publisher = DemoAppPublisher(
+        args.demoapp_name, args.github_repo, args.exporter, args.destination, args.source_mode
+    )
     return publisher.publish()
 
 
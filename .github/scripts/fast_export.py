@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Exports demoapps/<name> into a destination git repository without copybara.
+
+The subtree at a source revision is listed with `git ls-tree`, its blobs are
+streamed out of `git cat-file --batch` and straight into `git fast-import` on
+the destination repository. The result mirrors the copybara workflow: the
+demo app directory becomes the repository root, viaductVersion is set to the
+published version, and the commit carries a GitOrigin-RevId trailer.
+
+The destination is a local repository (bare or not), which makes this backend
+suitable for dry runs, local verification and tests; it does not push.
+
+Usage:
+  python3 fast_export.py <demoapp-name> <destination-repo> [--version <v>] [--rev <rev>] [--branch <b>]
+Example:
+  python3 fast_export.py starwars /tmp/starwars.git --version 0.7.0
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from version_index import GRADLE_PROPERTIES_PATTERN
+
+COMMITTER_NAME = "ViaBot"
+COMMITTER_EMAIL = "viabot@ductworks.io"
+# Each export stages its commit under its own ref, so concurrent exports never overwrite each other's
+STAGING_REF_PREFIX = "refs/viaduct-export/"
+
+
+def list_subtree(source_repo, rev, subpath):
+    """Return (mode, object id, path relative to subpath) for every entry under subpath at rev."""
+    prefix = subpath.rstrip("/") + "/"
+    result = subprocess.run(
+        ["git", "ls-tree", "-r", "-z", "--full-tree", rev, "--", prefix],
+        cwd=source_repo,
+        capture_output=True,
+        check=True,
+    )
+    entries = []
+    for record in result.stdout.split(b"\0"):
+        if not record:
+            continue
+        meta, path = record.split(b"\t", 1)
+        mode, object_type, object_id = meta.decode().split(" ")
+        if object_type != "blob":
+            # Submodules cannot be exported as file content
+            continue
+        entries.append((mode, object_id, path.decode()[len(prefix):]))
+    return entries
+
+
+def quote_path(path):
+    """Quote a path for a fast-import filemodify command when needed."""
+    if not any(c in path for c in '"\\\n') and not path.startswith('"'):
+        return path
+    escaped = path.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def rewrite_gradle_properties(content, version):
+    """Set viaductVersion in gradle.properties content (bytes)."""
+    text = content.decode()
+    return GRADLE_PROPERTIES_PATTERN.sub(lambda _: f"viaductVersion={version}", text).encode()
+
+
+def resolve(repo, ref):
+    result = subprocess.run(
+        ["git", "rev-parse", "--verify", "--quiet", ref],
+        cwd=repo,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip() or None
+
+
+def write_fast_import_stream(out, source_repo, entries, message, parent, staging_ref, version=None):
+    """Write one fast-import commit of staging_ref to `out`, reading blob content from `git cat-file --batch`."""
+    timestamp = int(time.time())
+    message_bytes = message.encode()
+    out.write(f"commit {staging_ref}\n".encode())
+    out.write(f"committer {COMMITTER_NAME} <{COMMITTER_EMAIL}> {timestamp} +0000\n".encode())
+    out.write(f"data {len(message_bytes)}\n".encode() + message_bytes + b"\n")
+    if parent:
+        out.write(f"from {parent}\n".encode())
+    out.write(b"deleteall\n")
+
+    with subprocess.Popen(
+        ["git", "cat-file", "--batch"],
+        cwd=source_repo,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    ) as cat_file:
+        for mode, object_id, path in entries:
+            cat_file.stdin.write(f"{object_id}\n".encode())
+            cat_file.stdin.flush()
+            header = cat_file.stdout.readline().split()
+            size = int(header[2])
+            content = cat_file.stdout.read(size)
+            cat_file.stdout.read(1)  # trailing newline
+
+            if version and path == "gradle.properties":
+                content = rewrite_gradle_properties(content, version)
+
+            out.write(f"M {mode} inline {quote_path(path)}\n".encode())
+            out.write(f"data {len(content)}\n".encode() + content + b"\n")
+    out.write(b"\n")
+
+
+def export_demoapp(source_repo, demoapp_name, destination_repo, version=None, rev="HEAD", branch="main"):
+    """
+    Export demoapps/<demoapp_name> at rev into destination_repo's branch.
+
+    Returns the new commit id, or None when the destination tree is already
+    identical (the equivalent of copybara's NO_OP).
+    """
+    source_sha = resolve(source_repo, f"{rev}^{{commit}}")
+    if not source_sha:
+        raise RuntimeError(f"Could not resolve {rev} in {source_repo}")
+
+    entries = list_subtree(source_repo, source_sha, f"demoapps/{demoapp_name}")
+    if not entries:
+        raise RuntimeError(f"demoapps/{demoapp_name} is empty or missing at {rev}")
+
+    branch_ref = f"refs/heads/{branch}"
+    parent = resolve(destination_repo, branch_ref)
+    message = f"Sync {demoapp_name} from airbnb/viaduct\n\nGitOrigin-RevId: {source_sha}\n"
+    staging_ref = f"{STAGING_REF_PREFIX}{demoapp_name}-{uuid.uuid4().hex}"
+
+    fast_import = subprocess.Popen(
+        ["git", "fast-import", "--quiet", "--force"],
+        cwd=destination_repo,
+        stdin=subprocess.PIPE,
+    )
+    try:
+        write_fast_import_stream(fast_import.stdin, source_repo, entries, message, parent, staging_ref, version)
+    finally:
+        fast_import.stdin.close()
+    if fast_import.wait() != 0:
+        raise RuntimeError(f"git fast-import failed in {destination_repo}")
+
+    try:
+        new_commit = resolve(destination_repo, staging_ref)
+        if parent and resolve(destination_repo, f"{new_commit}^{{tree}}") == resolve(destination_repo, f"{parent}^{{tree}}"):
+            return None
+        update_ref = ["git", "update-ref", branch_ref, new_commit]
+        # Only move the branch if nobody else moved it since we read it
+        update_ref.append(parent or "0" * 40)
+        subprocess.run(update_ref, cwd=destination_repo, check=True)
+        return new_commit
+    finally:
+        subprocess.run(["git", "update-ref", "-d", staging_ref], cwd=destination_repo, check=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a demo app into a local git repository via git fast-import.")
+    parser.add_argument("demoapp_name", help="Demo app directory name under demoapps/")
+    parser.add_argument("destination", help="Path to the destination git repository")
+    parser.add_argument("--version", help="viaductVersion to write into the exported gradle.properties")
+    parser.add_argument("--rev", default="HEAD", help="Source revision (default: HEAD)")
+    parser.add_argument("--branch", default="main", help="Destination branch (default: main)")
+    args = parser.parse_args(argv)
+
+    repo_root = Path(__file__).parent.resolve().parent.parent
+    start = time.monotonic()
+    commit = export_demoapp(repo_root, args.demoapp_name, args.destination, args.version, args.rev, args.branch)
+    elapsed = time.monotonic() - start
+
+    if commit:
+        print(f"✅ Exported {args.demoapp_name} to {args.destination} ({commit[:12]}) in {elapsed:.2f}s")
+    else:
+        print(f"✅ {args.destination} already up to date (NO_OP) in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,16 +2,41 @@
 import argparse
 import re
 import subprocess
+import sys
+from pathlib import Path
+
+from git_meta import toplevel
+from tag_catalog import TagCatalog, parse_version, read_repo_version
 
 # Generate changelog between two git refs
 # Usage: python generate_changelog.py <commit1> <commit2>
+#        python generate_changelog.py --since-last-release [<commit2>]
 # Example: python generate_changelog.py v1.0.0 v1.1.0
 # This will output the changelog entries between the two commits, including co-authors formatted as GitHub usernames.
-def main():
+# With --since-last-release, the first ref is the latest release tag below the VERSION file's version
+# (see tag_catalog.py), or the first commit when there is no release yet.
+def main(argv=None):
   parser = argparse.ArgumentParser(description='Generate changelog between two git refs.')
-  parser.add_argument('commit1', help='First git ref')
-  parser.add_argument('commit2', help='Second git ref')
-  args = parser.parse_args()
+  parser.add_argument('commit1', nargs='?', help='First git ref')
+  parser.add_argument('commit2', nargs='?', help='Second git ref')
+  parser.add_argument(
+    '--since-last-release',
+    action='store_true',
+    help='Start from the latest release tag below VERSION; the only ref given (default: HEAD) is the second'
+  )
+  args = parser.parse_args(argv)
+
+  if args.since_last_release:
+    if args.commit2:
+      parser.error('--since-last-release takes at most one ref')
+    args.commit2 = args.commit1 or 'HEAD'
+    try:
+      args.commit1 = find_last_release()
+    except ValueError as e:
+      print(f'❌ {e}', file=sys.stderr)
+      return 1
+  elif not args.commit1 or not args.commit2:
+    parser.error('two refs are required unless --since-last-release is given')
 
   git_cmd = [
     'git', 'log',
@@ -30,6 +55,28 @@ def main():
   changelog = "\n".join(formatted_entries)
 
   print(changelog)
+  return 0
+
+def find_last_release() -> str:
+  """The latest release tag below the VERSION file's version, or the first commit if there is none."""
+  repo_root = toplevel(Path(__file__).parent)
+  version = read_repo_version(repo_root)
+  if version is not None and parse_version(version) is None:
+    raise ValueError(f'VERSION is not a semantic version: {version!r}')
+  last_release = TagCatalog.from_repository(repo_root).previous_release(before=version)
+  if last_release:
+    print(f'Previous release: {last_release}', file=sys.stderr)
+    return last_release
+
+  print('No previous release tag found, using first commit', file=sys.stderr)
+  result = subprocess.run(
+    ['git', 'rev-list', '--max-parents=0', 'HEAD'],
+    cwd=repo_root,
+    capture_output=True,
+    text=True,
+    check=True
+  )
+  return result.stdout.split()[0]
 
 def should_include_entry(entry: str) -> bool:
   commit_message_end = entry.find(' by AUTHOR_START')
@@ -120,4 +167,4 @@ def extract_username(author_line: str) -> str:
   return ""
 
 if __name__ == '__main__':
-  main()
+  sys.exit(main())
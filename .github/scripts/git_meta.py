@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Reads git metadata (current branch, HEAD commit, repository root, refs)
+straight from the .git directory instead of forking `git rev-parse`.
+
+HEAD, loose refs and packed-refs are plain files, so answering "which branch
+are we on" takes a couple of reads. Results are memoized per repository for
+the life of the process. Layouts this reader does not handle (GIT_DIR /
+GIT_WORK_TREE overrides, the reftable ref backend, no .git directory found)
+fall back to the git CLI.
+
+Usage:
+  python3 git_meta.py [branch|head|toplevel|tags]
+Example:
+  python3 git_meta.py branch
+"""
+
+import functools
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SYMREF_PREFIX = "ref: "
+
+
+def find_dot_git(start):
+    """The .git entry (directory or gitfile) of the working tree containing start, or None."""
+    path = Path(start).resolve()
+    for directory in [path, *path.parents]:
+        candidate = directory / ".git"
+        if candidate.exists():
+            return candidate
+    return None
+
+
+class GitMeta:
+    """Git metadata of one working tree, read from its git directory and memoized."""
+
+    def __init__(self, toplevel, git_dir, common_dir):
+        self.toplevel = Path(toplevel)
+        self.git_dir = Path(git_dir)
+        self.common_dir = Path(common_dir)
+        self._resolved = {}
+
+    @classmethod
+    def from_dot_git(cls, dot_git):
+        dot_git = Path(dot_git)
+        if dot_git.is_dir():
+            git_dir = dot_git
+        else:
+            # Linked worktrees and submodules: ".git" is a file pointing at the git directory
+            content = dot_git.read_text().strip()
+            if not content.startswith("gitdir: "):
+                return None
+            git_dir = (dot_git.parent / content[len("gitdir: "):]).resolve()
+
+        common_dir = git_dir
+        commondir_file = git_dir / "commondir"
+        if commondir_file.exists():
+            common_dir = (git_dir / commondir_file.read_text().strip()).resolve()
+
+        if (common_dir / "reftable").is_dir() or not (git_dir / "HEAD").is_file():
+            return None
+        return cls(dot_git.parent, git_dir, common_dir)
+
+    @functools.cached_property
+    def packed_refs(self):
+        """{ref name: commit} from packed-refs; annotated tags map to the tag object."""
+        refs = {}
+        try:
+            lines = (self.common_dir / "packed-refs").read_text().splitlines()
+        except FileNotFoundError:
+            return refs
+        for line in lines:
+            if not line or line.startswith("#") or line.startswith("^"):
+                continue
+            sha, _, name = line.partition(" ")
+            refs[name] = sha
+        return refs
+
+    def read_ref_file(self, name):
+        """The raw content of a loose ref (per-worktree first, then shared), or None."""
+        for directory in (self.git_dir, self.common_dir):
+            try:
+                return (directory / name).read_text().strip()
+            except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+                continue
+        return None
+
+    def resolve(self, name):
+        """The object id a ref (e.g. HEAD, refs/heads/main) points at, following symrefs; None if unborn."""
+        if name not in self._resolved:
+            self._resolved[name] = self._resolve_uncached(name)
+        return self._resolved[name]
+
+    def _resolve_uncached(self, name):
+        for _ in range(10):
+            content = self.read_ref_file(name)
+            if content is None:
+                return self.packed_refs.get(name)
+            if not content.startswith(SYMREF_PREFIX):
+                return content
+            name = content[len(SYMREF_PREFIX):]
+        raise RuntimeError(f"Symbolic ref loop at {name} in {self.git_dir}")
+
+    @functools.cached_property
+    def head_target(self):
+        """The ref HEAD points at (e.g. refs/heads/main), or None when HEAD is detached."""
+        content = (self.git_dir / "HEAD").read_text().strip()
+        if content.startswith(SYMREF_PREFIX):
+            return content[len(SYMREF_PREFIX):]
+        return None
+
+    @property
+    def current_branch(self):
+        """The checked-out branch name, or "HEAD" when detached (like `git rev-parse --abbrev-ref HEAD`)."""
+        target = self.head_target
+        if target and target.startswith("refs/heads/"):
+            return target[len("refs/heads/"):]
+        return target or "HEAD"
+
+    @property
+    def head_commit(self):
+        return self.resolve("HEAD")
+
+    def refs(self, prefix):
+        """{ref name: object id} for every loose and packed ref under prefix (e.g. "refs/tags/")."""
+        refs = {name: sha for name, sha in self.packed_refs.items() if name.startswith(prefix)}
+        loose_root = self.common_dir / prefix
+        if loose_root.is_dir():
+            for path in loose_root.rglob("*"):
+                if path.is_file():
+                    name = path.relative_to(self.common_dir).as_posix()
+                    sha = self.resolve(name)
+                    if sha:
+                        refs[name] = sha
+        return refs
+
+    def tags(self):
+        """{tag name: object id}; annotated tags map to the tag object, as in `git show-ref --tags`."""
+        return {name[len("refs/tags/"):]: sha for name, sha in self.refs("refs/tags/").items()}
+
+
+class GitCli:
+    """The same interface as GitMeta, answered by the git CLI for layouts GitMeta does not read."""
+
+    def __init__(self, cwd):
+        self.cwd = Path(cwd)
+
+    def git(self, *args):
+        return subprocess.run(
+            ["git", *args],
+            cwd=self.cwd,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+
+    @functools.cached_property
+    def toplevel(self):
+        return Path(self.git("rev-parse", "--show-toplevel"))
+
+    @functools.cached_property
+    def current_branch(self):
+        return self.git("rev-parse", "--abbrev-ref", "HEAD")
+
+    @functools.cached_property
+    def head_commit(self):
+        return self.git("rev-parse", "--verify", "--quiet", "HEAD") or None
+
+    def resolve(self, name):
+        result = subprocess.run(
+            ["git", "rev-parse", "--verify", "--quiet", name],
+            cwd=self.cwd,
+            capture_output=True,
+            text=True,
+        )
+        return result.stdout.strip() or None
+
+    def refs(self, prefix):
+        output = self.git("for-each-ref", "--format=%(refname) %(objectname)", prefix)
+        return dict(line.split(" ", 1) for line in output.splitlines() if line)
+
+    def tags(self):
+        return {name[len("refs/tags/"):]: sha for name, sha in self.refs("refs/tags/").items()}
+
+
+@functools.lru_cache(maxsize=None)
+def _meta_at(dot_git):
+    return GitMeta.from_dot_git(dot_git)
+
+
+@functools.lru_cache(maxsize=None)
+def _cli_at(cwd):
+    return GitCli(cwd)
+
+
+def repository(path=None):
+    """The (memoized) git metadata of the working tree containing path (default: the current directory)."""
+    start = Path(path or os.getcwd()).resolve()
+    if os.environ.get("GIT_DIR") or os.environ.get("GIT_WORK_TREE"):
+        return _cli_at(start)
+    dot_git = find_dot_git(start)
+    meta = _meta_at(dot_git) if dot_git else None
+    return meta or _cli_at(start)
+
+
+def current_branch(path=None):
+    return repository(path).current_branch
+
+
+def head_commit(path=None):
+    return repository(path).head_commit
+
+
+def toplevel(path=None):
+    return repository(path).toplevel
+
+
+def tag_refs(path=None):
+    return repository(path).tags()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "branch"
+    start = time.perf_counter()
+    if command == "branch":
+        print(current_branch())
+    elif command == "head":
+        print(head_commit())
+    elif command == "toplevel":
+        print(toplevel())
+    elif command == "tags":
+        for name, sha in sorted(tag_refs().items()):
+            print(f"{sha} {name}")
+    else:
+        print(__doc__)
+        return 1
+    print(f"⏱ {(time.perf_counter() - start) * 1000:.1f}ms ({type(repository()).__name__})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
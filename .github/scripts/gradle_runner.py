@@ -0,0 +1,446 @@
+"""
+Shared Gradle invocation for the release scripts.
+
+GradleRunner builds `./gradlew` command lines with the options a release run
+has chosen (shared Gradle user home, offline mode, init scripts) so every demo
+app build in a run is invoked the same way. Its defaults come from the
+environment, which lets orchestrating scripts configure the builds of the
+child processes they launch:
+
+  GRADLE_USER_HOME              Gradle user home (honored by gradlew itself as well)
+  VIADUCT_GRADLE_OFFLINE        "true" to run builds with --offline
+  VIADUCT_GRADLE_BUILD_CACHE    "true" to run builds with --build-cache
+  VIADUCT_GRADLE_INIT_SCRIPTS   init scripts to apply, separated by os.pathsep
+  VIADUCT_GRADLE_DAEMON         "true" to run builds on a Gradle daemon instead of --no-daemon
+  VIADUCT_GRADLE_DAEMON_MAX_HEAP  heap cap (-Xmx) of daemons started for a run (default: 4g)
+  VIADUCT_GRADLE_CONFIGURATION_CACHE  "false" to leave the configuration cache to each build's own settings
+
+Daemons are owned by a GradleDaemonPool: the orchestrating script starts one
+daemon per distinct Gradle distribution / JDK combination at the beginning of
+a run, every build of the run (including those of child processes) reuses it,
+and the pool stops them with `./gradlew --stop` at the end.
+
+Builds run with --configuration-cache, so a repeated invocation skips project
+configuration. Gradle keys a cache entry on the requested tasks, the
+command-line options and the init script paths and contents, so everything
+the runner adds is derived from stable inputs: the daemon's JVM arguments
+from the build alone, and init scripts written to content-addressed paths
+(stable_init_script()) rather than per-run directories. Tasks that declare
+themselves incompatible (prefetching, copybara) run with
+--no-configuration-cache. A build that fails on configuration cache problems
+is retried without the cache, and its task selection is remembered in the
+project's .gradle directory so later runs go straight to the uncached build.
+Every build reports whether its configuration was reused, and
+configuration_cache_summary() compares the hits and misses of the run.
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from process_watchdog import run_watched
+from run_locks import run_workspace
+
+OFFLINE_ENV = "VIADUCT_GRADLE_OFFLINE"
+BUILD_CACHE_ENV = "VIADUCT_GRADLE_BUILD_CACHE"
+INIT_SCRIPTS_ENV = "VIADUCT_GRADLE_INIT_SCRIPTS"
+DAEMON_ENV = "VIADUCT_GRADLE_DAEMON"
+DAEMON_MAX_HEAP_ENV = "VIADUCT_GRADLE_DAEMON_MAX_HEAP"
+CONFIGURATION_CACHE_ENV = "VIADUCT_GRADLE_CONFIGURATION_CACHE"
+
+# Matches the heap the root build already asks for in gradle.properties
+DEFAULT_DAEMON_MAX_HEAP = "4g"
+# Safety net for daemons a crashed run never stopped (milliseconds)
+DAEMON_IDLE_TIMEOUT_MS = 10 * 60 * 1000
+
+PREFETCH_TASK = "viaductPrefetchDependencies"
+
+# Tasks that call notCompatibleWithConfigurationCache(); asking for the cache only adds warnings
+CONFIGURATION_CACHE_INCOMPATIBLE_TASKS = {PREFETCH_TASK, ":tools:runCopybara", ":tools:downloadCopybara"}
+
+# Task selections that failed with the configuration cache, per project (next to Gradle's own cache)
+INCOMPATIBLE_TASKS_FILE = Path(".gradle") / "viaduct-configuration-cache-incompatible.json"
+
+CONFIGURATION_CACHE_PROBLEM_PATTERN = re.compile(
+    r"Configuration cache problems found|configuration cache state could not be cached"
+    r"|problems were found storing the configuration cache",
+    re.IGNORECASE,
+)
+
+# (outcome, pattern) checked in order against a build's output; discarded entries also print "Calculating task graph"
+CONFIGURATION_CACHE_OUTCOMES = [
+    ("hit", re.compile(r"^(?:Reusing configuration cache|Configuration cache entry reused)", re.MULTILINE)),
+    ("discarded", re.compile(r"^Configuration cache entry discarded", re.MULTILINE)),
+    ("miss", re.compile(r"^(?:Calculating task graph as|Configuration cache entry stored)", re.MULTILINE)),
+]
+
+# Outcome and duration of every build of a run, shared with child processes through the run workspace
+CONFIGURATION_CACHE_LOG = "configuration-cache.tsv"
+
+# Resolves every resolvable configuration (including buildscript classpaths) so a
+# later --offline build finds all of its dependencies in the Gradle user home.
+PREFETCH_INIT_SCRIPT = """\
+allprojects { project ->
+    project.tasks.register("%(task)s") { task ->
+        task.notCompatibleWithConfigurationCache("Resolves every configuration of the project")
+        task.doLast {
+            def configurations = project.buildscript.configurations + project.configurations
+            configurations.findAll { it.canBeResolved }.each { configuration ->
+                configuration.resolvedConfiguration.lenientConfiguration.files
+            }
+        }
+    }
+}
+""" % {"task": PREFETCH_TASK}
+
+# Replaces every repository with a single one, e.g. a local file:// Maven
+# repository standing in for Maven Central and the Gradle Plugin Portal.
+REPOSITORY_INIT_SCRIPT = """\
+def viaductRepositoryUrl = "%(url)s"
+settingsEvaluated { settings ->
+    settings.pluginManagement.repositories { clear(); maven { url = viaductRepositoryUrl } }
+    settings.dependencyResolutionManagement.repositories { clear(); maven { url = viaductRepositoryUrl } }
+}
+allprojects { project ->
+    project.buildscript.repositories { clear(); maven { url = viaductRepositoryUrl } }
+    project.repositories { clear(); maven { url = viaductRepositoryUrl } }
+}
+"""
+
+
+def shared_gradle_user_home(repo_root):
+    """The Gradle user home demo app builds share: GRADLE_USER_HOME, or one under build/."""
+    return GradleRunner.from_environment().gradle_user_home or Path(repo_root) / "build" / "demoapps-gradle-home"
+
+
+def write_init_script(directory, name, content):
+    """Write an init script into directory and return its path."""
+    path = Path(directory) / name
+    path.write_text(content)
+    return path
+
+
+def stable_init_script(name, content, directory=None):
+    """
+    Write an init script to a path derived from its content and return the path.
+
+    Init script paths are part of the configuration cache key: the same script
+    written to a per-run directory would make every run a cache miss.
+    """
+    directory = Path(directory or Path(tempfile.gettempdir()) / "viaduct-init-scripts")
+    digest = hashlib.sha256(content.encode()).hexdigest()[:12]
+    path = directory / f"{Path(name).stem}-{digest}{Path(name).suffix}"
+    if not path.exists():
+        directory.mkdir(parents=True, exist_ok=True)
+        # Written aside and renamed, so a concurrent build never reads half a script
+        partial = path.with_name(f"{path.name}.{os.getpid()}")
+        partial.write_text(content)
+        partial.replace(path)
+    return path
+
+
+def requested_tasks(args):
+    return [arg for arg in args if not arg.startswith("-")]
+
+
+def task_selection(args):
+    return " ".join(sorted(requested_tasks(args)))
+
+
+def incompatible_task_selections(project_dir):
+    """Task selections of a project that failed with the configuration cache before."""
+    try:
+        return set(json.loads((Path(project_dir) / INCOMPATIBLE_TASKS_FILE).read_text()))
+    except (FileNotFoundError, ValueError):
+        return set()
+
+
+def remember_incompatible(project_dir, args):
+    path = Path(project_dir) / INCOMPATIBLE_TASKS_FILE
+    selections = incompatible_task_selections(project_dir) | {task_selection(args)}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(sorted(selections), indent=2) + "\n")
+
+
+def configuration_cache_outcome(output):
+    """"hit", "miss" or "discarded" as reported in a build's output ("unknown" when it says nothing, e.g. --quiet)."""
+    for outcome, pattern in CONFIGURATION_CACHE_OUTCOMES:
+        if pattern.search(output or ""):
+            return outcome
+    return "unknown"
+
+
+def record_configuration_cache(outcome, seconds, project_dir, args):
+    with open(run_workspace() / CONFIGURATION_CACHE_LOG, "a") as log:
+        log.write(f"{outcome}\t{seconds:.3f}\t{Path(project_dir).resolve().name}\t{' '.join(args)}\n")
+
+
+def configuration_cache_summary():
+    """Builds of this run per configuration cache outcome, with their average duration; None if there were none."""
+    durations = {}
+    try:
+        lines = (run_workspace() / CONFIGURATION_CACHE_LOG).read_text().splitlines()
+    except FileNotFoundError:
+        return None
+    for line in lines:
+        outcome, seconds = line.split("\t")[:2]
+        durations.setdefault(outcome, []).append(float(seconds))
+    if not durations:
+        return None
+    order = ["hit", "miss", "discarded", "fallback", "off", "unknown"]
+    return ", ".join(
+        f"{len(times)} {outcome} (avg {sum(times) / len(times):.1f}s)"
+        for outcome, times in sorted(durations.items(), key=lambda item: order.index(item[0]))
+    )
+
+
+def read_gradle_property(path, name):
+    """The value of a property in a .properties file, or None."""
+    try:
+        text = Path(path).read_text()
+    except FileNotFoundError:
+        return None
+    match = re.search(rf"^{re.escape(name)}=(.*)$", text, re.MULTILINE)
+    return match.group(1).strip() if match else None
+
+
+def wrapper_distribution(project_dir):
+    """The Gradle distribution URL a build's wrapper runs, or None."""
+    url = read_gradle_property(Path(project_dir) / "gradle" / "wrapper" / "gradle-wrapper.properties", "distributionUrl")
+    return url.replace("\\:", ":") if url else None
+
+
+def capped_jvmargs(project_dir, max_heap):
+    """A build's own org.gradle.jvmargs, with its heap limited to max_heap."""
+    jvmargs = read_gradle_property(Path(project_dir) / "gradle.properties", "org.gradle.jvmargs") or ""
+    args = [arg for arg in jvmargs.split() if not arg.startswith("-Xmx")]
+    return " ".join(args + [f"-Xmx{max_heap}"])
+
+
+class GradleRunner:
+    """Runs ./gradlew with the Gradle options shared by every build in a release run."""
+
+    def __init__(
+        self,
+        gradle_user_home=None,
+        offline=False,
+        init_scripts=(),
+        build_cache=False,
+        daemon=False,
+        daemon_max_heap=DEFAULT_DAEMON_MAX_HEAP,
+        configuration_cache=True,
+    ):
+        self.gradle_user_home = Path(gradle_user_home) if gradle_user_home else None
+        self.offline = offline
+        self.init_scripts = [Path(p) for p in init_scripts]
+        self.build_cache = build_cache
+        self.daemon = daemon
+        self.daemon_max_heap = daemon_max_heap
+        self.configuration_cache = configuration_cache
+
+    @classmethod
+    def from_environment(cls, env=None):
+        env = os.environ if env is None else env
+        return cls(
+            gradle_user_home=env.get("GRADLE_USER_HOME") or None,
+            offline=env.get(OFFLINE_ENV, "").lower() == "true",
+            init_scripts=[p for p in env.get(INIT_SCRIPTS_ENV, "").split(os.pathsep) if p],
+            build_cache=env.get(BUILD_CACHE_ENV, "").lower() == "true",
+            daemon=env.get(DAEMON_ENV, "").lower() == "true",
+            daemon_max_heap=env.get(DAEMON_MAX_HEAP_ENV) or DEFAULT_DAEMON_MAX_HEAP,
+            configuration_cache=env.get(CONFIGURATION_CACHE_ENV, "").lower() != "false",
+        )
+
+    def environment(self):
+        """Environment variables that make child processes use the same options."""
+        env = {}
+        if self.gradle_user_home:
+            env["GRADLE_USER_HOME"] = str(self.gradle_user_home)
+        if self.offline:
+            env[OFFLINE_ENV] = "true"
+        if self.build_cache:
+            env[BUILD_CACHE_ENV] = "true"
+        if self.init_scripts:
+            env[INIT_SCRIPTS_ENV] = os.pathsep.join(str(p) for p in self.init_scripts)
+        if self.daemon:
+            env[DAEMON_ENV] = "true"
+            env[DAEMON_MAX_HEAP_ENV] = self.daemon_max_heap
+        if not self.configuration_cache:
+            env[CONFIGURATION_CACHE_ENV] = "false"
+        return env
+
+    def uses_configuration_cache(self, args, project_dir="."):
+        """Whether a build of these tasks runs with the configuration cache (None: the build's own setting)."""
+        if not self.configuration_cache:
+            return None
+        if CONFIGURATION_CACHE_INCOMPATIBLE_TASKS & set(requested_tasks(args)):
+            return False
+        return task_selection(args) not in incompatible_task_selections(project_dir)
+
+    def command(self, args, project_dir=".", configuration_cache=None):
+        """The command line; configuration_cache overrides uses_configuration_cache() when not None."""
+        if configuration_cache is None:
+            configuration_cache = self.uses_configuration_cache(args, project_dir)
+        cmd = ["./gradlew"] + list(args)
+        if self.daemon:
+            # The JVM arguments are part of daemon compatibility, so they are derived
+            # from the build alone and every build of the same project reuses one daemon
+            cmd += [
+                "--daemon",
+                f"-Dorg.gradle.jvmargs={capped_jvmargs(project_dir, self.daemon_max_heap)}",
+                f"-Dorg.gradle.daemon.idletimeout={DAEMON_IDLE_TIMEOUT_MS}",
+            ]
+        else:
+            cmd.append("--no-daemon")
+        if configuration_cache is not None:
+            cmd.append("--configuration-cache" if configuration_cache else "--no-configuration-cache")
+        if self.offline:
+            cmd.append("--offline")
+        if self.build_cache:
+            cmd.append("--build-cache")
+        if self.gradle_user_home:
+            cmd += ["--gradle-user-home", str(self.gradle_user_home)]
+        for init_script in self.init_scripts:
+            cmd += ["--init-script", str(init_script)]
+        return cmd
+
+    def stop_command(self):
+        cmd = ["./gradlew", "--stop"]
+        if self.gradle_user_home:
+            cmd += ["--gradle-user-home", str(self.gradle_user_home)]
+        return cmd
+
+    def run(self, args, cwd, capture_output=True, echo=False):
+        """
+        Run a Gradle build in cwd under the stall watchdog and return the CompletedProcess.
+
+        A build that fails on configuration cache problems is run again without
+        the cache, and its task selection is not tried with the cache again.
+        With echo, the captured output is also passed through as it arrives.
+        """
+        start = time.monotonic()
+        configuration_cache = self.uses_configuration_cache(args, cwd)
+        result = run_watched(
+            self.command(args, project_dir=cwd, configuration_cache=configuration_cache),
+            cwd=cwd,
+            capture_output=capture_output,
+            text=True,
+            echo=echo,
+        )
+        output = (result.stdout or "") + (result.stderr or "") if capture_output else ""
+        outcome = configuration_cache_outcome(output) if configuration_cache else "off"
+        if configuration_cache and result.returncode != 0 and CONFIGURATION_CACHE_PROBLEM_PATTERN.search(output):
+            print(f"⚠️  {' '.join(requested_tasks(args))} in {Path(cwd).resolve().name} is not compatible "
+                  f"with the configuration cache, running it without")
+            remember_incompatible(cwd, args)
+            result = run_watched(
+                self.command(args, project_dir=cwd, configuration_cache=False),
+                cwd=cwd,
+                capture_output=capture_output,
+                text=True,
+                echo=echo,
+            )
+            outcome = "fallback"
+        elapsed = time.monotonic() - start
+        record_configuration_cache(outcome, elapsed, cwd, args)
+        mode = "daemon" if self.daemon else "no daemon"
+        print(f"⏱ gradle {' '.join(args)} in {Path(cwd).resolve().name} took {elapsed:.1f}s "
+              f"({mode}, configuration cache {outcome})")
+        return result
+
+
+class GradleDaemonPool:
+    """One Gradle daemon per distinct Gradle distribution / JDK combination, alive for one run."""
+
+    def __init__(self, runner):
+        self.runner = runner
+        # (distribution URL, JAVA_HOME) -> the build the daemon was started from
+        self.daemons = {}
+
+    @staticmethod
+    def daemon_key(project_dir):
+        return wrapper_distribution(project_dir), os.environ.get("JAVA_HOME")
+
+    def start(self, project_dirs):
+        """Start (and warm up) a daemon for every combination the given builds need."""
+        for project_dir in project_dirs:
+            key = self.daemon_key(project_dir)
+            if key in self.daemons:
+                continue
+            distribution, java_home = key
+            print(f"Starting Gradle daemon for {distribution or 'unknown Gradle'} on {java_home or 'default JDK'}...")
+            result = self.runner.run(["help", "--quiet"], cwd=project_dir)
+            if result.returncode != 0:
+                # Not fatal: the first real build starts the daemon instead
+                print(f"⚠️  Daemon warm-up failed in {project_dir}: {result.stderr.strip()}")
+            self.daemons[key] = Path(project_dir)
+        return self
+
+    def stop(self):
+        """Stop every daemon this pool started."""
+        for project_dir in self.daemons.values():
+            result = subprocess.run(self.runner.stop_command(), cwd=project_dir, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"⚠️  Failed to stop the Gradle daemon for {project_dir}: {result.stderr.strip()}")
+        self.daemons.clear()
+
+
+def start_daemon_pool(project_dirs, max_heap=None):
+    """
+    Switch every GradleRunner build of this run, including those of child
+    processes, to daemon mode and start the daemons the given builds need.
+    The caller stops the returned pool at the end of the run.
+    """
+    runner = GradleRunner.from_environment()
+    runner.daemon = True
+    if max_heap:
+        runner.daemon_max_heap = max_heap
+    os.environ.update(runner.environment())
+    return GradleDaemonPool(runner).start(project_dirs)
+
+
+def prefetch_dependencies(project_dirs, gradle_user_home, repository=None):
+    """
+    Resolve the dependencies of every given Gradle build into one shared user home.
+
+    Each build is resolved once; artifacts they have in common are downloaded
+    only the first time. Returns (runner, failed_dirs), where runner runs
+    --offline builds against the populated user home.
+    """
+    gradle_user_home = Path(gradle_user_home)
+    gradle_user_home.mkdir(parents=True, exist_ok=True)
+
+    failed_dirs = []
+    with tempfile.TemporaryDirectory(prefix="viaduct-prefetch-") as scripts_dir:
+        init_scripts = [write_init_script(scripts_dir, "prefetch.gradle", PREFETCH_INIT_SCRIPT)]
+        if repository:
+            init_scripts.append(
+                write_init_script(scripts_dir, "repository.gradle", REPOSITORY_INIT_SCRIPT % {"url": repository})
+            )
+
+        prefetcher = GradleRunner(gradle_user_home, offline=False, init_scripts=init_scripts)
+        for project_dir in project_dirs:
+            print(f"Prefetching dependencies for {Path(project_dir).name}...")
+            result = prefetcher.run([PREFETCH_TASK, "--console=plain", "--quiet"], cwd=project_dir)
+            if result.returncode != 0:
+                print(f"❌ Dependency prefetch failed for {project_dir}")
+                print(f"stdout: {result.stdout}")
+                print(f"stderr: {result.stderr}")
+                failed_dirs.append(project_dir)
+
+    runner = GradleRunner.from_environment()
+    runner.gradle_user_home = gradle_user_home
+    runner.offline = True
+    if repository:
+        # Keeps this run's offline builds pointed at the repository the cache was filled
+        # from; passed with --init-script rather than written to the user home's init.d,
+        # which would redirect every later build that shares the user home
+        runner.init_scripts.append(
+            write_init_script(run_workspace(), "viaduct-repository.gradle", REPOSITORY_INIT_SCRIPT % {"url": repository})
+        )
+    return runner, failed_dirs
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Finds known failure signatures in a (possibly very large) build log.
+
+The log is memory-mapped and scanned once with a single precompiled pattern.
+Every alternative of the pattern starts at a line start with a literal, so
+the regex engine only looks past the newlines it jumps between and a 100 MB
+log takes a fraction of a second. Each hit is then classified (out of memory,
+dependency resolution, version mismatch, compilation, test failure, build
+failure), and the first hit of the most fundamental category is reported as
+the likely root cause, with its line number and byte offset.
+
+Usage:
+  python3 log_signatures.py <build.log>
+Example:
+  python3 log_signatures.py demoapps/starwars/build/viaduct-build.log
+"""
+
+import mmap
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+# Where verify_build() saves the output of a failed demo app build, relative to the demo app
+BUILD_LOG = "build/viaduct-build.log"
+
+# Matches begin with the newline before the line they are on, which keeps the engine
+# on a fast literal search for b"\n"; the lookahead lists the first character of every
+# alternative so most lines are rejected with one comparison. Keep the two in sync.
+SIGNATURE_PATTERN = re.compile(
+    rb"\n(?=[e/*\dECjG])(?:"
+    rb"e: [^\n]*"  # Kotlin compiler error
+    rb"|/[^\n:]*\.java:\d+: error: [^\n]*"  # javac error
+    rb"|\* What went wrong:\n[^\n]*(?:\n(?!\* )[^\n]*){0,8}"  # Gradle's failure summary, up to the next section
+    rb"|\d+ tests completed, \d+ failed[^\n]*"
+    rb"|Exception in thread \"[^\"\n]*\" java\.lang\.OutOfMemoryError[^\n]*"
+    rb"|Caused by: java\.lang\.OutOfMemoryError[^\n]*"
+    rb"|java\.lang\.OutOfMemoryError[^\n]*"
+    rb"|Expiring Daemon because JVM heap space is exhausted[^\n]*"
+    rb"|Gradle build daemon disappeared unexpectedly[^\n]*"
+    rb")"
+)
+
+# (category, pattern) checked in order against a hit's text; the first match classifies it
+CATEGORIES = [
+    ("out of memory", re.compile(r"OutOfMemoryError|heap space|GC overhead limit|daemon disappeared")),
+    ("dependency resolution", re.compile(r"Could not (?:resolve|find|download|GET)|Plugin \[id: .*\] was not found")),
+    (
+        "version mismatch",
+        re.compile(r"incompatible version|Incompatible|Unsupported class file major version|compiled with|requires Gradle"),
+    ),
+    ("compilation", re.compile(r"^e: |\.java:\d+: error: |Compilation (?:error|failed)|compile\w*'")),
+    ("test failure", re.compile(r"tests completed|failing tests|test\w*'")),
+]
+FALLBACK_CATEGORY = "build failure"
+
+# Categories in order of how likely they are to be the underlying cause of the others
+ROOT_CAUSE_ORDER = [category for category, _ in CATEGORIES] + [FALLBACK_CATEGORY]
+
+# How far back from a test summary line failing test names are looked for
+TEST_FAILURE_WINDOW = 256 * 1024
+FAILED_TEST_PATTERN = re.compile(rb"^([^\n]+ > [^\n]+) FAILED$", re.MULTILINE)
+
+MAX_PER_CATEGORY = 5
+
+# The end of a failed build's log printed with its summary; the rest is only in the saved log
+TAIL_LINES = 20
+TAIL_BYTES = 16 * 1024
+TAIL_LINE_LENGTH = 300
+
+# Enough of the log's start to hold any signature that begins on its first line
+FIRST_LINE_WINDOW = 64 * 1024
+
+# Newlines are counted in slices of this size, so a large mmap is never copied whole
+COUNT_CHUNK = 4 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class Finding:
+    category: str
+    line: int
+    offset: int
+    text: str
+
+
+def classify(text):
+    for category, pattern in CATEGORIES:
+        if pattern.search(text):
+            return category
+    return FALLBACK_CATEGORY
+
+
+def count_newlines(data, start, end):
+    return sum(data[i:min(i + COUNT_CHUNK, end)].count(b"\n") for i in range(start, end, COUNT_CHUNK))
+
+
+class LineCounter:
+    """Line numbers of increasing byte offsets, counting each newline of the data once."""
+
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+        self.line = 1
+
+    def line_at(self, offset):
+        if offset < self.offset:
+            return self.line - count_newlines(self.data, offset, self.offset)
+        self.line += count_newlines(self.data, self.offset, offset)
+        self.offset = offset
+        return self.line
+
+
+def failed_tests(data, summary_offset, counter):
+    """Findings for the "<class> > <test> FAILED" lines shortly before a test summary."""
+    start = max(0, summary_offset - TEST_FAILURE_WINDOW)
+    findings = []
+    for match in FAILED_TEST_PATTERN.finditer(data, start, summary_offset):
+        text = match.group(1).decode(errors="replace")
+        findings.append(Finding("test failure", counter.line_at(match.start()), match.start(), text))
+    return findings
+
+
+def scan(data):
+    """All findings in a bytes-like log (bytes or mmap), in log order."""
+    counter = LineCounter(data)
+    findings = []
+
+    def add(offset, text):
+        text = text.removeprefix("* What went wrong:\n").rstrip()
+        findings.append(Finding(classify(text), counter.line_at(offset), offset, text))
+
+    # The pattern anchors on the newline before a line, which the first line does not have
+    match = SIGNATURE_PATTERN.match(b"\n" + data[:FIRST_LINE_WINDOW])
+    if match:
+        add(0, match.group()[1:].decode(errors="replace"))
+
+    for match in SIGNATURE_PATTERN.finditer(data):
+        offset = match.start() + 1
+        text = match.group()[1:].decode(errors="replace")
+        if classify(text) == "test failure" and "tests completed" in text:
+            findings.extend(failed_tests(data, offset, counter))
+        add(offset, text)
+    return sorted(findings, key=lambda f: f.offset)
+
+
+def scan_log(path):
+    """All findings in the log file at path."""
+    with open(path, "rb") as f:
+        if Path(path).stat().st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return scan(data)
+
+
+def root_cause(findings):
+    """The first finding of the most fundamental category, or None."""
+    for category in ROOT_CAUSE_ORDER:
+        for finding in findings:
+            if finding.category == category:
+                return finding
+    return None
+
+
+def format_summary(findings, max_per_category=MAX_PER_CATEGORY):
+    if not findings:
+        return "No known failure signature found"
+    lines = []
+    cause = root_cause(findings)
+    lines.append(f"Likely root cause ({cause.category}) at line {cause.line} (byte {cause.offset}):")
+    lines.extend(f"   {text}" for text in cause.text.splitlines())
+    for category in ROOT_CAUSE_ORDER:
+        matching = [f for f in findings if f.category == category]
+        if not matching:
+            continue
+        lines.append(f"{category} ({len(matching)}):")
+        for finding in matching[:max_per_category]:
+            first_line = finding.text.splitlines()[0] if finding.text else ""
+            lines.append(f"   line {finding.line} (byte {finding.offset}): {first_line[:200]}")
+        if len(matching) > max_per_category:
+            lines.append(f"   ... and {len(matching) - max_per_category} more")
+    return "\n".join(lines)
+
+
+def log_tail(path, max_lines=TAIL_LINES):
+    """The last lines of a log, read from at most its last TAIL_BYTES and each cut to TAIL_LINE_LENGTH."""
+    with open(path, "rb") as f:
+        f.seek(max(0, f.seek(0, 2) - TAIL_BYTES))
+        lines = f.read().decode(errors="replace").splitlines()[-max_lines:]
+    return [line if len(line) <= TAIL_LINE_LENGTH else line[:TAIL_LINE_LENGTH] + " ..." for line in lines]
+
+
+def report_failed_build(result, log_path):
+    """
+    Save a failed build's output to log_path and print the end of it, then the
+    failure signatures found in it (so the summary is at the bottom of the CI
+    log). The whole output is only in the saved log.
+    """
+    log_path = Path(log_path)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    output = (result.stdout or "") + (result.stderr or "")
+    log_path.write_text(output)
+    print(f"Last {TAIL_LINES} lines of the build output:")
+    for line in log_tail(log_path):
+        print(f"   {line}")
+    print(f"🔍 Failure signatures (full log saved to {log_path}):")
+    print(format_summary(scan_log(log_path)))
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print(__doc__)
+        return 1
+    path = Path(argv[0])
+    if not path.is_file():
+        print(f"❌ No log at {path}")
+        return 1
+    start = time.monotonic()
+    findings = scan_log(path)
+    elapsed = time.monotonic() - start
+    print(format_summary(findings))
+    print(f"⏱ Scanned {path.stat().st_size / 1024 / 1024:.1f} MB in {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Checks every precondition of the release steps at once, before any of them
+starts a Gradle build.
+
+A missing secret, a non-executable gradlew or a wrong branch used to surface
+only after minutes of Gradle work, one problem per run. The preflight runs
+all checks of the selected steps concurrently (env vars, files, git state
+and, with --probe, whether the hosts the steps talk to accept connections)
+and reports every problem together, typically well within a second.
+
+Usage:
+  python3 preflight.py [--steps validate,publish,sync,changelog] [--probe]
+Example:
+  python3 preflight.py --steps publish --probe
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from demoapp_registry import load_registry
+from git_meta import current_branch
+from gradle_runner import wrapper_distribution
+from version_index import build_index, extract_version_from_branch
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+
+STEPS = ("validate", "publish", "sync", "changelog")
+GRADLE_STEPS = ("validate", "publish", "sync")
+
+# Read by publish_release.publish()
+PUBLISH_SECRETS = (
+    "VIADUCT_GRADLE_PUBLISH_KEY",
+    "VIADUCT_GRADLE_PUBLISH_SECRET",
+    "VIADUCT_SONATYPE_USERNAME",
+    "VIADUCT_SONATYPE_PASSWORD",
+)
+GITHUB_TOKEN = "VIADUCT_GRAPHQL_GITHUB_ACCESS_TOKEN"
+
+MAVEN_CENTRAL_URL = "https://central.sonatype.com"
+
+# Seconds a reachability probe waits for a connection
+PROBE_TIMEOUT = 2
+
+
+@dataclass(frozen=True)
+class Check:
+    """One precondition: run(repo_root, env) returns the problems found (empty when it holds)."""
+
+    name: str
+    steps: tuple
+    run: Callable
+
+
+def check_release_branch(repo_root, env):
+    branch = current_branch(repo_root)
+    if not extract_version_from_branch(branch):
+        return [f"not on a release branch (current: {branch}, expected release/v[major].[minor].[patch])"]
+    return []
+
+
+def check_version_declarations(repo_root, env):
+    version = extract_version_from_branch(current_branch(repo_root))
+    if not version:
+        # Reported by check_release_branch
+        return []
+    index = build_index(repo_root)
+    problems = []
+    if index.version_file() is None:
+        problems.append("no VERSION file")
+    for loc in index.mismatches(version):
+        problems.append(f"{index.relative(loc)}:{loc.line}: {loc.kind} declares {loc.value or '<empty>'}, not {version}")
+    return problems
+
+
+def check_git_state(repo_root, env):
+    result = subprocess.run(
+        ["git", "rev-parse", "--absolute-git-dir"],
+        cwd=repo_root,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return [f"not a git repository: {result.stderr.strip()}"]
+    git_dir = result.stdout.strip()
+    problems = []
+    for marker, operation in (("MERGE_HEAD", "merge"), ("rebase-merge", "rebase"), ("rebase-apply", "rebase")):
+        if (Path(git_dir) / marker).exists():
+            problems.append(f"a {operation} is in progress")
+    if current_branch(repo_root) == "HEAD":
+        problems.append("HEAD is detached")
+    return problems
+
+
+def check_git_history(repo_root, env):
+    result = subprocess.run(
+        ["git", "rev-parse", "--is-shallow-repository"],
+        cwd=repo_root,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        # Reported by check_git_state
+        return []
+    if result.stdout.strip() == "true":
+        return ["shallow clone: the changelog needs the full history and tags (fetch with --unshallow)"]
+    return []
+
+
+def check_publish_secrets(repo_root, env):
+    return [f"{name} is not set" for name in PUBLISH_SECRETS if not env.get(name)]
+
+
+def check_github_token(repo_root, env):
+    from demoapps_to_external_push import DemoAppPublisher
+
+    # Local runs push over SSH
+    if DemoAppPublisher.detect_ci_environment() and not env.get(GITHUB_TOKEN):
+        return [f"{GITHUB_TOKEN} is not set (required in CI)"]
+    return []
+
+
+def check_executable(path):
+    if not path.is_file():
+        return [f"{path} is missing"]
+    if not os.access(path, os.X_OK):
+        return [f"{path} is not executable (chmod +x)"]
+    return []
+
+
+def check_gradle_wrappers(project_dirs):
+    problems = []
+    for project_dir in project_dirs:
+        problems += check_executable(project_dir / "gradlew")
+        wrapper_jar = project_dir / "gradle" / "wrapper" / "gradle-wrapper.jar"
+        if not wrapper_jar.is_file():
+            problems.append(f"{wrapper_jar} is missing")
+    return problems
+
+
+def check_root_wrapper(repo_root, env):
+    return check_gradle_wrappers([Path(repo_root)])
+
+
+def check_demoapp_wrappers(repo_root, env):
+    problems = []
+    project_dirs = []
+    for name, _ in load_registry(repo_root).pairs():
+        demoapp_dir = Path(repo_root) / "demoapps" / name
+        if not (demoapp_dir / "gradle.properties").is_file():
+            problems.append(f"{demoapp_dir} has no gradle.properties")
+        else:
+            project_dirs.append(demoapp_dir)
+    return problems + check_gradle_wrappers(project_dirs)
+
+
+def check_java(repo_root, env):
+    java_home = env.get("JAVA_HOME")
+    if java_home:
+        return [f"{problem} (from JAVA_HOME)" for problem in check_executable(Path(java_home) / "bin" / "java")]
+    if not shutil.which("java", path=env.get("PATH")):
+        return ["no java on PATH and JAVA_HOME is not set"]
+    return []
+
+
+def check_copybara_workflows(repo_root, env):
+    return load_registry(repo_root).errors()
+
+
+def probe(url):
+    """Problems connecting to the host of url (file:// URLs must exist)."""
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme == "file":
+        path = Path(urllib.parse.unquote(parsed.path))
+        return [] if path.exists() else [f"{url}: {path} does not exist"]
+    port = parsed.port or {"https": 443, "http": 80, "ssh": 22}.get(parsed.scheme, 443)
+    try:
+        with socket.create_connection((parsed.hostname, port), timeout=PROBE_TIMEOUT):
+            return []
+    except OSError as e:
+        return [f"cannot connect to {parsed.hostname}:{port}: {e}"]
+
+
+def probe_checks(repo_root, env):
+    """One check per host the selected steps talk to."""
+    from demoapps_to_external_push import DemoAppPublisher
+    from publish_release import PLUGIN_METADATA_URL, PLUGIN_METADATA_URL_ENV
+
+    github = "https://github.com" if DemoAppPublisher.detect_ci_environment() else "ssh://github.com:22"
+    distribution = wrapper_distribution(repo_root)
+    targets = [
+        ("Gradle Plugin Portal", ("publish",), env.get(PLUGIN_METADATA_URL_ENV) or PLUGIN_METADATA_URL),
+        ("Maven Central", ("publish",), MAVEN_CENTRAL_URL),
+        ("GitHub", ("sync",), github),
+    ]
+    if distribution:
+        targets.append(("Gradle distribution", GRADLE_STEPS, distribution))
+    return [
+        Check(f"reach {name}", steps, lambda repo_root, env, url=url: probe(url))
+        for name, steps, url in targets
+    ]
+
+
+CHECKS = [
+    Check("release branch", STEPS, check_release_branch),
+    Check("version declarations", GRADLE_STEPS, check_version_declarations),
+    Check("git state", STEPS, check_git_state),
+    # Only the changelog walks history; CI checkouts are shallow by default
+    Check("git history", ("changelog",), check_git_history),
+    Check("publish secrets", ("publish",), check_publish_secrets),
+    Check("GitHub token", ("sync",), check_github_token),
+    Check("Gradle wrapper", ("publish",), check_root_wrapper),
+    Check("demo apps", ("validate", "sync"), check_demoapp_wrappers),
+    Check("Java", GRADLE_STEPS, check_java),
+    Check("copybara workflows", ("sync",), check_copybara_workflows),
+]
+
+
+def run_check(check, repo_root, env):
+    start = time.monotonic()
+    try:
+        problems = list(check.run(repo_root, env))
+    except Exception as e:
+        problems = [f"check failed: {e!r}"]
+    return problems, time.monotonic() - start
+
+
+def preflight(steps=STEPS, probe_hosts=False, repo_root=None, env=None):
+    """Run every check of the given steps concurrently, print a report and return the number of problems."""
+    repo_root = Path(repo_root or REPO_ROOT)
+    env = os.environ if env is None else env
+    checks = CHECKS + (probe_checks(repo_root, env) if probe_hosts else [])
+    checks = [check for check in checks if set(check.steps) & set(steps)]
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(checks) or 1) as executor:
+        futures = [executor.submit(run_check, check, repo_root, env) for check in checks]
+        results = [future.result() for future in futures]
+    elapsed = time.monotonic() - start
+
+    problem_count = 0
+    for check, (problems, took) in zip(checks, results):
+        if not problems:
+            print(f"✅ {check.name} ({took:.2f}s)")
+            continue
+        problem_count += len(problems)
+        print(f"❌ {check.name} ({took:.2f}s)")
+        for problem in problems:
+            print(f"   {problem}")
+
+    if problem_count:
+        print(f"❌ Preflight found {problem_count} problem(s) in {elapsed:.2f}s")
+    else:
+        print(f"✅ Preflight passed {len(checks)} checks in {elapsed:.2f}s")
+    return problem_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check every precondition of the release steps at once.")
+    parser.add_argument(
+        "--steps",
+        default=",".join(STEPS),
+        help=f"Comma-separated steps to check for (default: {','.join(STEPS)})",
+    )
+    parser.add_argument("--probe", action="store_true", help="Also check that the hosts the steps use accept connections")
+    args = parser.parse_args(argv)
+
+    steps = [step.strip() for step in args.steps.split(",") if step.strip()]
+    unknown = [step for step in steps if step not in STEPS]
+    if unknown:
+        parser.error(f"unknown steps: {', '.join(unknown)}")
+    return 1 if preflight(steps, probe_hosts=args.probe) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
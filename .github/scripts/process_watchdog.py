@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Runs child processes under a stall watchdog.
+
+A child counts as making progress while it writes output or while its process
+tree accumulates CPU time (read from /proc). When it does neither for the
+idle window, the watchdog prints the process tree and the last lines of
+output, then terminates the child's whole process group (SIGTERM, then
+SIGKILL after a grace period). A Gradle or copybara run that waits on a lock,
+a credential prompt or a dead socket then fails within minutes instead of
+running into the CI timeout.
+
+  VIADUCT_WATCHDOG_IDLE_TIMEOUT  seconds without progress before a child is killed
+                                 (default: 600; 0 disables the watchdog)
+
+Without /proc (macOS), only output counts as progress. Work done in a Gradle
+daemon is outside the child's process tree, so with --daemon only the
+build's output is watched.
+
+Usage:
+  python3 process_watchdog.py [--idle-timeout <seconds>] -- <command> [args...]
+Example:
+  python3 process_watchdog.py --idle-timeout 60 -- ./gradlew build
+"""
+
+import argparse
+import codecs
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+IDLE_TIMEOUT_ENV = "VIADUCT_WATCHDOG_IDLE_TIMEOUT"
+DEFAULT_IDLE_TIMEOUT = 600
+
+# Seconds between SIGTERM and SIGKILL
+KILL_GRACE_PERIOD = 10
+
+# Lines of output shown when a stall is reported
+TAIL_LINES = 20
+
+PROC = Path("/proc")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def read_proc_stat(pid):
+    """(parent pid, state, CPU seconds) of a process from /proc/<pid>/stat, or None."""
+    try:
+        stat = (PROC / str(pid) / "stat").read_text()
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+    # The command name is parenthesized and may contain spaces
+    fields = stat[stat.rindex(")") + 2:].split()
+    return int(fields[1]), fields[0], (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def process_tree(pid):
+    """{pid: (parent pid, state, CPU seconds)} of pid and all of its descendants."""
+    if not PROC.is_dir():
+        return {}
+    stats = {}
+    for entry in PROC.iterdir():
+        if entry.name.isdigit():
+            stat = read_proc_stat(entry.name)
+            if stat:
+                stats[int(entry.name)] = stat
+    tree = {}
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        if current in stats and current not in tree:
+            tree[current] = stats[current]
+            pending.extend(child for child, stat in stats.items() if stat[0] == current)
+    return tree
+
+
+def command_line(pid):
+    try:
+        return (PROC / str(pid) / "cmdline").read_bytes().replace(b"\0", b" ").decode(errors="replace").strip()
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return "?"
+
+
+def format_process_tree(pid):
+    """An indented listing of pid's process tree with each process's state and CPU time."""
+    tree = process_tree(pid)
+    if not tree:
+        return f"   {pid} (process tree not available)"
+    lines = []
+
+    def add(current, depth):
+        _, state, cpu = tree[current]
+        lines.append(f"   {'  ' * depth}{current} [{state}] {cpu:.1f}s cpu  {command_line(current)[:200]}")
+        for child in sorted(p for p, stat in tree.items() if stat[0] == current):
+            add(child, depth + 1)
+
+    add(pid, 0)
+    return "\n".join(lines)
+
+
+class StreamPump(threading.Thread):
+    """Reads one of the child's pipes, echoing or capturing it and noting when output arrives."""
+
+    def __init__(self, pipe, echo_to, capture, on_output):
+        super().__init__(daemon=True)
+        self.pipe = pipe
+        self.echo_to = echo_to
+        self.chunks = [] if capture else None
+        self.tail = deque(maxlen=TAIL_LINES)
+        self.on_output = on_output
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def run(self):
+        fd = self.pipe.fileno()
+        partial = ""
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            self.on_output()
+            if self.chunks is not None:
+                self.chunks.append(chunk)
+            text = self.decoder.decode(chunk)
+            if self.echo_to is not None:
+                self.echo_to.write(text)
+                self.echo_to.flush()
+            *lines, partial = (partial + text).split("\n")
+            self.tail.extend(lines)
+        if partial:
+            self.tail.append(partial)
+        self.pipe.close()
+
+    def output(self):
+        return None if self.chunks is None else b"".join(self.chunks)
+
+
+class Watchdog:
+    """Runs commands like subprocess.run, killing those that stall for idle_timeout seconds."""
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, kill_grace_period=KILL_GRACE_PERIOD):
+        self.idle_timeout = idle_timeout
+        self.kill_grace_period = kill_grace_period
+
+    @classmethod
+    def from_environment(cls, env=None):
+        env = os.environ if env is None else env
+        return cls(idle_timeout=float(env.get(IDLE_TIMEOUT_ENV) or DEFAULT_IDLE_TIMEOUT))
+
+    def run(self, args, cwd=None, env=None, capture_output=False, text=False, check=False, shell=False, echo=False):
+        """
+        Run args and return a CompletedProcess; its `stalled` attribute tells
+        whether the watchdog killed it. Output that is not captured (or, with
+        echo, all output) is passed through to this process's stdout and stderr.
+        """
+        echo = echo or not capture_output
+        # Output is only both captured and echoed through the pumps below
+        if not self.idle_timeout and not (capture_output and echo):
+            result = subprocess.run(args, cwd=cwd, env=env, capture_output=capture_output, text=text, shell=shell)
+            result.stalled = False
+            if check:
+                result.check_returncode()
+            return result
+
+        last_progress = [time.monotonic()]
+
+        def on_output():
+            last_progress[0] = time.monotonic()
+
+        process = subprocess.Popen(
+            args,
+            cwd=cwd,
+            env=env,
+            shell=shell,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            # Its own process group, so a stall kills everything it started
+            start_new_session=True,
+        )
+        pumps = [
+            StreamPump(process.stdout, sys.stdout if echo else None, capture_output, on_output),
+            StreamPump(process.stderr, sys.stderr if echo else None, capture_output, on_output),
+        ]
+        for pump in pumps:
+            pump.start()
+
+        stalled = False
+        # CPU seconds per process; compared per process since exited children drop out of the tree
+        cpu = {}
+        poll_interval = min(5.0, self.idle_timeout / 4) if self.idle_timeout else 5.0
+        try:
+            while process.poll() is None:
+                try:
+                    process.wait(timeout=poll_interval)
+                    break
+                except subprocess.TimeoutExpired:
+                    if not self.idle_timeout:
+                        continue
+                tree_cpu = {pid: stat[2] for pid, stat in process_tree(process.pid).items()}
+                if any(seconds > cpu.get(pid, 0.0) for pid, seconds in tree_cpu.items()):
+                    on_output()
+                cpu = tree_cpu
+                if time.monotonic() - last_progress[0] >= self.idle_timeout:
+                    stalled = True
+                    self.report_stall(args, process.pid, pumps)
+                    self.kill(process)
+                    break
+        except BaseException:
+            # Ctrl-C never reaches the child's own session, so take its group down before giving up
+            self.kill(process)
+            raise
+        finally:
+            for pump in pumps:
+                pump.join(timeout=self.kill_grace_period)
+
+        stdout, stderr = (pump.output() for pump in pumps)
+        if text and capture_output:
+            stdout, stderr = stdout.decode(errors="replace"), stderr.decode(errors="replace")
+        result = subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+        result.stalled = stalled
+        if check:
+            result.check_returncode()
+        return result
+
+    def report_stall(self, args, pid, pumps):
+        command = args if isinstance(args, str) else " ".join(str(a) for a in args)
+        print(
+            f"⚠️  Watchdog: no output and no CPU progress for {self.idle_timeout:.0f}s, killing: {command}",
+            file=sys.stderr,
+        )
+        print(f"Process tree:\n{format_process_tree(pid)}", file=sys.stderr)
+        tail = [line for pump in pumps for line in pump.tail][-TAIL_LINES:]
+        if tail:
+            print("Last output:", file=sys.stderr)
+            for line in tail:
+                print(f"   {line}", file=sys.stderr)
+        sys.stderr.flush()
+
+    def kill(self, process):
+        """Terminate the process group, then kill it if it is still alive after the grace period."""
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(process.pid, sig)
+            except ProcessLookupError:
+                return
+            try:
+                process.wait(timeout=self.kill_grace_period)
+                return
+            except subprocess.TimeoutExpired:
+                continue
+
+
+def run_watched(args, **kwargs):
+    """subprocess.run under a Watchdog configured from the environment."""
+    return Watchdog.from_environment().run(args, **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a command, killing it if it stalls.")
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        help=f"Seconds without progress before the command is killed (default: {DEFAULT_IDLE_TIMEOUT})",
+    )
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.print_usage()
+        return 1
+
+    watchdog = Watchdog.from_environment()
+    if args.idle_timeout is not None:
+        watchdog.idle_timeout = args.idle_timeout
+    result = watchdog.run(command)
+    if result.stalled:
+        print(f"❌ {command[0]} stalled and was killed", file=sys.stderr)
+        return 1
+    return result.returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,37 @@
 Publishes all demo apps to their external repositories
 
 Usage:
-  python3 publish_all_demoapps.py
+  python3 publish_all_demoapps.py [--changed-since <git-ref>] [--jobs <n>] [--batch]
+                                  [--prefetch [--repository <url>]] [--build-cache-server] [--daemon]
+                                  [--task-timings <dir>]
+
+With --prefetch, the union of all selected demo apps' dependencies is resolved
+once into a shared Gradle user home (GRADLE_USER_HOME, or
+build/demoapps-gradle-home), and every demo app build then runs --offline
+against it.
+
+With --build-cache-server, a local Gradle HTTP build cache (see
+build_cache_server.py) runs for the length of the publish and every demo app
+build pushes to and pulls from it.
+
+With --daemon, one Gradle daemon per distinct Gradle distribution / JDK
+combination is started up front, every demo app build of the run reuses it,
+and all of them are stopped at the end (see gradle_runner.py).
+
+With --task-timings, every demo app build records how long each of its tasks
+took and writes a per-app report into the given directory (see task_timings.py).
+
+With --batch, every demo app is prepared in this process and all
+airbnb-viaduct-to-<app> workflows are then handed to one CopybaraRunner, which
+resolves the copybara jar once and launches it directly on a JVM instead of
+going through a Gradle startup per app. Exit codes are reported per app.
+
+With --jobs, up to n demo apps are published concurrently. Each publisher
+exports from its own worktree and passes credentials only to its own child
+processes, so concurrent publishes do not share any mutable state.
+
+With --changed-since, only demo apps affected by the paths changed since the
+given ref are published (see demoapp_impact.py).
 
 This script should only be run on release branches (release/v[major].[minor].[patch]).
 The version is automatically extracted from the branch name (e.g., release/v0.7.0 -> 0.7.0).
@@ -14,78 +44,255 @@ Authentication:
   - Local: Uses SSH (requires SSH keys configured for GitHub)
 """
 
+import argparse
+import os
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import re
 
+from build_cache_server import start_shared_build_cache
+from copybara_runner import CopybaraRunner, describe_exit
+from demoapp_impact import affected_demoapps, changed_paths_since
+from demoapp_registry import load_registry, report
+from demoapps_to_external_push import DemoAppPublisher
+from git_meta import current_branch
+from gradle_runner import (
+    configuration_cache_summary,
+    prefetch_dependencies,
+    shared_gradle_user_home,
+    start_daemon_pool,
+)
+from run_locks import run_workspace
+from task_timings import TIMINGS_DIR_ENV
+from version_index import build_index, extract_version_from_branch, report_mismatches
 
-def publish_demoapp(python_script, demoapp_name, github_repo):
-    """Run the Python demoapp publisher and return success/failure."""
-    try:
-        subprocess.run(
-            ["python3", str(python_script), demoapp_name, github_repo], check=True
-        )
-        return True
-    except subprocess.CalledProcessError:
-        return False
+def publish_demoapp(python_script, demoapp_name, github_repo, capture_output=False):
+    """
+    Run the Python demoapp publisher and return (success, output).
+
+    With capture_output, the publisher's stdout and stderr are returned instead of
+    streamed, so concurrent publishes can be reported one app at a time.
+    """
+    result = subprocess.run(
+        ["python3", str(python_script), demoapp_name, github_repo],
+        capture_output=capture_output,
+        text=True,
+    )
+    output = (result.stdout or "") + (result.stderr or "")
+    return result.returncode == 0, output
+
+
+def publish_each(demoapp_publisher, demo_apps, jobs=1):
+    """Run the publisher script for each demo app, up to `jobs` at a time. Returns the failed apps."""
+    failed_apps = []
+    if jobs > 1:
+        print(f">>> Publishing {len(demo_apps)} demo apps with {jobs} concurrent jobs...")
+        print()
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                (app_name, executor.submit(publish_demoapp, demoapp_publisher, app_name, github_repo, True))
+                for app_name, github_repo in demo_apps
+            ]
+            for app_name, future in futures:
+                success, output = future.result()
+                print(f">>> {app_name} demo app output:")
+                print(output, end="")
+                if success:
+                    print(f"✅ {app_name} published successfully")
+                else:
+                    print(f"❌ {app_name} publish failed")
+                    failed_apps.append(app_name)
+                print()
+    else:
+        for app_name, github_repo in demo_apps:
+            print(f">>> Publishing {app_name} demo app...")
+            success, _ = publish_demoapp(demoapp_publisher, app_name, github_repo)
+            if success:
+                print(f"✅ {app_name} published successfully")
+            else:
+                print(f"❌ {app_name} publish failed")
+                failed_apps.append(app_name)
+            print()
+    return failed_apps
+
+
+def publish_batch(repo_root, demo_apps, max_workers=1):
+    """
+    Prepare every demo app in-process, then run all their copybara workflows
+    through one CopybaraRunner. Returns the list of apps that failed.
+    """
+    failed_apps = []
+    publishers = []
+    for app_name, github_repo in demo_apps:
+        print(f">>> Preparing {app_name} demo app...")
+        publisher = DemoAppPublisher(app_name, github_repo)
+        if publisher.prepare() == 0:
+            publishers.append(publisher)
+        else:
+            print(f"❌ {app_name} preparation failed")
+            failed_apps.append(app_name)
+        print()
+
+    if not publishers:
+        return failed_apps
+
+    runner = CopybaraRunner(repo_root)
+    print(f">>> Running {len(publishers)} copybara workflow(s) with {runner.jar.name}...")
+    exit_codes = runner.migrate_all(
+        [(p.demoapp_name, p.copybara_args(), p.git_credential_env()) for p in publishers],
+        max_workers=max_workers,
+        # The same per-destination locks a single publisher takes, so batch and single runs do not race
+        locks={p.demoapp_name: p.copybara_lock for p in publishers},
+    )
+    print()
+
+    for publisher in publishers:
+        returncode = exit_codes[publisher.demoapp_name]
+        print(f"   {publisher.workflow_name}: exit {returncode} ({describe_exit(returncode)})")
+        if publisher.report_copybara_result(returncode) != 0:
+            failed_apps.append(publisher.demoapp_name)
+        publisher.cleanup()
+    print()
+    return failed_apps
 
 
 def verify_release_branch():
-    """Verify we're on a release branch."""
+    """Verify we're on a release branch and return the version."""
     try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        branch_name = result.stdout.strip()
+        branch_name = current_branch(Path(__file__).parent)
 
         if not re.match(r"^release/v\d+\.\d+\.\d+$", branch_name):
             print(f"❌ This script must be run on a release branch")
             print(f"   Current branch: {branch_name}")
             print(f"   Expected format: release/v[major].[minor].[patch]")
-            return False
+            return None
 
         print(f"✅ Running on release branch: {branch_name}")
-        return True
+        return extract_version_from_branch(branch_name)
     except subprocess.CalledProcessError as e:
         print(f"❌ Failed to determine current branch: {e}")
-        return False
+        return None
+
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish all demo apps to their external repositories.")
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Only publish demo apps affected by changes since this git ref",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of demo apps to publish concurrently (default: 1)",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Run all copybara workflows through one runner with a shared, pre-resolved copybara jar",
+    )
+    parser.add_argument(
+        "--prefetch",
+        action="store_true",
+        help="Resolve all demo app dependencies into a shared Gradle user home, then build --offline",
+    )
+    parser.add_argument(
+        "--repository",
+        metavar="URL",
+        help="Resolve all dependencies from this repository while prefetching (e.g. file:///tmp/m2)",
+    )
+    parser.add_argument(
+        "--build-cache-server",
+        action="store_true",
+        help="Serve a local HTTP build cache for this run and point every demo app build at it",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run demo app builds on Gradle daemons started for this run instead of --no-daemon",
+    )
+    parser.add_argument(
+        "--task-timings",
+        metavar="DIR",
+        help="Record per-task timings of every demo app build into DIR (see task_timings.py)",
+    )
+    args = parser.parse_args(argv)
 
-def main():
     script_dir = Path(__file__).parent.resolve()
     demoapp_publisher = script_dir / "demoapps_to_external_push.py"
 
     # Verify we're on a release branch
-    if not verify_release_branch():
+    release_version = verify_release_branch()
+    if not release_version:
+        return 1
+
+    # Verify every version declaration before any build starts
+    if not report_mismatches(build_index(script_dir.parent.parent), release_version):
         return 1
 
     print()
     print("=== PUBLISHING ALL DEMO APPS ===")
     print()
 
-    # Define demo apps to publish (name, github_repo)
-    demo_apps = [
-        ("starwars", "viaduct-graphql/starwars"),
-        ("cli-starter", "viaduct-graphql/cli-starter"),
-        ("ktor-starter", "viaduct-graphql/ktor-starter"),
-    ]
+    # The demo apps and their workflows come from the copybara config (see demoapp_registry.py)
+    repo_root = script_dir.parent.parent
+    registry = load_registry(repo_root)
+    if not report(registry):
+        return 1
+    demo_apps = registry.pairs()
 
-    # Track failures
-    failed_apps = []
+    if args.changed_since:
+        changed_paths = changed_paths_since(args.changed_since, cwd=repo_root)
+        affected = affected_demoapps([name for name, _ in demo_apps], changed_paths)
+        for app_name, _ in demo_apps:
+            if app_name not in affected:
+                print(f"⏭️  Skipping {app_name}: not affected by changes since {args.changed_since}")
+        demo_apps = [(name, repo) for name, repo in demo_apps if name in affected]
+        print()
 
-    # Publish each demo app
-    for app_name, github_repo in demo_apps:
-        print(f">>> Publishing {app_name} demo app...")
-        if publish_demoapp(demoapp_publisher, app_name, github_repo):
-            print(f"✅ {app_name} published successfully")
+    # Created and exported (VIADUCT_RUN_WORKSPACE) before any publisher is spawned, so the
+    # publishers record their builds into this run's workspace, where the summary reads them
+    run_workspace()
+    if args.task_timings:
+        # Picked up by the publishers' builds, in-process and in child processes
+        os.environ[TIMINGS_DIR_ENV] = str(Path(args.task_timings).resolve())
+    cache_server = start_shared_build_cache(repo_root) if args.build_cache_server else None
+    daemon_pool = None
+    try:
+        if args.prefetch and demo_apps:
+            gradle_user_home = shared_gradle_user_home(repo_root)
+            print(f">>> Prefetching demo app dependencies into {gradle_user_home}...")
+            runner, failed_dirs = prefetch_dependencies(
+                [repo_root / "demoapps" / name for name, _ in demo_apps], gradle_user_home, args.repository
+            )
+            if failed_dirs:
+                return 1
+            # Publishers (in-process and child processes) pick the options up from the environment
+            os.environ.update(runner.environment())
+            print()
+
+        if args.daemon and demo_apps:
+            # One daemon per Gradle/JDK combination, shared by the builds of every publisher
+            daemon_pool = start_daemon_pool([repo_root / "demoapps" / name for name, _ in demo_apps])
+            print()
+
+        # Publish each demo app
+        if args.batch:
+            failed_apps = publish_batch(repo_root, demo_apps, max_workers=args.jobs)
         else:
-            print(f"❌ {app_name} publish failed")
-            failed_apps.append(app_name)
-        print()
+            failed_apps = publish_each(demoapp_publisher, demo_apps, jobs=args.jobs)
+    finally:
+        if daemon_pool:
+            daemon_pool.stop()
+        if cache_server:
+            print(f"Build cache: {cache_server.summary()}")
+            cache_server.stop()
+        configuration_cache = configuration_cache_summary()
+        if configuration_cache:
+            print(f"Configuration cache: {configuration_cache}")
 
     # Summary
     print("=== DEMO APP PUBLISH SUMMARY ===")
@@ -6,34 +6,71 @@ Expects environment variables:
   - VIADUCT_GRADLE_PUBLISH_SECRET
   - VIADUCT_SONATYPE_USERNAME
   - VIADUCT_SONATYPE_PASSWORD
+  - VIADUCT_PLUGIN_METADATA_URL (optional, overrides the Gradle Plugin Portal metadata URL)
+  - VIADUCT_PUBLISH_MANIFEST (optional, where the manifest of the last publish is kept)
+
+Usage:
+  python3 publish_release.py [--daemon] [--force]
+
+With --daemon, the Gradle builds run on one daemon started for this run
+(capped heap, stopped at the end) instead of paying a cold JVM start each.
+
+Snapshots are assembled first and their jars hashed (see artifact_manifest.py);
+when the version and every jar match the last successful publish, the Maven
+Central upload is skipped. Otherwise publishToMavenCentral reuses the
+assembled jars (their tasks are up to date) and uploads every module: the
+upload is not narrowed to the changed ones. --force publishes anyway.
 """
 
+import argparse
 import os
+import shlex
 import sys
 import subprocess
 import json
+import time
 import urllib.request
 from pathlib import Path
 
-
-def run_command(cmd, capture_output=False, check=True):
-  """Run a shell command and return the result."""
-  print(f"Running: {cmd}")
-  result = subprocess.run(
-    cmd,
-    shell=True,
-    capture_output=capture_output,
-    text=True,
-    check=check
-  )
-  if capture_output:
-    return result.stdout.strip()
-  return result
+from artifact_manifest import (
+  DEFAULT_PUBLISH_MANIFEST,
+  PUBLISH_MANIFEST_ENV,
+  build_manifest,
+  changed_modules,
+  diff_manifests,
+  load_manifest,
+  unchanged_since,
+  write_manifest,
+)
+from gradle_runner import GradleRunner, start_daemon_pool
+from run_locks import project_lock
+
+
+def run_gradle(*args, quiet=False):
+  """
+  Run a root build through GradleRunner (stall watchdog, configuration cache
+  fallback and timing) and return its stdout; its output is passed through
+  unless quiet. Raises CalledProcessError if the build fails.
+  """
+  runner = GradleRunner.from_environment()
+  print(f"Running: {shlex.join(runner.command(args, project_dir=Path.cwd()))}")
+  result = runner.run(list(args), cwd=Path.cwd(), echo=not quiet)
+  if result.returncode != 0:
+    if quiet:
+      print(result.stdout + result.stderr, end="")
+    raise subprocess.CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+  return result.stdout
+
+
+PLUGIN_METADATA_URL = "https://plugins.gradle.org/m2/com/airbnb/viaduct/module-gradle-plugin/maven-metadata.xml"
+
+# Overrides the metadata URL, e.g. to point at a local stand-in (see benchmark_release.py)
+PLUGIN_METADATA_URL_ENV = "VIADUCT_PLUGIN_METADATA_URL"
 
 
 def check_version_published(version):
   """Check if a version is already published on Gradle Plugin Portal."""
-  maven_metadata_url = "https://plugins.gradle.org/m2/com/airbnb/viaduct/module-gradle-plugin/maven-metadata.xml"
+  maven_metadata_url = os.environ.get(PLUGIN_METADATA_URL_ENV) or PLUGIN_METADATA_URL
 
   try:
     with urllib.request.urlopen(maven_metadata_url) as response:
@@ -44,13 +81,46 @@ def check_version_published(version):
     return False
 
 
-def main():
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Publish Viaduct Gradle plugins and Maven artifacts.")
+  parser.add_argument(
+    "--daemon",
+    action="store_true",
+    help="Run the Gradle builds on one daemon started for this run instead of --no-daemon"
+  )
+  parser.add_argument(
+    "--force",
+    action="store_true",
+    help="Publish snapshots even when the artifacts match the last successful publish"
+  )
+  args = parser.parse_args(argv)
+
   # Change to viaduct/oss directory
   script_dir = Path(__file__).parent.resolve()
   oss_dir = script_dir.parent.parent
   os.chdir(oss_dir)
   print(f"Working directory: {os.getcwd()}")
 
+  # Another run building the root project would race on its build/ outputs and the manifest
+  with project_lock(oss_dir):
+    daemon_pool = start_daemon_pool([oss_dir]) if args.daemon else None
+    try:
+      return publish(force=args.force)
+    finally:
+      if daemon_pool:
+        daemon_pool.stop()
+
+
+def hash_artifacts(version):
+  """The artifact manifest of the current directory's build outputs, timed."""
+  start = time.monotonic()
+  manifest = build_manifest(Path("."), version=version)
+  print(f"⏱ Hashed {len(manifest['artifacts'])} artifacts in {time.monotonic() - start:.1f}s")
+  return manifest
+
+
+def publish(force=False):
+  """Publish the plugins and artifacts from the current directory."""
   print("\n=== VERSION CHECK ===")
 
   # Read VERSION file
@@ -82,22 +152,44 @@ def main():
     print(f"Publishing Gradle plugins as release version {version_file_content}...")
     print("\n=== GRADLE PLUGIN PORTAL PUBLISH ===")
     print("Publishing plugins to Gradle Plugin Portal (releases only)...")
-    run_command("./gradlew gradle-plugins:publishPlugins --no-daemon --stacktrace")
+    run_gradle("gradle-plugins:publishPlugins", "--stacktrace")
   else:
     print("Publishing Gradle plugins with unique snapshot version...")
     print("Skipping Gradle Plugin Portal (snapshots not supported)...")
 
+  manifest_path = Path(os.environ.get(PUBLISH_MANIFEST_ENV) or DEFAULT_PUBLISH_MANIFEST)
+  manifest = None
+  upload = True
+  if not should_release:
+    print("\n=== ARTIFACT CHECK ===")
+    print("Assembling snapshot artifacts to compare with the last publish...")
+    # The jars publishToMavenCentral uploads; it finds them up to date afterwards
+    run_gradle("assemble", "--stacktrace")
+    manifest = hash_artifacts(version_file_content)
+    previous = load_manifest(manifest_path)
+    if force:
+      print("--force given - publishing regardless of changes")
+    elif previous is None:
+      print(f"No manifest of a previous publish at {manifest_path}")
+    elif unchanged_since(previous, manifest):
+      print(f"⏭️  All {len(manifest['artifacts'])} artifacts match the last publish - skipping the snapshot upload")
+      upload = False
+    else:
+      changed = diff_manifests(previous, manifest)
+      print(f"{len(changed)} artifacts changed in: {', '.join(changed_modules(changed)) or '(version changed)'}")
+      print("Publishing every module (the upload is not narrowed to the changed ones)")
+
   # Publish to Maven Central (both releases and snapshots)
-  print("\n=== MAVEN CENTRAL PUBLISH ===")
-  print("Publishing to Maven Central (Sonatype)...")
-  run_command("./gradlew publishToMavenCentral --no-daemon --stacktrace")
-  print("Maven Central publish completed successfully!\n")
+  if upload:
+    print("\n=== MAVEN CENTRAL PUBLISH ===")
+    print("Publishing to Maven Central (Sonatype)...")
+    run_gradle("publishToMavenCentral", "--stacktrace")
+    print("Maven Central publish completed successfully!\n")
+    write_manifest(manifest or hash_artifacts(version_file_content), manifest_path)
 
   # Extract the published version
-  computed_version = run_command(
-    "./gradlew printVersion --no-daemon --quiet | grep 'computedVersion=' | cut -d'=' -f2",
-    capture_output=True
-  )
+  version_lines = [line for line in run_gradle("printVersion", "--quiet", quiet=True).splitlines() if "computedVersion=" in line]
+  computed_version = "\n".join(line.split("=")[1] for line in version_lines).strip()
 
   print("Computed version is :", computed_version)
 
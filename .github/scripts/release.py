@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+One entry point for the release scripts.
+
+Each subcommand runs the main() of an existing script in this process; the
+module is only imported when its subcommand runs, so `--help` and startup
+do not pay for the whole release toolchain. The scripts themselves remain
+runnable on their own.
+
+`pipeline` runs validation, publishing, the demo app sync and the changelog
+in one process. Branch, release version and the version index are derived
+once into a shared ReleaseContext and checked before the first step; git
+metadata is memoized process-wide (see git_meta.py), so the steps do not
+re-read it. Each step runs with its own copy of the environment and working
+directory, so what one step exports (e.g. publish's Gradle and Sonatype
+credentials) does not reach the steps after it. With --preflight, every
+precondition of the selected steps is checked first (see preflight.py) and
+the pipeline does not start if any fails. With --warmup, the Gradle builds of the steps are warmed up in the
+background while those checks run (see warmup.py), and the warm-ups are
+cancelled if a check fails.
+
+Usage:
+  python3 release.py <command> [args...]
+  python3 release.py pipeline [--steps validate,publish,sync,changelog] [--daemon] [--jobs <n>]
+                              [--changelog-file <path>] [--preflight] [--warmup]
+Example:
+  python3 release.py validate starwars --prefetch
+  python3 release.py pipeline --steps validate,sync --jobs 3
+  python3 release.py pipeline --preflight --warmup --daemon
+"""
+
+import contextlib
+import functools
+import importlib
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# command -> (module, description)
+COMMANDS = {
+    "validate": ("validate_demoapp", "Validate a demo app before publishing"),
+    "publish": ("publish_release", "Publish the Gradle plugins and Maven artifacts"),
+    "sync": ("publish_all_demoapps", "Publish all demo apps to their external repositories"),
+    "push": ("demoapps_to_external_push", "Publish one demo app to its external repository"),
+    "changelog": ("generate_changelog", "Generate the changelog between two refs"),
+    "versions": ("version_index", "Check every version declaration in the repository"),
+    "set-version": ("version_rewrite", "Rewrite every version declaration"),
+    "tags": ("tag_catalog", "Find release tags by semantic version"),
+    "impact": ("demoapp_impact", "List the demo apps affected by changes since a ref"),
+    "preflight": ("preflight", "Check every precondition of the release steps at once"),
+}
+
+PIPELINE_STEPS = ("validate", "publish", "sync", "changelog")
+
+
+def run_module(module_name, argv):
+    """Import a script lazily and run its main(argv); returns its exit code."""
+    module = importlib.import_module(module_name)
+    try:
+        return module.main(argv) or 0
+    except subprocess.CalledProcessError as e:
+        print(f"Error: Command failed with exit code {e.returncode}", file=sys.stderr)
+        return e.returncode
+
+
+class ReleaseContext:
+    """What every step of a pipeline run shares, each derived once."""
+
+    def __init__(self, repo_root=None):
+        self.repo_root = Path(repo_root) if repo_root else Path(__file__).parent.resolve().parent.parent
+
+    @functools.cached_property
+    def branch(self):
+        from git_meta import current_branch
+        return current_branch(self.repo_root)
+
+    @functools.cached_property
+    def release_version(self):
+        from version_index import extract_version_from_branch
+        return extract_version_from_branch(self.branch)
+
+    @functools.cached_property
+    def index(self):
+        from version_index import build_index
+        return build_index(self.repo_root)
+
+    @functools.cached_property
+    def demo_apps(self):
+        from demoapp_registry import demo_apps
+        return demo_apps(self.repo_root)
+
+
+def run_validate(context, options):
+    for name, _ in context.demo_apps:
+        returncode = run_module("validate_demoapp", [name] + (["--daemon"] if options.daemon else []))
+        if returncode:
+            return returncode
+        print()
+    return 0
+
+
+def run_publish(context, options):
+    return run_module("publish_release", ["--daemon"] if options.daemon else [])
+
+
+def run_sync(context, options):
+    argv = ["--jobs", str(options.jobs)]
+    if options.daemon:
+        argv.append("--daemon")
+    return run_module("publish_all_demoapps", argv)
+
+
+def run_changelog(context, options):
+    if not options.changelog_file:
+        return run_module("generate_changelog", ["--since-last-release"])
+    with open(options.changelog_file, "w") as f, contextlib.redirect_stdout(f):
+        returncode = run_module("generate_changelog", ["--since-last-release"])
+    print(f"Changelog written to {options.changelog_file}")
+    return returncode
+
+
+@contextlib.contextmanager
+def isolated_step():
+    """Restore os.environ and the working directory when the step in the `with` block is done."""
+    env = dict(os.environ)
+    cwd = os.getcwd()
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(env)
+
+
+STEP_RUNNERS = {
+    "validate": run_validate,
+    "publish": run_publish,
+    "sync": run_sync,
+    "changelog": run_changelog,
+}
+
+
+def pipeline(argv, context=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="release.py pipeline", description="Run the release steps in one process.")
+    parser.add_argument(
+        "--steps",
+        default=",".join(PIPELINE_STEPS),
+        help=f"Comma-separated steps to run, in order (default: {','.join(PIPELINE_STEPS)})",
+    )
+    parser.add_argument("--daemon", action="store_true", help="Run Gradle builds on daemons started for the run")
+    parser.add_argument("--jobs", type=int, default=1, help="Demo apps to publish concurrently (default: 1)")
+    parser.add_argument("--changelog-file", metavar="PATH", help="Write the changelog here instead of stdout")
+    parser.add_argument(
+        "--preflight", action="store_true", help="Check every precondition of the steps before running any of them"
+    )
+    parser.add_argument(
+        "--warmup", action="store_true", help="Warm up the steps' Gradle builds in the background during the checks"
+    )
+    options = parser.parse_args(argv)
+
+    steps = [step.strip() for step in options.steps.split(",") if step.strip()]
+    unknown = [step for step in steps if step not in STEP_RUNNERS]
+    if unknown:
+        parser.error(f"unknown steps: {', '.join(unknown)}")
+
+    context = context or ReleaseContext()
+    if not options.warmup:
+        return run_pipeline(steps, options, context)
+
+    from warmup import start_warmups
+    warmups = start_warmups(steps, context.repo_root, context.demo_apps, daemon=options.daemon)
+    try:
+        return run_pipeline(steps, options, context)
+    finally:
+        # Stops whatever is still warming up, e.g. when a check failed
+        warmups.cancel()
+        print(f"🔥 Warm-ups: {warmups.summary()}")
+
+
+def run_pipeline(steps, options, context):
+    """The checks, then each step in order; returns the first failing step's exit code."""
+    if options.preflight:
+        from preflight import preflight
+        print("=== PREFLIGHT ===")
+        if preflight(steps, repo_root=context.repo_root):
+            print("❌ Pipeline not started: fix the problems above first")
+            return 1
+        print()
+
+    if not context.release_version:
+        print(f"❌ Not on a release branch. Current branch: {context.branch}")
+        print("   Expected branch format: release/v[major].[minor].[patch]")
+        return 1
+    print(f"✅ Release {context.release_version} from {context.branch}")
+
+    from version_index import report_mismatches
+    if not report_mismatches(context.index, context.release_version):
+        return 1
+
+    from run_locks import run_workspace
+    # Exported before the steps' environments are copied, so every step and its children share it
+    run_workspace()
+
+    pipeline_start = time.monotonic()
+    for step in steps:
+        print()
+        print(f"=== {step.upper()} ===")
+        start = time.monotonic()
+        with isolated_step():
+            returncode = STEP_RUNNERS[step](context, options)
+        print(f"⏱ {step} took {time.monotonic() - start:.1f}s")
+        if returncode:
+            print(f"❌ Pipeline stopped: {step} failed (exit code {returncode})")
+            return returncode
+
+    print()
+    print(f"✅ Pipeline completed in {time.monotonic() - pipeline_start:.1f}s")
+    return 0
+
+
+def print_usage():
+    print("Usage: release.py <command> [args...]")
+    print()
+    print("Commands:")
+    for name, (_, description) in COMMANDS.items():
+        print(f"  {name:<12} {description}")
+    print(f"  {'pipeline':<12} Run {', '.join(PIPELINE_STEPS)} in one process")
+    print()
+    print("Run `release.py <command> --help` for the options of a command.")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage()
+        return 0 if argv else 1
+
+    command, rest = argv[0], argv[1:]
+    if command == "pipeline":
+        return pipeline(rest)
+    if command not in COMMANDS:
+        print(f"❌ Unknown command: {command}")
+        print_usage()
+        return 1
+    module_name, _ = COMMANDS[command]
+    # Scripts' argparse usage lines then read "release.py <command>"
+    sys.argv = [f"{Path(sys.argv[0]).name} {command}"] + rest
+    return run_module(module_name, rest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
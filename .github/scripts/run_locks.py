@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Locks around the resources concurrent release and validation runs share, and
+a scratch workspace per run.
+
+Runs on one machine used to be serialized as whole jobs. Instead, each script
+takes a flock(2) lock only around what it actually shares with other runs of
+the same checkout:
+
+  project-<dir>       builds of one Gradle project (its build/ and .gradle/ directories)
+  versions            rewriting version declarations (gradle.properties, VERSION, ...)
+  copybara-<repo>     syncing one destination repository
+  build-cache         the shared local build cache directory
+
+Locks live in build/locks of the checkout (VIADUCT_LOCKS_DIR overrides it,
+e.g. to lock across checkouts), are released when their holder exits, however
+it exits, and record who holds them so a waiting run can say what it waits for.
+
+Scratch files of a run (init scripts, export checkouts) go into the run's
+workspace, a fresh directory under the temporary directory. Child processes
+share their parent's workspace through VIADUCT_RUN_WORKSPACE, and the process
+that created it removes it when it exits.
+
+Usage:
+  python3 run_locks.py [--list]
+"""
+
+import atexit
+import errno
+import fcntl
+import functools
+import os
+import re
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+
+LOCKS_DIR_ENV = "VIADUCT_LOCKS_DIR"
+LOCK_TIMEOUT_ENV = "VIADUCT_LOCK_TIMEOUT"
+RUN_WORKSPACE_ENV = "VIADUCT_RUN_WORKSPACE"
+
+# Seconds to wait for a lock before giving up (default: one hour)
+DEFAULT_LOCK_TIMEOUT = 3600
+POLL_INTERVAL = 0.5
+
+
+class LockTimeout(RuntimeError):
+    """A lock was not acquired within its timeout."""
+
+
+def locks_dir(repo_root=None):
+    return Path(os.environ.get(LOCKS_DIR_ENV) or Path(repo_root or REPO_ROOT) / "build" / "locks")
+
+
+def lock_name(prefix, value):
+    """A file-name-safe lock name, e.g. lock_name("project", "demoapps/starwars") -> "project-demoapps_starwars"."""
+    return f"{prefix}-{re.sub(r'[^A-Za-z0-9._-]+', '_', str(value)).strip('_')}"
+
+
+def project_lock_name(project_dir):
+    path = Path(project_dir).resolve()
+    try:
+        relative = path.relative_to(REPO_ROOT)
+    except ValueError:
+        return lock_name("project", path)
+    return lock_name("project", relative.as_posix() if relative.parts else "root")
+
+
+class ResourceLock:
+    """An exclusive (or shared) flock on build/locks/<name>.lock."""
+
+    def __init__(self, name, shared=False, directory=None):
+        self.name = name
+        self.shared = shared
+        self.path = Path(directory or locks_dir()) / f"{name}.lock"
+        self.fd = None
+
+    def holder(self):
+        """Who holds (or last held) the lock, as recorded in the lock file."""
+        try:
+            return self.path.read_text().strip() or "unknown"
+        except FileNotFoundError:
+            return "unknown"
+
+    def try_acquire(self):
+        """Acquire the lock if it is free; returns whether it was acquired."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, (fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+        except OSError as e:
+            os.close(fd)
+            if e.errno in (errno.EAGAIN, errno.EACCES, errno.EWOULDBLOCK):
+                return False
+            raise
+        self.fd = fd
+        if not self.shared:
+            try:
+                os.ftruncate(fd, 0)
+                os.write(fd, f"pid {os.getpid()} on {socket.gethostname()}: {' '.join(sys.argv)}\n".encode())
+            except BaseException:
+                # Nobody will release a lock whose acquisition failed
+                self.release()
+                raise
+        return True
+
+    def acquire(self, timeout=None):
+        """Wait for the lock, for at most timeout seconds (default: $VIADUCT_LOCK_TIMEOUT or one hour)."""
+        if timeout is None:
+            timeout = float(os.environ.get(LOCK_TIMEOUT_ENV) or DEFAULT_LOCK_TIMEOUT)
+        if self.try_acquire():
+            return self
+        print(f"⏳ Waiting for lock {self.name} (held by {self.holder()})")
+        start = time.monotonic()
+        while not self.try_acquire():
+            if time.monotonic() - start >= timeout:
+                raise LockTimeout(
+                    f"Timed out after {timeout:.0f}s waiting for lock {self.name} (held by {self.holder()})"
+                )
+            time.sleep(POLL_INTERVAL)
+        print(f"⏱ Waited {time.monotonic() - start:.1f}s for lock {self.name}")
+        return self
+
+    def release(self):
+        if self.fd is not None:
+            # Closing the descriptor releases the flock
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+@contextmanager
+def resource_lock(name, shared=False, timeout=None, repo_root=None):
+    """Hold the named lock (of the checkout at repo_root, default: this one) for the body of a `with` block."""
+    lock = ResourceLock(name, shared=shared, directory=locks_dir(repo_root)).acquire(timeout)
+    try:
+        yield lock
+    finally:
+        lock.release()
+
+
+@contextmanager
+def project_lock(project_dir, timeout=None):
+    """Hold the lock of one Gradle project directory (e.g. a demo app) for builds in it."""
+    with resource_lock(project_lock_name(project_dir), timeout=timeout):
+        yield
+
+
+@functools.lru_cache(maxsize=None)
+def run_workspace():
+    """
+    This run's scratch directory: the parent run's (VIADUCT_RUN_WORKSPACE), or a
+    new one that is removed when this process exits.
+    """
+    inherited = os.environ.get(RUN_WORKSPACE_ENV)
+    if inherited and Path(inherited).is_dir():
+        return Path(inherited)
+    workspace = Path(tempfile.mkdtemp(prefix=f"viaduct-run-{time.strftime('%Y%m%d-%H%M%S')}-"))
+    os.environ[RUN_WORKSPACE_ENV] = str(workspace)
+    atexit.register(shutil.rmtree, workspace, ignore_errors=True)
+    return workspace
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv != ["--list"]:
+        print(__doc__)
+        return 1
+    directory = locks_dir()
+    lock_files = sorted(directory.glob("*.lock")) if directory.is_dir() else []
+    for path in lock_files:
+        # A shared probe does not overwrite the recorded holder
+        lock = ResourceLock(path.stem, shared=True, directory=directory)
+        if lock.try_acquire():
+            lock.release()
+            print(f"   {path.stem}: free")
+        else:
+            print(f"🔒 {path.stem}: held by {lock.holder()}")
+    if not lock_files:
+        print(f"No locks in {directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
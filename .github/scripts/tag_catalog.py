@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+A semver-sorted index of the repository's v* release tags.
+
+The tags are read once from packed-refs and loose refs (see git_meta.py),
+parsed as semantic versions and kept sorted, so "the release before X" is a
+binary search instead of a sorted `git tag -l` listing. Pre-releases
+(v1.2.0-rc.1) sort before their release, as semver specifies, and are only
+considered when asked for; SNAPSHOT tags are never treated as releases.
+
+Usage:
+  python3 tag_catalog.py [--before <version>] [--include-prereleases] [--list]
+Example:
+  python3 tag_catalog.py --before 0.15.0-SNAPSHOT
+"""
+
+import argparse
+import bisect
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+from git_meta import repository
+
+SEMVER_PATTERN = re.compile(
+    r"^v?(\d+)\.(\d+)\.(\d+)(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$", re.ASCII
+)
+
+
+@dataclass(frozen=True)
+class Version:
+    major: int
+    minor: int
+    patch: int
+    prerelease: tuple = ()
+
+    @property
+    def is_prerelease(self):
+        return bool(self.prerelease)
+
+    @property
+    def is_snapshot(self):
+        return "SNAPSHOT" in self.prerelease
+
+    def sort_key(self):
+        # A release sorts after all of its pre-releases; numeric identifiers sort
+        # before alphanumeric ones and compare numerically (semver section 11)
+        prerelease = tuple((0, int(p), "") if p.isdigit() else (1, 0, p) for p in self.prerelease)
+        return (self.major, self.minor, self.patch, not self.prerelease, prerelease)
+
+    def __str__(self):
+        version = f"{self.major}.{self.minor}.{self.patch}"
+        return f"{version}-{'.'.join(self.prerelease)}" if self.prerelease else version
+
+
+def parse_version(text):
+    """Parse "1.2.3", "v1.2.3-rc.1" or "0.15.0-SNAPSHOT"; None if it is not a semantic version."""
+    match = SEMVER_PATTERN.match(text.strip())
+    if not match:
+        return None
+    major, minor, patch, prerelease = match.groups()
+    return Version(int(major), int(minor), int(patch), tuple(prerelease.split(".")) if prerelease else ())
+
+
+class TagCatalog:
+    """v* tags sorted by semver precedence."""
+
+    def __init__(self, tags):
+        """tags is {tag name: object id}; names that are not v<semver> are ignored."""
+        entries = []
+        for name, object_id in tags.items():
+            version = parse_version(name) if name.startswith("v") else None
+            if version and not version.is_snapshot:
+                entries.append((version.sort_key(), name, version, object_id))
+        entries.sort()
+        self.entries = entries
+        self.releases = [entry for entry in entries if not entry[2].is_prerelease]
+        self.keys = [entry[0] for entry in entries]
+        self.release_keys = [entry[0] for entry in self.releases]
+
+    @classmethod
+    def from_repository(cls, path=None):
+        return cls(repository(path).tags())
+
+    def tags(self, include_prereleases=False):
+        """Tag names, oldest version first."""
+        return [entry[1] for entry in (self.entries if include_prereleases else self.releases)]
+
+    def previous_release(self, before=None, include_prereleases=False):
+        """
+        The tag of the highest release lower than `before` (a version string or
+        Version), or the highest release overall; None if there is none.
+        """
+        entries, keys = (self.entries, self.keys) if include_prereleases else (self.releases, self.release_keys)
+        if before is None:
+            index = len(entries)
+        else:
+            version = parse_version(before) if isinstance(before, str) else before
+            if version is None:
+                raise ValueError(f"Not a semantic version: {before}")
+            index = bisect.bisect_left(keys, version.sort_key())
+        return entries[index - 1][1] if index else None
+
+
+def read_repo_version(repo_root):
+    """The version in the repository's VERSION file, or None."""
+    try:
+        return (Path(repo_root) / "VERSION").read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find release tags by semantic version.")
+    parser.add_argument("--before", help="Find the latest release lower than this version")
+    parser.add_argument("--include-prereleases", action="store_true", help="Consider pre-release tags too")
+    parser.add_argument("--list", action="store_true", help="List all release tags in version order")
+    args = parser.parse_args(argv)
+
+    catalog = TagCatalog.from_repository(Path(__file__).parent)
+    if args.list:
+        for tag in catalog.tags(args.include_prereleases):
+            print(tag)
+        return 0
+
+    try:
+        tag = catalog.previous_release(args.before, args.include_prereleases)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    if not tag:
+        print("No previous release tag found", file=sys.stderr)
+        return 1
+    print(tag)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Per-task timing for demo app builds.
+
+An init script registers a build-event listener (a BuildService, so it works
+with the configuration cache and needs no build scan) that records the
+duration and outcome of every task into build/viaduct-task-timings.tsv of the
+build. After the build, the timings are written as a JSON file and a table
+per demo app into the timings directory, with the slowest tasks highlighted
+and compared against the previous run's report for the same app.
+
+Builds run through run_timed_build() record timings whenever
+VIADUCT_TASK_TIMINGS_DIR is set (validate_demoapp.py --task-timings sets it).
+
+Usage:
+  python3 task_timings.py <report.json> [<previous-report.json>]
+Example:
+  python3 task_timings.py build/task-timings/starwars.json build/task-timings/starwars.previous.json
+"""
+
+import copy
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+TIMINGS_DIR_ENV = "VIADUCT_TASK_TIMINGS_DIR"
+
+# Relative to the directory Gradle is invoked from
+TIMINGS_OUTPUT = "build/viaduct-task-timings.tsv"
+
+# Number of slowest tasks highlighted in the table
+DEFAULT_TOP = 5
+
+TASK_TIMINGS_INIT_SCRIPT = """\
+import javax.inject.Inject
+import org.gradle.api.services.BuildService
+import org.gradle.api.services.BuildServiceParameters
+import org.gradle.build.event.BuildEventsListenerRegistry
+import org.gradle.tooling.events.FinishEvent
+import org.gradle.tooling.events.OperationCompletionListener
+import org.gradle.tooling.events.task.TaskFailureResult
+import org.gradle.tooling.events.task.TaskFinishEvent
+import org.gradle.tooling.events.task.TaskSkippedResult
+import org.gradle.tooling.events.task.TaskSuccessResult
+
+abstract class ViaductTaskTimings implements BuildService<Params>, OperationCompletionListener {
+    interface Params extends BuildServiceParameters {
+        Property<String> getOutput()
+    }
+
+    @Override
+    synchronized void onFinish(FinishEvent event) {
+        if (!(event instanceof TaskFinishEvent)) {
+            return
+        }
+        def result = event.result
+        def outcome = "EXECUTED"
+        if (result instanceof TaskSuccessResult) {
+            outcome = result.fromCache ? "FROM-CACHE" : (result.upToDate ? "UP-TO-DATE" : "EXECUTED")
+        } else if (result instanceof TaskSkippedResult) {
+            outcome = "SKIPPED"
+        } else if (result instanceof TaskFailureResult) {
+            outcome = "FAILED"
+        }
+        new File(parameters.output.get()) << "${event.descriptor.taskPath}\\t${result.endTime - result.startTime}\\t${outcome}\\n"
+    }
+}
+
+abstract class ViaductTaskTimingsPlugin implements Plugin<Gradle> {
+    @Inject
+    abstract BuildEventsListenerRegistry getRegistry()
+
+    void apply(Gradle gradle) {
+        def output = new File(gradle.startParameter.currentDir, "%(output)s")
+        output.parentFile.mkdirs()
+        def timings = gradle.sharedServices.registerIfAbsent("viaductTaskTimings", ViaductTaskTimings) {
+            it.parameters.output.set(output.path)
+        }
+        registry.onTaskCompletion(timings)
+    }
+}
+
+apply plugin: ViaductTaskTimingsPlugin
+""" % {"output": TIMINGS_OUTPUT}
+
+
+@dataclass(frozen=True)
+class TaskTiming:
+    """How long one task of a build took, and its outcome (EXECUTED, UP-TO-DATE, FROM-CACHE, ...)."""
+
+    path: str
+    duration_ms: int
+    outcome: str
+
+
+def parse_timings(text):
+    """Parse the init script's tab-separated output."""
+    timings = []
+    for line in text.splitlines():
+        fields = line.split("\t")
+        if len(fields) != 3 or not fields[1].isdigit():
+            continue
+        timings.append(TaskTiming(fields[0], int(fields[1]), fields[2]))
+    return timings
+
+
+def format_duration(ms):
+    return f"{ms / 1000:.1f}s"
+
+
+def format_delta(ms, previous_ms):
+    if previous_ms is None:
+        return "new"
+    delta = ms - previous_ms
+    return f"+{format_duration(delta)}" if delta >= 0 else f"-{format_duration(-delta)}"
+
+
+def format_table(timings, previous=None, top=DEFAULT_TOP):
+    """A table of tasks, slowest first; the `top` slowest are marked with 🐢."""
+    previous_ms = {t.path: t.duration_ms for t in previous} if previous is not None else None
+    ordered = sorted(timings, key=lambda t: t.duration_ms, reverse=True)
+    width = max([len("Task")] + [len(t.path) for t in ordered])
+
+    header = f"   {'Task':<{width}}  {'Duration':>9}  {'Outcome':<10}"
+    if previous_ms is not None:
+        header += f"  {'vs previous':>11}"
+    lines = [header]
+    for index, timing in enumerate(ordered):
+        marker = "🐢" if index < top and timing.duration_ms > 0 else "  "
+        line = f"{marker} {timing.path:<{width}}  {format_duration(timing.duration_ms):>9}  {timing.outcome:<10}"
+        if previous_ms is not None:
+            line += f"  {format_delta(timing.duration_ms, previous_ms.get(timing.path)):>11}"
+        lines.append(line.rstrip())
+
+    total = sum(t.duration_ms for t in timings)
+    summary = f"   {len(timings)} tasks, {format_duration(total)} total task time"
+    if previous_ms is not None:
+        summary += f" ({format_delta(total, sum(previous_ms.values()))} vs previous)"
+        removed = sorted(set(previous_ms) - {t.path for t in timings})
+        if removed:
+            summary += f"; no longer run: {', '.join(removed)}"
+    lines.append(summary)
+    return "\n".join(lines)
+
+
+def load_report(path):
+    """The timings of a JSON report, or None if there is none."""
+    try:
+        data = json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return None
+    return [TaskTiming(**task) for task in data["tasks"]]
+
+
+def write_report(name, timings, report_dir):
+    """
+    Write <name>.json and <name>.txt into report_dir, keeping the report they
+    replace as <name>.previous.json, and return the table.
+    """
+    report_dir = Path(report_dir)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    report = report_dir / f"{name}.json"
+    previous_report = report_dir / f"{name}.previous.json"
+
+    if report.exists():
+        report.replace(previous_report)
+    previous = load_report(previous_report)
+
+    table = format_table(timings, previous)
+    report.write_text(json.dumps({"name": name, "tasks": [asdict(t) for t in timings]}, indent=2) + "\n")
+    (report_dir / f"{name}.txt").write_text(table + "\n")
+    return table
+
+
+def run_timed_build(runner, args, project_dir, report_dir=None, env=None):
+    """
+    Run a build through runner; when a report directory is given (or set in
+    VIADUCT_TASK_TIMINGS_DIR), record its task timings and write the report.
+    Returns the CompletedProcess.
+    """
+    if report_dir is None:
+        report_dir = (os.environ if env is None else env).get(TIMINGS_DIR_ENV)
+    if not report_dir:
+        return runner.run(args, cwd=project_dir)
+
+    report_dir = Path(report_dir).resolve()
+    report_dir.mkdir(parents=True, exist_ok=True)
+    # Stable path and content, so the script does not invalidate the configuration cache
+    init_script = report_dir / "task-timings.gradle"
+    if not init_script.exists() or init_script.read_text() != TASK_TIMINGS_INIT_SCRIPT:
+        init_script.write_text(TASK_TIMINGS_INIT_SCRIPT)
+
+    output = Path(project_dir) / TIMINGS_OUTPUT
+    output.unlink(missing_ok=True)
+
+    timed_runner = copy.copy(runner)
+    timed_runner.init_scripts = runner.init_scripts + [init_script]
+    result = timed_runner.run(args, cwd=project_dir)
+
+    if output.exists():
+        name = Path(project_dir).resolve().name
+        table = write_report(name, parse_timings(output.read_text()), report_dir)
+        print(f"Task timings for {name} (written to {report_dir}):")
+        print(table)
+    else:
+        print(f"⚠️  No task timings were recorded for {project_dir}")
+    return result
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) not in (1, 2):
+        print(__doc__)
+        return 1
+    timings = load_report(argv[0])
+    if timings is None:
+        print(f"❌ No report at {argv[0]}")
+        return 1
+    previous = load_report(argv[1]) if len(argv) == 2 else None
+    print(format_table(timings, previous))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import unittest
+import hashlib
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from artifact_manifest import (
+    DEFAULT_PUBLISH_MANIFEST,
+    build_manifest,
+    changed_modules,
+    diff_manifests,
+    find_artifacts,
+    hash_file,
+    load_manifest,
+    unchanged_since,
+    write_manifest,
+)
+
+
+class TestArtifactManifest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.dir.name)
+        self.write("engine/api/build/libs/api-1.0.0-SNAPSHOT.jar", b"api")
+        self.write("engine/runtime/build/libs/runtime-1.0.0-SNAPSHOT.jar", b"runtime")
+        self.write("engine/runtime/build/libs/runtime-1.0.0-SNAPSHOT-sources.jar", b"")
+        self.write("engine/runtime/build/tmp/jar/MANIFEST.MF", b"not an artifact")
+        self.write("demoapps/starwars/build/libs/starwars.jar", b"not published")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, path, content):
+        path = self.root / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+    def test_finds_module_jars_only(self):
+        self.assertEqual(
+            [p.relative_to(self.root).as_posix() for p in find_artifacts(self.root)],
+            [
+                "engine/api/build/libs/api-1.0.0-SNAPSHOT.jar",
+                "engine/runtime/build/libs/runtime-1.0.0-SNAPSHOT-sources.jar",
+                "engine/runtime/build/libs/runtime-1.0.0-SNAPSHOT.jar",
+            ],
+        )
+
+    def test_hash_file(self):
+        self.assertEqual(
+            hash_file(self.root / "engine/api/build/libs/api-1.0.0-SNAPSHOT.jar"),
+            hashlib.sha256(b"api").hexdigest(),
+        )
+        self.assertEqual(
+            hash_file(self.root / "engine/runtime/build/libs/runtime-1.0.0-SNAPSHOT-sources.jar"),
+            hashlib.sha256(b"").hexdigest(),
+        )
+
+    def test_unchanged_rebuild_is_detected(self):
+        manifest_path = self.root / "build" / "manifest.json"
+        write_manifest(build_manifest(self.root, version="1.0.0-SNAPSHOT"), manifest_path)
+        previous = load_manifest(manifest_path)
+        self.assertTrue(unchanged_since(previous, build_manifest(self.root, version="1.0.0-SNAPSHOT")))
+        self.assertFalse(unchanged_since(previous, build_manifest(self.root, version="1.1.0-SNAPSHOT")))
+        self.assertFalse(unchanged_since(None, build_manifest(self.root, version="1.0.0-SNAPSHOT")))
+
+    def test_changed_artifacts_and_modules(self):
+        previous = build_manifest(self.root, version="1.0.0-SNAPSHOT")
+        self.write("engine/runtime/build/libs/runtime-1.0.0-SNAPSHOT.jar", b"runtime v2")
+        (self.root / "engine/api/build/libs/api-1.0.0-SNAPSHOT.jar").unlink()
+        current = build_manifest(self.root, version="1.0.0-SNAPSHOT")
+
+        changed = diff_manifests(previous, current)
+        self.assertEqual(
+            changed,
+            ["engine/api/build/libs/api-1.0.0-SNAPSHOT.jar", "engine/runtime/build/libs/runtime-1.0.0-SNAPSHOT.jar"],
+        )
+        self.assertEqual(changed_modules(changed), ["engine/api", "engine/runtime"])
+        self.assertFalse(unchanged_since(previous, current))
+
+    def test_no_artifacts_is_never_unchanged(self):
+        empty = build_manifest(self.root / "engine" / "missing", version="1.0.0-SNAPSHOT")
+        self.assertEqual(empty["artifacts"], {})
+        self.assertFalse(unchanged_since(empty, empty))
+
+    def test_publish_manifest_survives_a_clean_checkout(self):
+        repo_root = Path(__file__).resolve().parents[3]
+        self.assertFalse(DEFAULT_PUBLISH_MANIFEST.resolve().is_relative_to(repo_root))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import sys
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmark_release import (
+    PHASES,
+    REPO_ROOT,
+    SOURCE_MODES,
+    MetadataServer,
+    compare_source_modes,
+    format_report,
+    format_source_modes,
+    parse_latency,
+    parse_push_log,
+    registered_demo_apps,
+    run_benchmark,
+)
+from demoapp_registry import CACHE_PATH
+
+
+class TestBenchmarkRelease(unittest.TestCase):
+    def test_metadata_server_lists_published_versions(self):
+        with MetadataServer(["0.6.0"]) as server:
+            with urllib.request.urlopen(server.url) as response:
+                self.assertIn(b"<version>0.6.0</version>", response.read())
+
+    def test_parse_latency(self):
+        self.assertEqual(parse_latency("build=1.5"), ("build", 1.5))
+
+    def test_format_report_speedup(self):
+        results = {
+            config: {phase: {"seconds": seconds, "ok": True} for phase in PHASES}
+            for config, seconds in [("serial", 4.0), ("parallel", 2.0)]
+        }
+        results["parallel"]["sync"]["ok"] = False
+        report = format_report(results)
+        self.assertIn("2.00x", report)
+        self.assertIn("FAILED", report)
+
+    def test_registered_demo_apps_leave_the_checkout_untouched(self):
+        cache = REPO_ROOT / CACHE_PATH
+        existed = cache.exists()
+        self.assertTrue(registered_demo_apps())
+        self.assertEqual(cache.exists(), existed)
+
+    def test_every_phase_succeeds_against_stand_ins(self):
+        results = run_benchmark(
+            configs=["serial", "parallel"],
+            latencies={},
+            startup=0,
+            copybara_latency=0,
+            # The sandbox is built from these, so the checkout's registry is never read
+            demo_apps=[("starwars", "viaduct-graphql/starwars"), ("cli-starter", "viaduct-graphql/cli-starter")],
+        )
+        for config, phases in results.items():
+            self.assertEqual(list(phases), ["validate", "publish-release", "sync", "push-copybara", "push-fast-import"])
+            for phase, entry in phases.items():
+                self.assertTrue(entry["ok"], f"{config} {phase} failed")
+
+    def test_parse_push_log(self):
+        log = (
+            "   12 files, 0.5 MiB materialized in 0.04s\n"
+            "⏱  copybara (sparse source): 1.25s wall, 16 blocks read, 8 blocks written\n"
+        )
+        self.assertEqual(
+            parse_push_log(log),
+            {"files": 12, "mib": 0.5, "checkout_seconds": 0.04, "copybara_seconds": 1.25,
+             "blocks_read": 16, "blocks_written": 8},
+        )
+        self.assertIsNone(parse_push_log("Successfully synced starwars\n"))
+
+    def test_sparse_source_materializes_only_the_demo_app(self):
+        results = compare_source_modes(
+            monorepo_files=200,
+            demo_apps=[("starwars", "viaduct-graphql/starwars"), ("cli-starter", "viaduct-graphql/cli-starter")],
+        )
+        self.assertEqual(list(results), list(SOURCE_MODES))
+        self.assertTrue(all(entry["ok"] for entry in results.values()), results)
+        self.assertLess(results["sparse"]["files"], 20)
+        self.assertGreater(results["full"]["files"], 200)
+        report = format_source_modes(results)
+        self.assertIn("sparse", report)
+        self.assertIn("blocks read", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import sys
+import tempfile
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from build_cache_server import BuildCacheServer, LruCacheStore
+
+
+class TestLruCacheStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_miss_then_hit(self):
+        store = LruCacheStore(self.tmp.name, max_bytes=100)
+        self.assertIsNone(store.get("abc"))
+        store.put("abc", b"data")
+        self.assertEqual(store.get("abc"), b"data")
+        self.assertEqual((store.hits, store.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        store = LruCacheStore(self.tmp.name, max_bytes=10)
+        store.put("a", b"1234")
+        store.put("b", b"1234")
+        store.get("a")
+        store.put("c", b"1234")
+        self.assertIsNone(store.get("b"))
+        self.assertEqual(store.get("a"), b"1234")
+        self.assertFalse((Path(self.tmp.name) / "b").exists())
+        self.assertEqual(store.total_bytes, 8)
+
+    def test_rejects_entry_larger_than_cache(self):
+        store = LruCacheStore(self.tmp.name, max_bytes=3)
+        self.assertFalse(store.put("a", b"1234"))
+        self.assertEqual(store.entries, {})
+
+    def test_reloads_existing_entries(self):
+        LruCacheStore(self.tmp.name).put("a", b"data")
+        store = LruCacheStore(self.tmp.name)
+        self.assertEqual(store.get("a"), b"data")
+        self.assertEqual(store.total_bytes, 4)
+
+
+class TestBuildCacheServer(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.server = BuildCacheServer(self.dir / "cache").start()
+        self.addCleanup(self.server.stop)
+
+    def test_put_then_get(self):
+        url = self.server.url + "0123abcd"
+        urllib.request.urlopen(urllib.request.Request(url, data=b"entry", method="PUT")).close()
+        with urllib.request.urlopen(url) as response:
+            self.assertEqual(response.read(), b"entry")
+        self.assertEqual(self.server.summary(), "1 hits, 0 misses, 1 entries (0.0 MiB)")
+
+    def test_missing_entry_is_404(self):
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(self.server.url + "missing")
+        self.assertEqual(ctx.exception.code, 404)
+
+    def test_init_script_points_at_server(self):
+        script = self.server.write_init_script(self.dir)
+        self.assertIn(f'url = "{self.server.url}"', script.read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import subprocess
+import sys
+import tempfile
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmark_release import MetadataServer
+from cassette import Cassette, CassetteMiss, normalize
+from process_watchdog import Watchdog
+
+
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "calls.json.gz"
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_normalize_temp_paths(self):
+        tmp = tempfile.gettempdir()
+        self.assertEqual(
+            normalize(["git", "-C", f"{tmp}/viaduct-export-abc123/repo"]),
+            ["git", "-C", "<tmp>/repo"],
+        )
+
+    def test_replays_subprocess_results_without_running(self):
+        real_run = subprocess.run
+        marker = Path(self.dir.name) / "marker"
+        command = f"touch {marker} && echo out && echo err >&2 && exit 3"
+        with Cassette(self.path, "record"):
+            recorded = subprocess.run(command, shell=True, capture_output=True, text=True)
+            with self.assertRaises(subprocess.CalledProcessError):
+                subprocess.run(["false"], check=True)
+        marker.unlink()
+
+        with Cassette(self.path, "replay"):
+            replayed = subprocess.run(command, shell=True, capture_output=True, text=True)
+            with self.assertRaises(subprocess.CalledProcessError):
+                subprocess.run(["false"], check=True)
+        self.assertFalse(marker.exists())
+        self.assertEqual(
+            (replayed.returncode, replayed.stdout, replayed.stderr),
+            (recorded.returncode, recorded.stdout, recorded.stderr),
+        )
+        self.assertEqual(replayed.returncode, 3)
+        self.assertIs(subprocess.run, real_run)
+
+    def test_repeated_calls_replay_in_order(self):
+        with Cassette(self.path, "record"):
+            for i in range(3):
+                subprocess.run(["sh", "-c", "echo $((${N:-0}+1))"], capture_output=True, env={"N": str(i)})
+        with Cassette(self.path, "replay") as cassette:
+            outputs = [subprocess.run(["sh", "-c", "echo $((${N:-0}+1))"], capture_output=True).stdout for _ in range(3)]
+            with self.assertRaises(CassetteMiss):
+                subprocess.run(["sh", "-c", "echo $((${N:-0}+1))"], capture_output=True)
+        self.assertEqual(outputs, [b"1\n", b"2\n", b"3\n"])
+        self.assertIn("0 recorded calls left", cassette.summary())
+
+    def test_replays_watched_runs(self):
+        watchdog = Watchdog(idle_timeout=5)
+        with Cassette(self.path, "record") as cassette:
+            recorded = watchdog.run(["sh", "-c", "echo watched"], capture_output=True, text=True)
+        self.assertEqual(len(cassette.calls), 1)
+        with Cassette(self.path, "replay"):
+            replayed = watchdog.run(["sh", "-c", "echo watched"], capture_output=True, text=True)
+        self.assertEqual(replayed.stdout, recorded.stdout)
+        self.assertFalse(replayed.stalled)
+
+    def test_replays_http_responses_and_errors(self):
+        with MetadataServer(["0.6.0"]) as server:
+            with Cassette(self.path, "record"):
+                with urllib.request.urlopen(server.url) as response:
+                    recorded = response.read()
+                with self.assertRaises(urllib.error.HTTPError):
+                    urllib.request.urlopen(server.url.rsplit("/", 1)[0] + "/missing")
+            url = server.url
+        missing_url = url.rsplit("/", 1)[0] + "/missing"
+
+        with Cassette(self.path, "replay"):
+            with urllib.request.urlopen(url) as response:
+                self.assertEqual(response.status, 200)
+                self.assertEqual(response.read(), recorded)
+            with self.assertRaises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(missing_url)
+        self.assertEqual(error.exception.code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
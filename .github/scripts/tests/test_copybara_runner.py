@@ -0,0 +1,95 @@
+import os
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from copybara_runner import CopybaraRunner, NO_OP_EXIT_CODE, describe_exit, is_successful_exit
+from run_locks import LOCKS_DIR_ENV, ResourceLock, lock_name
+
+FAKE_JAVA = """#!/bin/sh
+# Exit with the code encoded in the workflow name: wf-<code>
+for arg in "$@"; do
+  case "$arg" in
+    wf-*) exit "${arg#wf-}" ;;
+  esac
+done
+exit 0
+"""
+
+
+class TestExitCodes(unittest.TestCase):
+    def test_success_and_no_op(self):
+        self.assertTrue(is_successful_exit(0))
+        self.assertTrue(is_successful_exit(NO_OP_EXIT_CODE))
+        self.assertFalse(is_successful_exit(1))
+
+    def test_describe(self):
+        self.assertEqual(describe_exit(NO_OP_EXIT_CODE), "NO_OP, nothing to sync")
+        self.assertEqual(describe_exit(2), "failed")
+
+
+class TestCopybaraRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        jar = self.root / "tools" / "copybara" / "copybara_deploy.jar"
+        jar.parent.mkdir(parents=True)
+        jar.write_bytes(b"")
+        java = self.root / "jdk" / "bin" / "java"
+        java.parent.mkdir(parents=True)
+        java.write_text(FAKE_JAVA)
+        java.chmod(0o755)
+        patcher = mock.patch.dict(os.environ, {"JAVA_HOME": str(self.root / "jdk")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.runner = CopybaraRunner(self.root)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_command_adds_config_root(self):
+        cmd = self.runner.command(["migrate", "copy.bara.sky", "wf-0"])
+        self.assertEqual(cmd[1:3], ["-jar", str(self.runner.jar)])
+        self.assertEqual(cmd[-1], f"--config-root={self.root}")
+
+    def test_command_keeps_explicit_config_root(self):
+        cmd = self.runner.command(["migrate", "--config-root=/elsewhere"])
+        self.assertEqual([a for a in cmd if a.startswith("--config-root")], ["--config-root=/elsewhere"])
+
+    def test_migrate_all_reports_each_exit_code(self):
+        migrations = [
+            ("starwars", ["migrate", "c", "wf-0"], None),
+            ("cli-starter", ["migrate", "c", f"wf-{NO_OP_EXIT_CODE}"], None),
+            ("ktor-starter", ["migrate", "c", "wf-3"], None),
+        ]
+        self.assertEqual(
+            self.runner.migrate_all(migrations, max_workers=2),
+            {"starwars": 0, "cli-starter": NO_OP_EXIT_CODE, "ktor-starter": 3},
+        )
+
+    def test_migrate_all_holds_each_destination_lock(self):
+        held = {}
+        run = self.runner.run
+
+        def checking_run(args, env=None):
+            lock = ResourceLock(lock_name("copybara", f"viaduct-graphql/{args[-1]}"))
+            held[args[-1]] = not lock.try_acquire()
+            lock.release()
+            return run(["migrate", "c", "wf-0"], env)
+
+        with mock.patch.dict(os.environ, {LOCKS_DIR_ENV: str(self.root / "locks")}), \
+                mock.patch.object(self.runner, "run", side_effect=checking_run):
+            exit_codes = self.runner.migrate_all(
+                [("starwars", ["migrate", "c", "starwars"], None), ("cli-starter", ["migrate", "c", "cli-starter"], None)],
+                locks={"starwars": lock_name("copybara", "viaduct-graphql/starwars")},
+            )
+        self.assertEqual(exit_codes, {"starwars": 0, "cli-starter": 0})
+        self.assertEqual(held, {"starwars": True, "cli-starter": False})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from demoapp_impact import DEMOAPP_DEPENDENCIES, affected_demoapps, is_affected
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+DEMOAPPS = ["cli-starter", "ktor-starter", "starwars"]
+
+
+class TestIsAffected(unittest.TestCase):
+    def test_own_directory(self):
+        self.assertTrue(is_affected("ktor-starter", "demoapps/ktor-starter/build.gradle.kts"))
+
+    def test_sibling_directory_with_shared_prefix(self):
+        self.assertFalse(is_affected("starwars", "demoapps/starwars-extra/README.md"))
+
+    def test_core_module(self):
+        self.assertTrue(is_affected("starwars", "engine/runtime/src/main/kotlin/Foo.kt"))
+
+    def test_gradle_plugins(self):
+        self.assertTrue(is_affected("cli-starter", "gradle-plugins/common/build.gradle.kts"))
+
+    def test_exact_file_dependency(self):
+        self.assertTrue(is_affected("cli-starter", "VERSION"))
+        self.assertFalse(is_affected("cli-starter", "VERSION.md"))
+
+    def test_unrelated_path(self):
+        self.assertFalse(is_affected("starwars", "docs/content/index.md"))
+
+    def test_core_modules_no_demo_app_uses(self):
+        for path in ["x/javaapi/api/src/Foo.kt", "tenant/tutorials/src/Foo.kt", "shared/apiannotations/src/Foo.kt"]:
+            self.assertFalse(is_affected("starwars", path), path)
+
+    def test_every_demo_app_declares_its_dependencies(self):
+        names = sorted(p.name for p in (REPO_ROOT / "demoapps").iterdir() if p.is_dir())
+        self.assertEqual(sorted(DEMOAPP_DEPENDENCIES), names)
+        for name, modules in DEMOAPP_DEPENDENCIES.items():
+            self.assertTrue(modules, name)
+            for module in modules:
+                self.assertTrue((REPO_ROOT / module).is_dir(), f"{name}: {module}")
+
+
+class TestAffectedDemoapps(unittest.TestCase):
+    def test_only_touched_demoapp(self):
+        paths = ["demoapps/ktor-starter/src/main/kotlin/App.kt", "README.md"]
+        self.assertEqual(affected_demoapps(DEMOAPPS, paths), ["ktor-starter"])
+
+    def test_core_change_affects_all(self):
+        self.assertEqual(affected_demoapps(DEMOAPPS, ["shared/utils/Foo.kt"]), DEMOAPPS)
+
+    def test_version_resolution_change_affects_all(self):
+        for path in [
+            "gradle/libs.versions.toml",
+            "viaduct-bom/build.gradle.kts",
+            "settings.gradle.kts",
+            "build.gradle.kts",
+            "gradle.properties",
+            ".github/copybara/copy.bara.sky",
+        ]:
+            self.assertEqual(affected_demoapps(DEMOAPPS, [path]), DEMOAPPS, path)
+        self.assertEqual(affected_demoapps(DEMOAPPS, ["docs/build.gradle.kts"]), [])
+
+    def test_no_changes(self):
+        self.assertEqual(affected_demoapps(DEMOAPPS, []), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
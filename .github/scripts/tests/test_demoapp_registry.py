@@ -0,0 +1,143 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import demoapp_registry
+from demoapp_registry import (
+    CACHE_PATH,
+    CONFIG_PATH,
+    WORKFLOW_SHAPE,
+    DemoApp,
+    load_registry,
+    parse_workflows,
+    report,
+)
+
+CONFIG = """\
+# Demo apps synced to the viaduct-graphql organization
+core.workflow(
+    name = "airbnb-viaduct-to-starwars",
+    origin = git.origin(url = "https://github.com/airbnb/viaduct.git", ref = "main"),
+    destination = git.github_destination(url = "https://github.com/viaduct-graphql/starwars.git"),
+)
+
+core.workflow(name = "airbnb-viaduct-to-cli-starter", origin_files = glob(["demoapps/cli-starter/**"]))
+# core.workflow(name = "airbnb-viaduct-to-not-an-app")
+core.workflow(name = "airbnb-viaduct-to-ktor-starter")
+"""
+
+
+class TestParseWorkflows(unittest.TestCase):
+    def test_literal_workflow_names(self):
+        workflows, problems = parse_workflows(CONFIG)
+        self.assertEqual(
+            workflows,
+            ["airbnb-viaduct-to-starwars", "airbnb-viaduct-to-cli-starter", "airbnb-viaduct-to-ktor-starter"],
+        )
+        self.assertEqual(problems, [])
+
+    def test_other_shapes_are_reported_with_the_supported_one(self):
+        config = (
+            'APPS = ["a"]\n'
+            'core.workflow(name = "x-%s" % app)\n'
+            "core.workflow(name = 'airbnb-viaduct-to-a')\n"
+            'core.workflow(name = "airbnb-viaduct-to-{}".format(app))\n'
+            'core.workflow(origin = git.origin(url = "x"), name = "airbnb-viaduct-to-a")\n'
+            "core.workflow()\n"
+        )
+        workflows, problems = parse_workflows(config)
+        self.assertEqual(workflows, [])
+        self.assertEqual([problem.split(":")[1] for problem in problems], ["2", "3", "4", "5", "6"])
+        for problem in problems:
+            self.assertIn(f"write it as {WORKFLOW_SHAPE}", problem)
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = Path(self.tmp.name).resolve()
+        for name in ("starwars", "cli-starter", "ktor-starter", "jetty-starter"):
+            (self.repo / "demoapps" / name).mkdir(parents=True)
+        (self.repo / CONFIG_PATH).parent.mkdir(parents=True)
+        self.write_config(CONFIG)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_config(self, text):
+        config = self.repo / CONFIG_PATH
+        config.write_text(text)
+        # Distinct mtimes even on filesystems with a coarse clock
+        stat = config.stat()
+        os.utime(config, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_apps_and_unregistered_directories(self):
+        registry = load_registry(self.repo)
+        self.assertEqual(registry.names(), ["starwars", "cli-starter", "ktor-starter"])
+        self.assertEqual(
+            registry.find("starwars"),
+            DemoApp("starwars", "viaduct-graphql/starwars", "airbnb-viaduct-to-starwars"),
+        )
+        self.assertEqual(registry.unregistered, ["jetty-starter"])
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertTrue(report(registry))
+        self.assertIn("demoapps/jetty-starter has no airbnb-viaduct-to-jetty-starter workflow", stdout.getvalue())
+
+    def test_unknown_workflows_are_rejected(self):
+        registry = load_registry(self.repo)
+        self.assertIsNone(registry.workflow_problem("starwars"))
+        self.assertIn("did you mean starwars?", registry.workflow_problem("starwar"))
+        self.assertIn("no copybara workflow", registry.workflow_problem("jetty-starter"))
+
+    def test_unreadable_workflow_blocks_publishing(self):
+        self.write_config(CONFIG + 'core.workflow(name = "airbnb-viaduct-to-" + "jetty-starter")\n')
+        registry = load_registry(self.repo)
+        self.assertEqual(registry.names(), ["starwars", "cli-starter", "ktor-starter"])
+        [error] = registry.errors()
+        self.assertIn(WORKFLOW_SHAPE, error)
+
+    def test_workflow_without_directory(self):
+        self.write_config(CONFIG + 'core.workflow(name = "airbnb-viaduct-to-graphiql")\n')
+        registry = load_registry(self.repo)
+        self.assertEqual(registry.missing, ["graphiql"])
+        self.assertIn("demoapps/graphiql does not exist", registry.workflow_problem("graphiql"))
+        self.assertEqual(registry.errors(), ["airbnb-viaduct-to-graphiql: demoapps/graphiql does not exist"])
+
+    def test_missing_config_lists_the_directories_but_publishes_nothing(self):
+        (self.repo / CONFIG_PATH).unlink()
+        registry = load_registry(self.repo)
+        self.assertEqual(registry.names(), ["cli-starter", "jetty-starter", "ktor-starter", "starwars"])
+        self.assertEqual(registry.unregistered, [])
+        self.assertIn("no copybara config", registry.workflow_problem("starwars"))
+        self.assertFalse(registry.config_found)
+        self.assertTrue(registry.errors())
+
+    def test_cached_until_the_config_or_demoapps_change(self):
+        first = load_registry(self.repo)
+        cache = json.loads((self.repo / CACHE_PATH).read_text())
+        self.assertEqual([app["name"] for app in cache["registry"]["apps"]], first.names())
+
+        # A new process reads the cache instead of parsing
+        demoapp_registry._loaded.clear()
+        with mock.patch.object(demoapp_registry, "scan") as scan:
+            self.assertEqual(load_registry(self.repo), first)
+        scan.assert_not_called()
+
+        self.write_config(CONFIG.replace('core.workflow(name = "airbnb-viaduct-to-ktor-starter")\n', ""))
+        self.assertEqual(load_registry(self.repo).names(), ["starwars", "cli-starter"])
+
+        (self.repo / "demoapps" / "starwars").rename(self.repo / "demoapps" / "star-wars")
+        self.assertEqual(load_registry(self.repo).missing, ["starwars"])
+
+
+if __name__ == "__main__":
+    unittest.main()
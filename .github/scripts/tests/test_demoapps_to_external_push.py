@@ -0,0 +1,234 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import demoapps_to_external_push
+import run_locks
+from demoapps_to_external_push import DemoAppPublisher
+
+
+def git(cwd, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+
+class TestExportWorktree(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name).resolve()
+        self.repo = root / "repo"
+        for path, content in {
+            "demoapps/starwars/gradle.properties": "viaductVersion=0.6.0-SNAPSHOT\n",
+            "demoapps/starwars/src/App.kt": "fun main() {}\n",
+            "demoapps/cli-starter/gradle.properties": "viaductVersion=0.6.0-SNAPSHOT\n",
+            ".github/copybara/copy.bara.sky": "# config\n",
+            "engine/Engine.kt": "class Engine\n",
+        }.items():
+            (self.repo / path).parent.mkdir(parents=True, exist_ok=True)
+            (self.repo / path).write_text(content)
+        git(root, "init", "-q", str(self.repo))
+        git(self.repo, "add", ".")
+        git(self.repo, "commit", "-q", "-m", "initial")
+
+        run_locks.run_workspace.cache_clear()
+        self.addCleanup(run_locks.run_workspace.cache_clear)
+        patcher = mock.patch.dict(os.environ, {run_locks.RUN_WORKSPACE_ENV: str(root / "workspace")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def publisher(self, source_mode):
+        with contextlib.redirect_stdout(io.StringIO()):
+            publisher = DemoAppPublisher(
+                "starwars", "viaduct-graphql/starwars", source_mode=source_mode, repo_root=self.repo
+            )
+        self.addCleanup(publisher.cleanup)
+        return publisher
+
+    def export(self, publisher):
+        with contextlib.redirect_stdout(io.StringIO()):
+            export_dir = publisher.create_export_worktree()
+            publisher.update_gradle_properties("0.7.0")
+        return export_dir
+
+    def assert_checkout_untouched(self):
+        self.assertEqual(
+            (self.repo / "demoapps" / "starwars" / "gradle.properties").read_text(),
+            "viaductVersion=0.6.0-SNAPSHOT\n",
+        )
+        self.assertEqual(git(self.repo, "status", "--porcelain"), "")
+
+    def test_sparse_export_overrides_the_version_outside_the_checkout(self):
+        publisher = self.publisher("sparse")
+        export_dir = self.export(publisher)
+        # Only the override, no lock files or other strays in the copybara source
+        self.assertEqual(git(export_dir, "status", "--porcelain", "--untracked-files=all"),
+                         "M demoapps/starwars/gradle.properties")
+        self.assertEqual(
+            (export_dir / "demoapps" / "starwars" / "gradle.properties").read_text(), "viaductVersion=0.7.0\n"
+        )
+        self.assertTrue((export_dir / ".github" / "copybara" / "copy.bara.sky").exists())
+        self.assertFalse((export_dir / "engine").exists())
+        self.assertFalse((export_dir / "demoapps" / "cli-starter").exists())
+        self.assert_checkout_untouched()
+
+        publisher.cleanup()
+        self.assertFalse(export_dir.exists())
+        self.assertIsNone(publisher.export_dir)
+
+    def test_full_export_overrides_the_version_outside_the_checkout(self):
+        publisher = self.publisher("full")
+        export_dir = self.export(publisher)
+        self.assertEqual(
+            (export_dir / "demoapps" / "starwars" / "gradle.properties").read_text(), "viaductVersion=0.7.0\n"
+        )
+        self.assertTrue((export_dir / "engine" / "Engine.kt").exists())
+        self.assert_checkout_untouched()
+
+        publisher.cleanup()
+        self.assertFalse(export_dir.exists())
+        self.assertEqual(len(git(self.repo, "worktree", "list").splitlines()), 1)
+
+    def test_failed_export_removes_the_worktree(self):
+        publisher = self.publisher("sparse")
+        with mock.patch.object(demoapps_to_external_push, "head_commit", return_value="0" * 40), \
+                contextlib.redirect_stdout(io.StringIO()), \
+                self.assertRaises(subprocess.CalledProcessError):
+            publisher.create_export_worktree()
+        self.assertIsNone(publisher.export_dir)
+        self.assertFalse((run_locks.run_workspace() / "export-starwars").exists())
+        self.assert_checkout_untouched()
+
+    def test_failed_override_removes_the_worktree(self):
+        publisher = self.publisher("full")
+        with mock.patch.object(demoapps_to_external_push, "current_branch", return_value="release/v0.7.0"), \
+                mock.patch.object(publisher, "verify_workflow", return_value=True), \
+                mock.patch.object(publisher, "verify_release_version_matches_branch", return_value=True), \
+                mock.patch.object(publisher, "verify_individual_build", return_value=True), \
+                mock.patch.object(publisher, "update_gradle_properties", side_effect=OSError("disk full")), \
+                contextlib.redirect_stdout(io.StringIO()), \
+                self.assertRaises(OSError):
+            publisher.prepare()
+        self.assertIsNone(publisher.export_dir)
+        self.assertFalse((run_locks.run_workspace() / "export-starwars").exists())
+        self.assertEqual(len(git(self.repo, "worktree", "list").splitlines()), 1)
+        self.assert_checkout_untouched()
+
+
+class TestFastImportExporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name).resolve()
+        self.repo = root / "repo"
+        for name in ("starwars", "cli-starter"):
+            (self.repo / "demoapps" / name).mkdir(parents=True)
+            (self.repo / "demoapps" / name / "gradle.properties").write_text("viaductVersion=0.6.0-SNAPSHOT\n")
+        git(root, "init", "-q", str(self.repo))
+        git(self.repo, "add", ".")
+        git(self.repo, "commit", "-q", "-m", "initial")
+        self.destination = root / "destination.git"
+        git(root, "init", "-q", "--bare", str(self.destination))
+
+        patcher = mock.patch.dict(os.environ, {run_locks.LOCKS_DIR_ENV: str(root / "locks")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_concurrent_exports_into_one_destination_take_turns(self):
+        publishers = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for version in ("0.7.0", "0.7.1"):
+                publisher = DemoAppPublisher(
+                    "starwars", "viaduct-graphql/starwars", exporter="fast-import",
+                    destination=self.destination, repo_root=self.repo,
+                )
+                publisher.published_version = version
+                publishers.append(publisher)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                returncodes = list(executor.map(lambda p: p.run_fast_export(), publishers))
+        self.assertEqual(returncodes, [0, 0])
+        # Both commits landed, one on top of the other, and no staging ref was left behind
+        self.assertEqual(len(git(self.destination, "rev-list", "main").splitlines()), 2)
+        self.assertEqual(git(self.destination, "for-each-ref", "refs/viaduct-export"), "")
+
+
+class TestGitCredentialEnv(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.home = Path(self.tmp.name).resolve()
+        patcher = mock.patch.dict(os.environ, {"HOME": str(self.home), "GIT_CONFIG_NOSYSTEM": "1"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for name in ("CI", "GITHUB_ACTIONS", "VIADUCT_GRAPHQL_GITHUB_ACCESS_TOKEN", "GIT_CONFIG_COUNT"):
+            os.environ.pop(name, None)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def publisher(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return DemoAppPublisher("starwars", "viaduct-graphql/starwars")
+
+    def credential_fill(self, env):
+        return subprocess.run(
+            ["git", "credential", "fill"],
+            input="protocol=https\nhost=github.com\npath=viaduct-graphql/starwars.git\n\n",
+            env=env,
+            cwd=self.home,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+    def test_ci_helper_returns_the_token(self):
+        os.environ.update(CI="true", VIADUCT_GRAPHQL_GITHUB_ACCESS_TOKEN="s3cret")
+        env = self.publisher().git_credential_env()
+        self.assertEqual(env["GIT_CONFIG_COUNT"], "2")
+        output = self.credential_fill(env)
+        self.assertIn("username=x-access-token", output)
+        self.assertIn("password=s3cret", output)
+        self.assertFalse((self.home / ".netrc").exists())
+        # The token only reaches the git child processes
+        self.assertNotIn("VIADUCT_GIT_CREDENTIAL_TOKEN", os.environ)
+
+    def test_existing_environment_config_is_kept(self):
+        os.environ.update(
+            CI="true",
+            VIADUCT_GRAPHQL_GITHUB_ACCESS_TOKEN="s3cret",
+            GIT_CONFIG_COUNT="1",
+            GIT_CONFIG_KEY_0="core.autocrlf",
+            GIT_CONFIG_VALUE_0="false",
+        )
+        env = self.publisher().git_credential_env()
+        self.assertEqual(env["GIT_CONFIG_COUNT"], "3")
+        self.assertEqual(env["GIT_CONFIG_KEY_0"], "core.autocrlf")
+        self.assertEqual(env["GIT_CONFIG_KEY_1"], "credential.https://github.com.helper")
+        self.assertIn("password=s3cret", self.credential_fill(env))
+
+    def test_local_runs_add_no_credentials(self):
+        env = self.publisher().git_credential_env()
+        self.assertNotIn("GIT_CONFIG_COUNT", env)
+        self.assertNotIn("VIADUCT_GIT_CREDENTIAL_TOKEN", env)
+        self.assertFalse((self.home / ".netrc").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import subprocess
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fast_export import export_demoapp, quote_path
+
+
+def git(cwd, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+
+class TestExportDemoapp(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.source = root / "source"
+        app = self.source / "demoapps" / "starwars"
+        (app / "src").mkdir(parents=True)
+        (app / "gradle.properties").write_text("viaductVersion=1.0.0-SNAPSHOT\n")
+        (app / "src" / "App.kt").write_text("fun main() {}\n")
+        (app / "gradlew").write_text("#!/bin/sh\n")
+        (app / "gradlew").chmod(0o755)
+        (self.source / "README.md").write_text("not exported\n")
+        git(root, "init", "-q", str(self.source))
+        git(self.source, "add", ".")
+        git(self.source, "commit", "-q", "-m", "initial")
+
+        self.destination = root / "destination.git"
+        git(root, "init", "-q", "--bare", str(self.destination))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_exports_subtree_as_root_with_version(self):
+        commit = export_demoapp(self.source, "starwars", self.destination, version="1.0.0")
+        self.assertIsNotNone(commit)
+        files = git(self.destination, "ls-tree", "-r", "--name-only", "main").splitlines()
+        self.assertEqual(sorted(files), ["gradle.properties", "gradlew", "src/App.kt"])
+        self.assertEqual(git(self.destination, "show", "main:gradle.properties"), "viaductVersion=1.0.0")
+        self.assertIn("100755", git(self.destination, "ls-tree", "main", "gradlew"))
+
+    def test_unchanged_files_keep_source_blob_ids(self):
+        export_demoapp(self.source, "starwars", self.destination, version="1.0.0")
+        self.assertEqual(
+            git(self.destination, "rev-parse", "main:src/App.kt"),
+            git(self.source, "rev-parse", "HEAD:demoapps/starwars/src/App.kt"),
+        )
+
+    def test_records_origin_revision_trailer(self):
+        export_demoapp(self.source, "starwars", self.destination)
+        source_sha = git(self.source, "rev-parse", "HEAD")
+        self.assertIn(f"GitOrigin-RevId: {source_sha}", git(self.destination, "log", "-1", "--format=%B", "main"))
+
+    def test_second_identical_export_is_no_op(self):
+        first = export_demoapp(self.source, "starwars", self.destination, version="1.0.0")
+        self.assertIsNone(export_demoapp(self.source, "starwars", self.destination, version="1.0.0"))
+        self.assertEqual(git(self.destination, "rev-parse", "main"), first)
+        self.assertEqual(git(self.destination, "for-each-ref", "refs/viaduct-export"), "")
+
+    def test_new_export_builds_on_destination_history(self):
+        first = export_demoapp(self.source, "starwars", self.destination, version="1.0.0")
+        second = export_demoapp(self.source, "starwars", self.destination, version="1.0.1")
+        self.assertEqual(git(self.destination, "rev-parse", f"{second}^"), first)
+
+    def test_missing_demoapp(self):
+        with self.assertRaises(RuntimeError):
+            export_demoapp(self.source, "nope", self.destination)
+
+
+class TestQuotePath(unittest.TestCase):
+    def test_plain_path(self):
+        self.assertEqual(quote_path("src/App.kt"), "src/App.kt")
+
+    def test_path_with_quote(self):
+        self.assertEqual(quote_path('a"b'), '"a\\"b"')
+
+
+if __name__ == "__main__":
+    unittest.main()
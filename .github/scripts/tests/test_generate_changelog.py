@@ -1,10 +1,16 @@
+import contextlib
+import io
+import subprocess
 import unittest
 import sys
+import tempfile
 from pathlib import Path
+from unittest import mock
 
 # Add parent directory to path so we can import the module
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import generate_changelog
 from generate_changelog import extract_username_from_email, extract_username, format_entry, clean_commit_message, should_include_entry
 
 
@@ -279,5 +285,39 @@ class TestFormatEntry(unittest.TestCase):
         self.assertNotIn("(123456)", result)  # SHA should NOT appear unless (AIRBNB) was present
 
 
+class TestSinceLastRelease(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = Path(self.tmp.name).resolve()
+        self.git("init", "-q")
+        self.git("commit", "-q", "--allow-empty", "-m", "first")
+        for tag in ("v0.9.0", "v0.10.0", "vnext", "v0.11", "release-0.10.5"):
+            self.git("tag", tag)
+        patcher = mock.patch.object(generate_changelog, "toplevel", return_value=self.repo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def git(self, *args):
+        subprocess.run(
+            ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+            cwd=self.repo, check=True, capture_output=True,
+        )
+
+    def test_skips_tags_that_are_not_versions(self):
+        (self.repo / "VERSION").write_text("0.11.0-SNAPSHOT\n")
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(generate_changelog.find_last_release(), "v0.10.0")
+
+    def test_invalid_version_file_is_an_error(self):
+        (self.repo / "VERSION").write_text("next\n")
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(generate_changelog.main(["--since-last-release"]), 1)
+        self.assertIn("VERSION is not a semantic version: 'next'", stderr.getvalue())
+
+
 if __name__ == '__main__':
     unittest.main()
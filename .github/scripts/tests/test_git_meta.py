@@ -0,0 +1,84 @@
+import os
+import subprocess
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from git_meta import GitCli, GitMeta, repository
+
+
+def git(cwd, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+
+class TestGitMeta(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.repo = self.root / "repo"
+        git(self.root, "init", "-q", "-b", "main", str(self.repo))
+        (self.repo / "sub").mkdir()
+        (self.repo / "sub" / "file.txt").write_text("one\n")
+        git(self.repo, "add", ".")
+        git(self.repo, "commit", "-q", "-m", "first")
+        git(self.repo, "tag", "v0.1.0")
+        git(self.repo, "tag", "-a", "v0.2.0", "-m", "annotated")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def meta(self, path):
+        return GitMeta.from_dot_git(Path(path) / ".git")
+
+    def test_branch_head_and_toplevel(self):
+        meta = repository(self.repo / "sub")
+        self.assertIsInstance(meta, GitMeta)
+        self.assertEqual(meta.current_branch, "main")
+        self.assertEqual(meta.head_commit, git(self.repo, "rev-parse", "HEAD"))
+        self.assertEqual(meta.toplevel, self.repo.resolve())
+
+    def test_detached_head(self):
+        git(self.repo, "checkout", "-q", "--detach")
+        meta = self.meta(self.repo)
+        self.assertEqual(meta.current_branch, "HEAD")
+        self.assertEqual(meta.head_commit, git(self.repo, "rev-parse", "HEAD"))
+
+    def test_tags_match_show_ref_loose_and_packed(self):
+        expected = {
+            line.split(" ")[1][len("refs/tags/"):]: line.split(" ")[0]
+            for line in git(self.repo, "show-ref", "--tags").splitlines()
+        }
+        self.assertEqual(self.meta(self.repo).tags(), expected)
+        git(self.repo, "pack-refs", "--all")
+        packed = self.meta(self.repo)
+        self.assertEqual(packed.tags(), expected)
+        self.assertEqual(packed.head_commit, git(self.repo, "rev-parse", "HEAD"))
+
+    def test_linked_worktree(self):
+        worktree = self.root / "worktree"
+        git(self.repo, "worktree", "add", "-q", "-b", "release/v0.2.0", str(worktree))
+        meta = self.meta(worktree)
+        self.assertEqual(meta.current_branch, "release/v0.2.0")
+        self.assertEqual(meta.head_commit, git(self.repo, "rev-parse", "HEAD"))
+        self.assertEqual(set(meta.tags()), {"v0.1.0", "v0.2.0"})
+
+    def test_git_dir_override_falls_back_to_cli(self):
+        with mock.patch.dict(os.environ, {"GIT_DIR": str(self.repo / ".git")}):
+            meta = repository(self.repo)
+            self.assertIsInstance(meta, GitCli)
+            self.assertEqual(meta.current_branch, "main")
+            self.assertEqual(set(meta.tags()), {"v0.1.0", "v0.2.0"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,261 @@
+import unittest
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import run_locks
+from gradle_runner import (
+    CONFIGURATION_CACHE_ENV,
+    OFFLINE_ENV,
+    PREFETCH_TASK,
+    GradleDaemonPool,
+    GradleRunner,
+    capped_jvmargs,
+    configuration_cache_outcome,
+    configuration_cache_summary,
+    incompatible_task_selections,
+    prefetch_dependencies,
+    stable_init_script,
+    wrapper_distribution,
+)
+
+# Records its arguments (one per line) and the Gradle user home it was given
+FAKE_GRADLEW = """#!/bin/sh
+printf '%s\\n' "$@" > gradlew.args
+"""
+
+
+class TestGradleRunner(unittest.TestCase):
+    def test_default_command(self):
+        self.assertEqual(
+            GradleRunner().command(["build"]), ["./gradlew", "build", "--no-daemon", "--configuration-cache"]
+        )
+
+    def test_offline_with_user_home_and_init_script(self):
+        runner = GradleRunner("/tmp/home", offline=True, init_scripts=["/tmp/init.gradle"])
+        self.assertEqual(
+            runner.command(["build"]),
+            [
+                "./gradlew", "build", "--no-daemon", "--configuration-cache", "--offline",
+                "--gradle-user-home", "/tmp/home", "--init-script", "/tmp/init.gradle",
+            ],
+        )
+
+    def test_environment_round_trip(self):
+        runner = GradleRunner("/tmp/home", offline=True)
+        env = runner.environment()
+        self.assertEqual(env, {"GRADLE_USER_HOME": "/tmp/home", OFFLINE_ENV: "true"})
+        restored = GradleRunner.from_environment(env)
+        self.assertEqual(restored.command(["build"]), runner.command(["build"]))
+
+    def test_build_cache_and_init_scripts_round_trip(self):
+        runner = GradleRunner(build_cache=True, init_scripts=["/tmp/a.gradle", "/tmp/b.gradle"])
+        self.assertIn("--build-cache", runner.command(["build"]))
+        restored = GradleRunner.from_environment(runner.environment())
+        self.assertEqual(restored.command(["build"]), runner.command(["build"]))
+
+    def test_from_empty_environment(self):
+        runner = GradleRunner.from_environment({})
+        self.assertIsNone(runner.gradle_user_home)
+        self.assertFalse(runner.offline)
+        self.assertFalse(runner.daemon)
+
+    def test_daemon_command_caps_heap(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "gradle.properties").write_text("org.gradle.jvmargs=-Xmx8g -Dfile.encoding=UTF-8\n")
+            cmd = GradleRunner(daemon=True, daemon_max_heap="1g").command(["build"], project_dir=tmp)
+        self.assertIn("--daemon", cmd)
+        self.assertNotIn("--no-daemon", cmd)
+        self.assertIn("-Dorg.gradle.jvmargs=-Dfile.encoding=UTF-8 -Xmx1g", cmd)
+
+    def test_daemon_environment_round_trip(self):
+        runner = GradleRunner(daemon=True, daemon_max_heap="1g")
+        restored = GradleRunner.from_environment(runner.environment())
+        self.assertTrue(restored.daemon)
+        self.assertEqual(restored.daemon_max_heap, "1g")
+
+    def test_capped_jvmargs_without_properties(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(capped_jvmargs(tmp, "2g"), "-Xmx2g")
+
+
+# Fails on configuration cache problems whenever the cache is requested
+INCOMPATIBLE_GRADLEW = """#!/bin/sh
+printf '%s\\n' "$@" >> gradlew.args
+for arg in "$@"; do
+    if [ "$arg" = "--configuration-cache" ]; then
+        echo "Configuration cache problems found in this build." >&2
+        exit 1
+    fi
+done
+echo "BUILD SUCCESSFUL"
+"""
+
+
+class TestConfigurationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.project = Path(self.tmp.name) / "app"
+        self.project.mkdir()
+        workspace = Path(self.tmp.name) / "workspace"
+        workspace.mkdir()
+        run_locks.run_workspace.cache_clear()
+        self.addCleanup(run_locks.run_workspace.cache_clear)
+        patcher = mock.patch.dict(os.environ, {run_locks.RUN_WORKSPACE_ENV: str(workspace)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_incompatible_tasks_run_without_the_cache(self):
+        self.assertIn("--no-configuration-cache", GradleRunner().command([PREFETCH_TASK, "--quiet"]))
+        self.assertIn("--no-configuration-cache", GradleRunner().command([":tools:runCopybara"]))
+
+    def test_disabled_leaves_the_build_setting_alone(self):
+        runner = GradleRunner.from_environment({CONFIGURATION_CACHE_ENV: "false"})
+        self.assertEqual(runner.command(["build"]), ["./gradlew", "build", "--no-daemon"])
+        self.assertEqual(runner.environment(), {CONFIGURATION_CACHE_ENV: "false"})
+
+    def test_falls_back_and_remembers_incompatible_tasks(self):
+        (self.project / "gradlew").write_text(INCOMPATIBLE_GRADLEW)
+        (self.project / "gradlew").chmod(0o755)
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            result = GradleRunner().run(["build"], cwd=self.project)
+            self.assertEqual(result.returncode, 0)
+            self.assertEqual(incompatible_task_selections(self.project), {"build"})
+            # The next run goes straight to the uncached build
+            GradleRunner().run(["build"], cwd=self.project)
+        flags = [arg for arg in (self.project / "gradlew.args").read_text().split() if "configuration-cache" in arg]
+        self.assertEqual(flags, ["--configuration-cache", "--no-configuration-cache", "--no-configuration-cache"])
+        self.assertIn("not compatible with the configuration cache", stdout.getvalue())
+        self.assertEqual(configuration_cache_summary().split(" (")[0], "1 fallback")
+        self.assertIn("1 off", configuration_cache_summary())
+
+    def test_echoed_builds_fall_back_too(self):
+        (self.project / "gradlew").write_text(INCOMPATIBLE_GRADLEW)
+        (self.project / "gradlew").chmod(0o755)
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(io.StringIO()):
+            result = GradleRunner().run(["publishToMavenCentral"], cwd=self.project, echo=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(incompatible_task_selections(self.project), {"publishToMavenCentral"})
+        self.assertIn("BUILD SUCCESSFUL", stdout.getvalue())
+        self.assertIn("configuration cache fallback", stdout.getvalue())
+
+    def test_outcome(self):
+        self.assertEqual(configuration_cache_outcome("Reusing configuration cache.\nBUILD SUCCESSFUL"), "hit")
+        self.assertEqual(
+            configuration_cache_outcome(
+                "Calculating task graph as no cached configuration is available for tasks: build\n"
+                "Configuration cache entry stored.\n"
+            ),
+            "miss",
+        )
+        self.assertEqual(
+            configuration_cache_outcome("Calculating task graph as ...\nConfiguration cache entry discarded"),
+            "discarded",
+        )
+        self.assertEqual(configuration_cache_outcome(""), "unknown")
+
+    def test_stable_init_script(self):
+        first = stable_init_script("cache.gradle", "a", self.tmp.name)
+        self.assertEqual(stable_init_script("cache.gradle", "a", self.tmp.name), first)
+        self.assertNotEqual(stable_init_script("cache.gradle", "b", self.tmp.name), first)
+        self.assertEqual(first.read_text(), "a")
+        self.assertEqual(first.suffix, ".gradle")
+
+
+class TestGradleDaemonPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.apps = []
+        for name, gradle_version in [("starwars", "9.1.0"), ("cli-starter", "9.1.0"), ("root", "8.11")]:
+            app = self.root / name
+            (app / "gradle" / "wrapper").mkdir(parents=True)
+            (app / "gradle" / "wrapper" / "gradle-wrapper.properties").write_text(
+                f"distributionUrl=https\\://services.gradle.org/distributions/gradle-{gradle_version}-bin.zip\n"
+            )
+            (app / "gradlew").write_text(FAKE_GRADLEW)
+            (app / "gradlew").chmod(0o755)
+            self.apps.append(app)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_wrapper_distribution(self):
+        self.assertEqual(
+            wrapper_distribution(self.apps[2]),
+            "https://services.gradle.org/distributions/gradle-8.11-bin.zip",
+        )
+
+    def test_one_daemon_per_gradle_distribution(self):
+        pool = GradleDaemonPool(GradleRunner(daemon=True)).start(self.apps)
+        self.assertEqual(sorted(pool.daemons.values()), sorted([self.apps[0], self.apps[2]]))
+        self.assertFalse((self.apps[1] / "gradlew.args").exists())
+        self.assertIn("--daemon", (self.apps[0] / "gradlew.args").read_text().splitlines())
+
+        pool.stop()
+        self.assertEqual((self.apps[2] / "gradlew.args").read_text().splitlines(), ["--stop"])
+        self.assertEqual(pool.daemons, {})
+
+
+class TestPrefetchDependencies(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.apps = []
+        for name in ["starwars", "cli-starter"]:
+            app = self.root / name
+            app.mkdir()
+            (app / "gradlew").write_text(FAKE_GRADLEW)
+            (app / "gradlew").chmod(0o755)
+            self.apps.append(app)
+        self.workspace = self.root / "workspace"
+        self.workspace.mkdir()
+        run_locks.run_workspace.cache_clear()
+        self.addCleanup(run_locks.run_workspace.cache_clear)
+        patcher = mock.patch.dict(os.environ, {run_locks.RUN_WORKSPACE_ENV: str(self.workspace)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_prefetches_each_build_into_shared_home(self):
+        home = self.root / "home"
+        (home / "init.d").mkdir(parents=True)
+        (home / "init.d" / "user.gradle").write_text("// the user's own\n")
+        runner, failed = prefetch_dependencies(self.apps, home, repository="file:///tmp/m2")
+        self.assertEqual(failed, [])
+        for app in self.apps:
+            args = (app / "gradlew.args").read_text().splitlines()
+            self.assertEqual(args[0], PREFETCH_TASK)
+            self.assertIn(str(home), args)
+            self.assertEqual(args.count("--init-script"), 2)
+        self.assertTrue(runner.offline)
+        self.assertEqual(runner.gradle_user_home, home)
+        # Only this run's builds are pointed at the repository, not every build sharing the home
+        self.assertEqual(sorted(p.name for p in (home / "init.d").iterdir()), ["user.gradle"])
+        [repository_script] = runner.init_scripts
+        self.assertEqual(repository_script.parent, self.workspace)
+        self.assertIn("file:///tmp/m2", repository_script.read_text())
+        self.assertIn(str(repository_script), runner.command(["build"], self.apps[0]))
+        self.assertIn(str(repository_script), runner.environment()["VIADUCT_GRADLE_INIT_SCRIPTS"])
+
+    def test_reports_failed_builds(self):
+        (self.apps[1] / "gradlew").write_text("#!/bin/sh\nexit 1\n")
+        _, failed = prefetch_dependencies(self.apps, self.root / "home")
+        self.assertEqual(failed, [self.apps[1]])
+
+
+if __name__ == "__main__":
+    unittest.main()
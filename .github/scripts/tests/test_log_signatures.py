@@ -0,0 +1,117 @@
+import unittest
+import contextlib
+import io
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from log_signatures import TAIL_LINE_LENGTH, format_summary, report_failed_build, root_cause, scan, scan_log
+
+FAILED_BUILD = b"""\
+> Task :compileKotlin
+w: file:///app/src/Schema.kt:4:5 Parameter 'x' is never used
+e: file:///app/src/App.kt:3:1 Unresolved reference: foo
+> Task :compileKotlin FAILED
+
+FAILURE: Build failed with an exception.
+
+* What went wrong:
+Execution failed for task ':compileKotlin'.
+> A failure occurred while executing org.jetbrains.kotlin.compilerRunner.GradleCompilerRunnerWithWorkers
+   > Compilation error. See log for more details
+
+* Try:
+> Run with --stacktrace option to get the stack trace.
+"""
+
+
+class TestLogSignatures(unittest.TestCase):
+    def test_compilation_error(self):
+        findings = scan(FAILED_BUILD)
+        self.assertEqual([f.category for f in findings], ["compilation", "compilation"])
+        first = findings[0]
+        self.assertEqual(first.line, 3)
+        self.assertEqual(first.offset, FAILED_BUILD.index(b"e: "))
+        self.assertEqual(first.text, "e: file:///app/src/App.kt:3:1 Unresolved reference: foo")
+        self.assertTrue(findings[1].text.startswith("Execution failed for task ':compileKotlin'."))
+        self.assertNotIn("Try", findings[1].text)
+
+    def test_out_of_memory_is_the_root_cause(self):
+        log = FAILED_BUILD + b"Exception in thread \"main\" java.lang.OutOfMemoryError: Java heap space\n"
+        cause = root_cause(scan(log))
+        self.assertEqual(cause.category, "out of memory")
+        self.assertIn("Likely root cause (out of memory) at line 15", format_summary(scan(log)))
+
+    def test_dependency_resolution_failure(self):
+        log = (
+            b"* What went wrong:\n"
+            b"Could not resolve all files for configuration ':compileClasspath'.\n"
+            b"   > Could not find com.airbnb.viaduct:runtime:0.99.0.\n"
+        )
+        findings = scan(log)
+        self.assertEqual(len(findings), 1)
+        self.assertEqual(findings[0].category, "dependency resolution")
+        self.assertEqual(findings[0].line, 1)
+
+    def test_version_mismatch(self):
+        log = b"> Task :compileKotlin\ne: Module was compiled with an incompatible version of Kotlin.\n"
+        self.assertEqual(root_cause(scan(log)).category, "version mismatch")
+
+    def test_failed_tests_are_listed(self):
+        log = (
+            b"> Task :test\n"
+            b"com.example.StarWarsTest > queriesHero() FAILED\n"
+            b"    org.opentest4j.AssertionFailedError at StarWarsTest.kt:42\n"
+            b"12 tests completed, 1 failed\n"
+        )
+        findings = scan(log)
+        self.assertEqual(
+            [(f.category, f.line, f.text) for f in findings],
+            [
+                ("test failure", 2, "com.example.StarWarsTest > queriesHero()"),
+                ("test failure", 4, "12 tests completed, 1 failed"),
+            ],
+        )
+
+    def test_clean_log_has_no_findings(self):
+        self.assertEqual(scan(b"> Task :build\n\nBUILD SUCCESSFUL in 3s\n"), [])
+        self.assertEqual(format_summary([]), "No known failure signature found")
+
+    def test_report_failed_build_saves_and_scans_the_log(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = Path(tmp) / "build" / "viaduct-build.log"
+            result = subprocess.CompletedProcess([], 1, FAILED_BUILD.decode(), "")
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                report_failed_build(result, log_path)
+            self.assertEqual(log_path.read_bytes(), FAILED_BUILD)
+            self.assertEqual(scan_log(log_path), scan(FAILED_BUILD))
+            self.assertIn("Likely root cause (compilation) at line 3 (byte ", stdout.getvalue())
+
+    def test_report_prints_only_the_end_of_a_large_log(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = Path(tmp) / "viaduct-build.log"
+            noise = "".join(f"> Task :module{i}:compileKotlin\n" for i in range(100_000))
+            result = subprocess.CompletedProcess([], 1, noise + FAILED_BUILD.decode(), "x" * 10_000 + "\n")
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                report_failed_build(result, log_path)
+            output = stdout.getvalue()
+            self.assertLess(len(output), 10_000)
+            self.assertNotIn(":module0:", output)
+            self.assertIn("x" * TAIL_LINE_LENGTH + " ...", output)
+            self.assertIn(f"full log saved to {log_path}", output)
+            self.assertIn("Likely root cause (compilation)", output)
+
+    def test_empty_log(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "empty.log"
+            path.write_bytes(b"")
+            self.assertEqual(scan_log(path), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
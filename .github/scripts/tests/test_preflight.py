@@ -0,0 +1,132 @@
+import unittest
+import contextlib
+import io
+import socket
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import preflight
+import release
+from demoapps_to_external_push import DemoAppPublisher
+from preflight import PUBLISH_SECRETS, preflight as run_preflight, probe
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=repo, check=True, capture_output=True)
+
+
+def executable(path, content="#!/bin/sh\n"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    path.chmod(0o755)
+
+
+class TestPreflight(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = Path(self.tmp.name) / "repo"
+        for project_dir in (self.repo, self.repo / "demoapps" / "starwars"):
+            executable(project_dir / "gradlew")
+            (project_dir / "gradle" / "wrapper").mkdir(parents=True)
+            (project_dir / "gradle" / "wrapper" / "gradle-wrapper.jar").write_bytes(b"jar")
+        (self.repo / "VERSION").write_text("1.2.3\n")
+        (self.repo / "demoapps" / "starwars" / "gradle.properties").write_text("viaductVersion=1.2.3\n")
+        (self.repo / ".github" / "copybara").mkdir(parents=True)
+        (self.repo / ".github" / "copybara" / "copy.bara.sky").write_text(
+            'core.workflow(name = "airbnb-viaduct-to-starwars")\n'
+        )
+        executable(Path(self.tmp.name) / "jdk" / "bin" / "java")
+        git(self.repo, "init", "-q", "-b", "release/v1.2.3")
+        git(self.repo, "add", ".")
+        git(self.repo, "commit", "-q", "-m", "init")
+
+        self.env = {name: "secret" for name in PUBLISH_SECRETS}
+        self.env["JAVA_HOME"] = str(Path(self.tmp.name) / "jdk")
+        patcher = mock.patch.object(DemoAppPublisher, "detect_ci_environment", staticmethod(lambda: False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_preflight(self, *args, **kwargs):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            problems = run_preflight(*args, repo_root=self.repo, env=self.env, **kwargs)
+        return problems, stdout.getvalue()
+
+    def test_ready_release_passes(self):
+        problems, output = self.run_preflight()
+        self.assertEqual(problems, 0, output)
+        self.assertIn("Preflight passed", output)
+
+    def test_reports_every_problem_together(self):
+        (self.repo / "gradlew").chmod(0o644)
+        (self.repo / ".github" / "copybara" / "copy.bara.sky").unlink()
+        (self.repo / "demoapps" / "starwars" / "gradle.properties").write_text("viaductVersion=1.2.2\n")
+        del self.env["VIADUCT_SONATYPE_PASSWORD"]
+
+        problems, output = self.run_preflight()
+        self.assertEqual(problems, 4, output)
+        self.assertIn("gradlew is not executable", output)
+        self.assertIn("no copybara config at .github/copybara/copy.bara.sky", output)
+        self.assertIn("declares 1.2.2, not 1.2.3", output)
+        self.assertIn("VIADUCT_SONATYPE_PASSWORD is not set", output)
+
+    def test_only_checks_the_selected_steps(self):
+        self.env.clear()
+        problems, output = self.run_preflight(["validate"])
+        self.assertEqual(problems, 1, output)
+        self.assertIn("no java on PATH", output)
+        self.assertNotIn("publish secrets", output)
+
+    def test_wrong_branch_and_detached_head(self):
+        git(self.repo, "checkout", "-q", "--detach")
+        problems, output = self.run_preflight(["changelog"])
+        self.assertEqual(problems, 2, output)
+        self.assertIn("not on a release branch (current: HEAD", output)
+        self.assertIn("HEAD is detached", output)
+
+    def test_shallow_clone_only_matters_to_the_changelog(self):
+        git(self.repo, "commit", "-q", "--allow-empty", "-m", "second")
+        shallow = Path(self.tmp.name) / "shallow"
+        git(self.tmp.name, "clone", "-q", "--depth", "1", self.repo.as_uri(), str(shallow))
+        self.repo = shallow
+
+        problems, output = self.run_preflight(["publish"])
+        self.assertEqual(problems, 0, output)
+        self.assertNotIn("git history", output)
+
+        problems, output = self.run_preflight(["publish", "changelog"])
+        self.assertEqual(problems, 1, output)
+        self.assertIn("shallow clone", output)
+
+    def test_probe(self):
+        with socket.socket() as server:
+            server.bind(("127.0.0.1", 0))
+            server.listen()
+            port = server.getsockname()[1]
+            self.assertEqual(probe(f"http://127.0.0.1:{port}/maven-metadata.xml"), [])
+        self.assertIn("cannot connect to 127.0.0.1", probe(f"http://127.0.0.1:{port}/")[0])
+        self.assertEqual(probe(self.repo.as_uri()), [])
+        self.assertIn("does not exist", probe((self.repo / "missing").as_uri())[0])
+
+    def test_pipeline_does_not_start_when_preflight_fails(self):
+        step = mock.Mock(return_value=0)
+        context = release.ReleaseContext(self.repo)
+        with mock.patch.dict(release.STEP_RUNNERS, {"publish": step}), \
+                mock.patch.object(preflight, "preflight", return_value=2) as checks, \
+                contextlib.redirect_stdout(io.StringIO()):
+            returncode = release.pipeline(["--steps", "publish", "--preflight"], context)
+        self.assertEqual(returncode, 1)
+        checks.assert_called_once_with(["publish"], repo_root=self.repo)
+        step.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
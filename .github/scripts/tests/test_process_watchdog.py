@@ -0,0 +1,116 @@
+import unittest
+import contextlib
+import io
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import process_watchdog
+from process_watchdog import Watchdog, format_process_tree, process_tree
+
+
+def live_group_members(pgid):
+    """Pids of the non-zombie processes in a process group."""
+    members = []
+    for stat_path in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            stat = stat_path.read_text()
+        except OSError:
+            continue
+        # Fields after the parenthesized command: state, ppid, pgrp, ...
+        state, _, pgrp = stat.rsplit(")", 1)[1].split()[:3]
+        if int(pgrp) == pgid and state != "Z":
+            members.append(int(stat_path.parent.name))
+    return members
+
+
+class TestProcessWatchdog(unittest.TestCase):
+    def setUp(self):
+        self.watchdog = Watchdog(idle_timeout=0.6, kill_grace_period=2)
+
+    def test_captures_output_like_subprocess_run(self):
+        result = self.watchdog.run(["sh", "-c", "echo out; echo err >&2; exit 3"], capture_output=True, text=True)
+        self.assertEqual((result.returncode, result.stdout, result.stderr), (3, "out\n", "err\n"))
+        self.assertFalse(result.stalled)
+
+    def test_check_raises(self):
+        with self.assertRaises(subprocess.CalledProcessError):
+            self.watchdog.run("exit 1", shell=True, check=True)
+
+    def test_kills_a_stalled_process_group(self):
+        stderr = io.StringIO()
+        start = time.monotonic()
+        with contextlib.redirect_stderr(stderr):
+            # The background sleep is in the same process group and must die too
+            result = self.watchdog.run(["sh", "-c", "echo waiting for lock; sleep 30 & wait"], capture_output=True)
+        self.assertTrue(result.stalled)
+        self.assertLess(result.returncode, 0)
+        self.assertLess(time.monotonic() - start, 10)
+        report = stderr.getvalue()
+        self.assertIn("no output and no CPU progress", report)
+        self.assertIn("Process tree:", report)
+        self.assertIn("waiting for lock", report)
+
+    @unittest.skipUnless(Path("/proc/self/stat").exists(), "needs /proc")
+    def test_interrupt_kills_the_process_group(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        pid_file = Path(tmp.name) / "group.pid"
+        command = f"echo $$ > {pid_file}; sleep 30 & sleep 30"
+        with mock.patch.object(process_watchdog, "process_tree", side_effect=KeyboardInterrupt), \
+                self.assertRaises(KeyboardInterrupt):
+            self.watchdog.run(["sh", "-c", command], capture_output=True)
+        pgid = int(pid_file.read_text())
+        deadline = time.monotonic() + 5
+        while live_group_members(pgid) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(live_group_members(pgid), [])
+
+    def test_busy_process_without_output_is_not_stalled(self):
+        result = self.watchdog.run([sys.executable, "-c", "import time\nend = time.time() + 2\nwhile time.time() < end: pass"])
+        self.assertFalse(result.stalled)
+        self.assertEqual(result.returncode, 0)
+
+    def test_steady_output_is_not_stalled(self):
+        result = self.watchdog.run(
+            ["sh", "-c", "for i in 1 2 3 4 5; do echo $i; sleep 0.3; done"], capture_output=True, text=True
+        )
+        self.assertFalse(result.stalled)
+        self.assertEqual(result.stdout.split(), ["1", "2", "3", "4", "5"])
+
+    def test_disabled_watchdog_runs_directly(self):
+        result = Watchdog(idle_timeout=0).run(["echo", "hi"], capture_output=True, text=True)
+        self.assertEqual(result.stdout, "hi\n")
+        self.assertFalse(result.stalled)
+
+    def test_echo_passes_captured_output_through(self):
+        for watchdog in (self.watchdog, Watchdog(idle_timeout=0)):
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                result = watchdog.run(["echo", "BUILD SUCCESSFUL"], capture_output=True, text=True, echo=True)
+            self.assertEqual(result.stdout, "BUILD SUCCESSFUL\n")
+            self.assertEqual(stdout.getvalue(), "BUILD SUCCESSFUL\n")
+
+    @unittest.skipUnless(Path("/proc/self/stat").exists(), "needs /proc")
+    def test_process_tree_includes_children(self):
+        process = subprocess.Popen(["sh", "-c", "sleep 5 & wait"])
+        try:
+            time.sleep(0.2)
+            tree = process_tree(process.pid)
+            self.assertEqual(len(tree), 2)
+            self.assertIn("sleep 5", format_process_tree(process.pid))
+        finally:
+            for pid in process_tree(process.pid):
+                os.kill(pid, signal.SIGKILL)
+            process.wait()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import contextlib
+import io
+import os
+import subprocess
+import unittest
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+SCRIPTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import release
+from version_index import VersionIndex
+
+
+class TestReleaseCli(unittest.TestCase):
+    def test_help_imports_no_command_module(self):
+        result = subprocess.run(
+            [sys.executable, "-c", "import sys, release; release.main(['--help']); "
+             "print(sorted(m for m, _ in release.COMMANDS.values() if m in sys.modules))"],
+            cwd=SCRIPTS_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.splitlines()[-1], "[]")
+
+    def test_unknown_command(self):
+        self.assertEqual(release.main(["nope"]), 1)
+
+    def test_dispatches_argv_to_module_main(self):
+        with mock.patch("tag_catalog.main", return_value=0) as tags_main:
+            self.assertEqual(release.main(["tags", "--list"]), 0)
+        tags_main.assert_called_once_with(["--list"])
+
+
+class TestPipeline(unittest.TestCase):
+    def context(self, version="0.7.0"):
+        return SimpleNamespace(
+            branch=f"release/v{version}" if version else "main",
+            release_version=version,
+            index=VersionIndex(SCRIPTS_DIR, []),
+            demo_apps=[("starwars", "viaduct-graphql/starwars")],
+        )
+
+    def test_runs_steps_in_order_and_stops_on_failure(self):
+        calls = []
+        runners = {
+            "validate": lambda ctx, opts: calls.append("validate") or 0,
+            "publish": lambda ctx, opts: calls.append("publish") or 3,
+            "sync": lambda ctx, opts: calls.append("sync") or 0,
+        }
+        with mock.patch.dict(release.STEP_RUNNERS, runners):
+            returncode = release.pipeline(["--steps", "validate,publish,sync"], self.context())
+        self.assertEqual(returncode, 3)
+        self.assertEqual(calls, ["validate", "publish"])
+
+    def test_steps_do_not_leak_environment_or_working_directory(self):
+        seen = {}
+
+        def publish(ctx, opts):
+            os.environ["ORG_GRADLE_PROJECT_mavenCentralPassword"] = "secret"
+            os.chdir(SCRIPTS_DIR.parent)
+            return 0
+
+        def sync(ctx, opts):
+            seen["password"] = os.environ.get("ORG_GRADLE_PROJECT_mavenCentralPassword")
+            seen["cwd"] = os.getcwd()
+            return 0
+
+        cwd = os.getcwd()
+        self.addCleanup(os.chdir, cwd)
+        with mock.patch.dict(release.STEP_RUNNERS, {"publish": publish, "sync": sync}), \
+                mock.patch.dict(os.environ), \
+                contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(release.pipeline(["--steps", "publish,sync"], self.context()), 0)
+        self.assertEqual(seen, {"password": None, "cwd": cwd})
+
+    def test_requires_release_branch(self):
+        with mock.patch.dict(release.STEP_RUNNERS, {"validate": mock.Mock(return_value=0)}):
+            self.assertEqual(release.pipeline(["--steps", "validate"], self.context(version=None)), 1)
+            release.STEP_RUNNERS["validate"].assert_not_called()
+
+    def test_rejects_unknown_steps(self):
+        with self.assertRaises(SystemExit):
+            release.pipeline(["--steps", "validate,deploy"], self.context())
+
+
+if __name__ == "__main__":
+    unittest.main()
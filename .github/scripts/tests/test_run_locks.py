@@ -0,0 +1,137 @@
+import unittest
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import run_locks
+from build_cache_server import start_shared_build_cache
+from run_locks import (
+    REPO_ROOT,
+    RUN_WORKSPACE_ENV,
+    LockTimeout,
+    ResourceLock,
+    lock_name,
+    project_lock_name,
+    resource_lock,
+    run_workspace,
+)
+
+HOLD_LOCK = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from run_locks import ResourceLock
+lock = ResourceLock("shared-thing", directory=sys.argv[2]).acquire()
+print("locked", flush=True)
+time.sleep(float(sys.argv[3]))
+"""
+
+
+class TestRunLocks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        patcher = mock.patch.dict(os.environ, {run_locks.LOCKS_DIR_ENV: str(self.dir / "locks")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def hold_in_other_process(self, seconds):
+        process = subprocess.Popen(
+            [sys.executable, "-c", HOLD_LOCK, str(Path(run_locks.__file__).parent), str(self.dir / "locks"), str(seconds)],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.addCleanup(process.stdout.close)
+        self.addCleanup(process.wait)
+        self.assertEqual(process.stdout.readline().strip(), "locked")
+        return process
+
+    def test_lock_names(self):
+        self.assertEqual(lock_name("copybara", "viaduct-graphql/starwars"), "copybara-viaduct-graphql_starwars")
+        self.assertEqual(project_lock_name(REPO_ROOT / "demoapps" / "starwars"), "project-demoapps_starwars")
+        self.assertEqual(project_lock_name(REPO_ROOT), "project-root")
+
+    def test_exclusive_lock_excludes_other_holders(self):
+        first = ResourceLock("thing")
+        second = ResourceLock("thing")
+        self.assertTrue(first.try_acquire())
+        self.assertFalse(second.try_acquire())
+        self.assertIn(f"pid {os.getpid()}", second.holder())
+        first.release()
+        self.assertTrue(second.try_acquire())
+        second.release()
+
+    def test_shared_locks_coexist(self):
+        readers = [ResourceLock("thing", shared=True) for _ in range(2)]
+        self.assertTrue(all(lock.try_acquire() for lock in readers))
+        self.assertFalse(ResourceLock("thing").try_acquire())
+        for lock in readers:
+            lock.release()
+
+    def test_waits_for_a_lock_held_by_another_process(self):
+        self.hold_in_other_process(0.5)
+        start = time.monotonic()
+        with resource_lock("shared-thing"):
+            self.assertGreater(time.monotonic() - start, 0.2)
+
+    def test_times_out(self):
+        process = self.hold_in_other_process(10)
+        with self.assertRaises(LockTimeout) as error:
+            with resource_lock("shared-thing", timeout=0.3):
+                pass
+        self.assertIn(f"pid {process.pid}", str(error.exception))
+        process.kill()
+
+    def test_lock_is_released_when_its_holder_dies(self):
+        process = self.hold_in_other_process(30)
+        process.kill()
+        process.wait()
+        with resource_lock("shared-thing", timeout=1):
+            pass
+
+    def test_run_workspace_is_inherited(self):
+        run_workspace.cache_clear()
+        self.addCleanup(run_workspace.cache_clear)
+        inherited = self.dir / "parent-run"
+        inherited.mkdir()
+        with mock.patch.dict(os.environ, {RUN_WORKSPACE_ENV: str(inherited)}):
+            self.assertEqual(run_workspace(), inherited)
+
+    def test_run_workspace_is_created_once_per_process(self):
+        run_workspace.cache_clear()
+        self.addCleanup(run_workspace.cache_clear)
+        with mock.patch.dict(os.environ, {RUN_WORKSPACE_ENV: ""}):
+            workspace = run_workspace()
+            self.assertTrue(workspace.is_dir())
+            self.assertEqual(os.environ[RUN_WORKSPACE_ENV], str(workspace))
+            self.assertEqual(run_workspace(), workspace)
+        workspace.rmdir()
+
+    def test_second_build_cache_server_uses_its_own_directory(self):
+        run_workspace.cache_clear()
+        self.addCleanup(run_workspace.cache_clear)
+        with mock.patch.dict(os.environ, {RUN_WORKSPACE_ENV: ""}):
+            first = start_shared_build_cache(self.dir)
+            try:
+                second = start_shared_build_cache(self.dir)
+                second.stop()
+            finally:
+                first.stop()
+            self.assertEqual(first.store.directory, self.dir / "build" / "demoapps-build-cache")
+            self.assertEqual(second.store.directory, run_workspace() / "build-cache")
+            # Released when the first server stopped
+            lock = ResourceLock("build-cache")
+            self.assertTrue(lock.try_acquire())
+            lock.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
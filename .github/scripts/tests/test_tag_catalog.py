@@ -0,0 +1,85 @@
+import contextlib
+import io
+import subprocess
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tag_catalog import TagCatalog, Version, main, parse_version
+
+TAGS = [
+    "v0.9.0", "v0.10.0", "v0.10.1", "v1.0.0-rc.1", "v1.0.0-rc.2", "v1.0.0-rc.10",
+    "v1.0.0-SNAPSHOT", "v1.0.0", "v1.1.0-alpha", "not-a-version", "release-1.2.0",
+]
+
+
+class TestParseVersion(unittest.TestCase):
+    def test_parses_prerelease_and_build(self):
+        self.assertEqual(parse_version("v1.2.3-rc.1+build.5"), Version(1, 2, 3, ("rc", "1")))
+        self.assertEqual(str(parse_version("0.15.0-SNAPSHOT")), "0.15.0-SNAPSHOT")
+        self.assertIsNone(parse_version("v1.2"))
+        self.assertIsNone(parse_version("v1.2.3.4"))
+        self.assertIsNone(parse_version("v1.\u0662.3"))
+
+    def test_semver_precedence(self):
+        ordered = ["1.0.0-alpha", "1.0.0-alpha.1", "1.0.0-alpha.beta", "1.0.0-beta.2", "1.0.0-beta.11", "1.0.0"]
+        keys = [parse_version(v).sort_key() for v in ordered]
+        self.assertEqual(keys, sorted(keys))
+
+
+class TestTagCatalog(unittest.TestCase):
+    def setUp(self):
+        self.catalog = TagCatalog({tag: "0" * 40 for tag in TAGS})
+
+    def test_releases_sorted_by_version(self):
+        self.assertEqual(self.catalog.tags(), ["v0.9.0", "v0.10.0", "v0.10.1", "v1.0.0"])
+        self.assertEqual(
+            self.catalog.tags(include_prereleases=True),
+            ["v0.9.0", "v0.10.0", "v0.10.1", "v1.0.0-rc.1", "v1.0.0-rc.2", "v1.0.0-rc.10", "v1.0.0", "v1.1.0-alpha"],
+        )
+
+    def test_previous_release(self):
+        self.assertEqual(self.catalog.previous_release(), "v1.0.0")
+        self.assertEqual(self.catalog.previous_release("1.0.0"), "v0.10.1")
+        self.assertEqual(self.catalog.previous_release("1.0.0-SNAPSHOT"), "v0.10.1")
+        self.assertEqual(self.catalog.previous_release("1.1.0-SNAPSHOT"), "v1.0.0")
+        self.assertIsNone(self.catalog.previous_release("0.9.0"))
+
+    def test_previous_release_with_prereleases(self):
+        self.assertEqual(self.catalog.previous_release("1.0.0", include_prereleases=True), "v1.0.0-rc.10")
+
+    def test_rejects_invalid_bound(self):
+        with self.assertRaises(ValueError):
+            self.catalog.previous_release("latest")
+
+    def test_from_repository(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            def git(*args):
+                subprocess.run(
+                    ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+                    cwd=tmp, check=True, capture_output=True,
+                )
+            git("init", "-q")
+            git("commit", "-q", "--allow-empty", "-m", "first")
+            git("tag", "v0.2.0")
+            git("tag", "v0.10.0")
+            git("tag", "vnext")
+            git("tag", "v0.12")
+            git("pack-refs", "--all")
+            git("tag", "-a", "v0.11.0", "-m", "loose annotated")
+            catalog = TagCatalog.from_repository(tmp)
+            self.assertEqual(catalog.tags(), ["v0.2.0", "v0.10.0", "v0.11.0"])
+            self.assertEqual(catalog.previous_release("0.12.0"), "v0.11.0")
+
+    def test_main_reports_invalid_bound(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(main(["--before", "latest"]), 1)
+        self.assertIn("Not a semantic version: latest", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from gradle_runner import GradleRunner
+from task_timings import TaskTiming, format_table, load_report, parse_timings, run_timed_build, write_report
+
+# Writes the timings the init script would have recorded, and its arguments
+FAKE_GRADLEW = """#!/bin/sh
+printf '%s\\n' "$@" > gradlew.args
+mkdir -p build
+printf ':compileKotlin\\t4200\\tEXECUTED\\n:test\\t9100\\tEXECUTED\\n:jar\\t10\\tUP-TO-DATE\\n' > build/viaduct-task-timings.tsv
+"""
+
+
+class TestTaskTimings(unittest.TestCase):
+    def test_parse_ignores_malformed_lines(self):
+        timings = parse_timings(":a\t100\tEXECUTED\nnoise\n:b\tx\tEXECUTED\n:c\t0\tUP-TO-DATE\n")
+        self.assertEqual(timings, [TaskTiming(":a", 100, "EXECUTED"), TaskTiming(":c", 0, "UP-TO-DATE")])
+
+    def test_table_highlights_slowest_first(self):
+        timings = [TaskTiming(":fast", 100, "EXECUTED"), TaskTiming(":slow", 5000, "EXECUTED")]
+        lines = format_table(timings, top=1).splitlines()
+        self.assertTrue(lines[1].startswith("🐢 :slow"))
+        self.assertFalse(lines[2].startswith("🐢"))
+        self.assertIn("2 tasks, 5.1s total task time", lines[-1])
+
+    def test_table_compares_with_previous(self):
+        previous = [TaskTiming(":test", 9000, "EXECUTED"), TaskTiming(":old", 100, "EXECUTED")]
+        timings = [TaskTiming(":test", 7500, "EXECUTED"), TaskTiming(":codegen", 300, "EXECUTED")]
+        table = format_table(timings, previous)
+        self.assertIn("-1.5s", table)
+        self.assertIn("new", table)
+        self.assertIn("no longer run: :old", table)
+
+    def test_write_report_keeps_previous(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            write_report("starwars", [TaskTiming(":test", 1000, "EXECUTED")], tmp)
+            table = write_report("starwars", [TaskTiming(":test", 3000, "EXECUTED")], tmp)
+            self.assertIn("+2.0s", table)
+            self.assertEqual(load_report(Path(tmp) / "starwars.previous.json"), [TaskTiming(":test", 1000, "EXECUTED")])
+            self.assertEqual((Path(tmp) / "starwars.txt").read_text(), table + "\n")
+
+    def test_run_timed_build_writes_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = Path(tmp) / "starwars"
+            app.mkdir()
+            (app / "gradlew").write_text(FAKE_GRADLEW)
+            (app / "gradlew").chmod(0o755)
+            reports = Path(tmp) / "reports"
+
+            runner = GradleRunner()
+            result = run_timed_build(runner, ["build"], app, report_dir=reports)
+
+            self.assertEqual(result.returncode, 0)
+            self.assertIn(str(reports / "task-timings.gradle"), (app / "gradlew.args").read_text().splitlines())
+            self.assertEqual(runner.init_scripts, [])
+            self.assertEqual(len(load_report(reports / "starwars.json")), 3)
+
+    def test_run_without_report_dir_is_plain_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "gradlew").write_text(FAKE_GRADLEW)
+            (Path(tmp) / "gradlew").chmod(0o755)
+            run_timed_build(GradleRunner(), ["build"], tmp, env={})
+            self.assertNotIn("--init-script", (Path(tmp) / "gradlew.args").read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
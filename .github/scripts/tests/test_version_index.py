@@ -0,0 +1,78 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from version_index import build_index, extract_version_from_branch
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+class TestBuildIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        write(self.root / "VERSION", "1.2.0\n")
+        write(self.root / "demoapps" / "starwars" / "gradle.properties", "viaductVersion=1.2.0\n")
+        write(self.root / "demoapps" / "cli-starter" / "gradle.properties", "foo=bar\nviaductVersion=1.1.0\n")
+        write(
+            self.root / "demoapps" / "cli-starter" / "gradle" / "libs.versions.toml",
+            '[versions]\nkotlin = "2.2.21"\nviaduct = "1.2.0"\n\n[plugins]\nviaduct = "9.9.9"\n',
+        )
+        write(
+            self.root / "settings.gradle.kts",
+            'plugins {\n    id("com.airbnb.viaduct.module-gradle-plugin") version "1.0.0"\n    id("other") version "3"\n}\n',
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_indexes_all_version_bearing_files(self):
+        index = build_index(self.root)
+        kinds = sorted(loc.kind for loc in index.locations)
+        self.assertEqual(
+            kinds, ["VERSION", "gradle.properties", "gradle.properties", "libs.versions.toml", "settings.gradle.kts"]
+        )
+
+    def test_records_line_and_column_span(self):
+        index = build_index(self.root)
+        props = self.root / "demoapps" / "cli-starter" / "gradle.properties"
+        [loc] = index.for_path(props)
+        self.assertEqual(loc.line, 2)
+        line = props.read_text().splitlines()[loc.line - 1]
+        self.assertEqual(line[loc.start:loc.end], "1.1.0")
+
+    def test_toml_only_reads_versions_table(self):
+        index = build_index(self.root)
+        toml = self.root / "demoapps" / "cli-starter" / "gradle" / "libs.versions.toml"
+        self.assertEqual([loc.value for loc in index.for_path(toml)], ["1.2.0"])
+
+    def test_reports_every_mismatch(self):
+        index = build_index(self.root)
+        mismatches = index.mismatches("1.2.0")
+        self.assertEqual(sorted(loc.value for loc in mismatches), ["1.0.0", "1.1.0"])
+
+    def test_under_limits_to_directory(self):
+        index = build_index(self.root)
+        values = [loc.value for loc in index.under(self.root / "demoapps" / "starwars")]
+        self.assertEqual(values, ["1.2.0"])
+
+    def test_version_file(self):
+        self.assertEqual(build_index(self.root).version_file().value, "1.2.0")
+
+
+class TestExtractVersionFromBranch(unittest.TestCase):
+    def test_release_branch(self):
+        self.assertEqual(extract_version_from_branch("release/v0.7.0"), "0.7.0")
+
+    def test_not_release_branch(self):
+        self.assertIsNone(extract_version_from_branch("main"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from version_index import build_index
+from version_rewrite import render_diff, rewrite_versions
+
+
+class TestRewriteVersions(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / "VERSION").write_text("1.0.0-SNAPSHOT\n")
+        self.props = self.root / "demoapps" / "starwars" / "gradle.properties"
+        self.props.parent.mkdir(parents=True)
+        self.props.write_text("# comment\nviaductVersion=1.0.0-SNAPSHOT\nother=1\n")
+        self.props.chmod(0o644)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_rewrites_all_declarations(self):
+        plan = rewrite_versions(self.root, "1.1.0")
+        self.assertEqual(len(plan), 2)
+        self.assertEqual((self.root / "VERSION").read_text(), "1.1.0\n")
+        self.assertEqual(self.props.read_text(), "# comment\nviaductVersion=1.1.0\nother=1\n")
+        self.assertEqual(build_index(self.root).mismatches("1.1.0"), [])
+
+    def test_dry_run_does_not_write(self):
+        plan = rewrite_versions(self.root, "1.1.0", dry_run=True)
+        self.assertEqual((self.root / "VERSION").read_text(), "1.0.0-SNAPSHOT\n")
+        diff = render_diff(plan, self.root)
+        self.assertIn("-viaductVersion=1.0.0-SNAPSHOT", diff)
+        self.assertIn("+viaductVersion=1.1.0", diff)
+        self.assertIn("b/VERSION", diff)
+
+    def test_limits_to_given_locations(self):
+        locations = build_index(self.root).for_path(self.props)
+        rewrite_versions(self.root, "2.0.0", locations)
+        self.assertEqual((self.root / "VERSION").read_text(), "1.0.0-SNAPSHOT\n")
+        self.assertIn("viaductVersion=2.0.0", self.props.read_text())
+
+    def test_unchanged_files_are_not_planned(self):
+        self.assertEqual(rewrite_versions(self.root, "1.0.0-SNAPSHOT"), {})
+
+    def test_preserves_mode_and_leaves_no_temp_files(self):
+        rewrite_versions(self.root, "1.1.0")
+        self.assertEqual(self.props.stat().st_mode & 0o777, 0o644)
+        self.assertEqual([p.name for p in self.props.parent.iterdir()], ["gradle.properties"])
+
+
+if __name__ == "__main__":
+    unittest.main()
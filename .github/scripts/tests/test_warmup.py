@@ -0,0 +1,141 @@
+import unittest
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import preflight
+import release
+import run_locks
+from gradle_runner import GradleRunner
+from run_locks import ResourceLock, project_lock_name
+from warmup import WarmupPool, plan_warmups, warmup_projects
+
+# Records its arguments, then takes as long as $WARMUP_SECONDS
+SLOW_GRADLEW = """#!/bin/sh
+printf '%s\\n' "$@" > gradlew.args
+sleep "${WARMUP_SECONDS:-0}"
+echo done > gradlew.done
+"""
+
+DEMO_APPS = [("starwars", "viaduct-graphql/starwars"), ("cli-starter", "viaduct-graphql/cli-starter")]
+
+
+class TestWarmup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = Path(self.tmp.name).resolve() / "repo"
+        for project_dir in [self.repo] + [self.repo / "demoapps" / name for name, _ in DEMO_APPS]:
+            project_dir.mkdir(parents=True)
+            (project_dir / "gradlew").write_text(SLOW_GRADLEW)
+            (project_dir / "gradlew").chmod(0o755)
+        workspace = Path(self.tmp.name) / "workspace"
+        workspace.mkdir()
+        run_locks.run_workspace.cache_clear()
+        self.addCleanup(run_locks.run_workspace.cache_clear)
+        patcher = mock.patch.dict(
+            os.environ,
+            {
+                run_locks.RUN_WORKSPACE_ENV: str(workspace),
+                run_locks.LOCKS_DIR_ENV: str(Path(self.tmp.name) / "locks"),
+                "WARMUP_SECONDS": "0",
+            },
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def start(self, steps, jobs=2):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return WarmupPool(plan_warmups(steps, self.repo, DEMO_APPS, GradleRunner()), jobs).start()
+
+    def wait_until_running(self, pool):
+        deadline = time.monotonic() + 10
+        while not all(w.status == "running" for w in pool.warmups):
+            self.assertLess(time.monotonic(), deadline, pool.summary())
+            time.sleep(0.05)
+
+    def test_builds_in_the_order_the_steps_use_them(self):
+        starwars, cli_starter = [self.repo / "demoapps" / name for name, _ in DEMO_APPS]
+        self.assertEqual(warmup_projects(["validate", "publish"], self.repo, DEMO_APPS), [starwars, cli_starter, self.repo])
+        self.assertEqual(warmup_projects(["sync", "changelog"], self.repo, DEMO_APPS), [self.repo, starwars, cli_starter])
+        self.assertEqual(warmup_projects(["changelog"], self.repo, DEMO_APPS), [])
+
+    def test_sync_resolves_a_missing_copybara_jar(self):
+        warmups = {w.name: w for w in plan_warmups(["publish", "sync"], self.repo, DEMO_APPS, GradleRunner())}
+        self.assertEqual(list(warmups), ["gradle-root", "gradle-starwars", "gradle-cli-starter"])
+        self.assertEqual(warmups["gradle-root"].args[1], ":tools:downloadCopybara")
+        self.assertIn("--no-configuration-cache", warmups["gradle-root"].args)
+        self.assertEqual(warmups["gradle-starwars"].args[1:3], ["help", "--quiet"])
+
+        jar = self.repo / "tools" / "copybara" / "copybara_deploy.jar"
+        jar.parent.mkdir(parents=True)
+        jar.write_bytes(b"jar")
+        root = plan_warmups(["sync"], self.repo, DEMO_APPS, GradleRunner())[0]
+        self.assertEqual(root.args[1:3], ["help", "--quiet"])
+
+    def test_warm_ups_complete_in_the_background(self):
+        pool = self.start(["validate"])
+        pool.wait()
+        self.assertEqual([w.status for w in pool.warmups], ["done", "done"], pool.summary())
+        self.assertTrue((self.repo / "demoapps" / "starwars" / "gradlew.done").exists())
+        self.assertIn("gradle-starwars done in", pool.summary())
+
+    def test_cancel_kills_running_and_pending_warm_ups(self):
+        os.environ["WARMUP_SECONDS"] = "30"
+        pool = self.start(["validate", "publish"])
+        self.wait_until_running(WarmupPool(pool.warmups[:2]))
+        start = time.monotonic()
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            pool.cancel()
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertIn("Cancelling 3 warm-up(s)", stdout.getvalue())
+        self.assertEqual([w.status for w in pool.warmups], ["cancelled"] * 3, pool.summary())
+        # The root build never started
+        self.assertFalse((self.repo / "gradlew.args").exists())
+        self.assertFalse((self.repo / "demoapps" / "starwars" / "gradlew.done").exists())
+
+    def test_the_build_waits_for_its_warm_up(self):
+        os.environ["WARMUP_SECONDS"] = "1"
+        pool = self.start(["publish"])
+        self.wait_until_running(pool)
+        with contextlib.redirect_stdout(io.StringIO()):
+            with run_locks.project_lock(self.repo):
+                self.assertTrue((self.repo / "gradlew.done").exists())
+        pool.wait()
+        self.assertEqual(pool.warmups[0].status, "done")
+
+    def test_busy_build_is_skipped(self):
+        with ResourceLock(project_lock_name(self.repo)):
+            pool = self.start(["publish"])
+            pool.wait()
+        self.assertEqual(pool.warmups[0].status, "skipped")
+        self.assertFalse((self.repo / "gradlew.args").exists())
+
+    def test_pipeline_cancels_warm_ups_when_preflight_fails(self):
+        os.environ["WARMUP_SECONDS"] = "30"
+        step = mock.Mock(return_value=0)
+        context = release.ReleaseContext(self.repo)
+        context.demo_apps = DEMO_APPS
+        stdout = io.StringIO()
+        with mock.patch.dict(release.STEP_RUNNERS, {"validate": step}), \
+                mock.patch.object(preflight, "preflight", return_value=1), \
+                contextlib.redirect_stdout(stdout):
+            start = time.monotonic()
+            returncode = release.pipeline(["--steps", "validate", "--preflight", "--warmup"], context)
+        self.assertEqual(returncode, 1)
+        self.assertLess(time.monotonic() - start, 10)
+        step.assert_not_called()
+        self.assertIn("Warm-ups: gradle-starwars cancelled", stdout.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
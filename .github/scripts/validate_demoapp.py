@@ -8,32 +8,54 @@ This script validates that:
 3. The demo app builds successfully on its own
 
 Usage:
-  python3 validate_demoapp.py <demoapp-name>
+  python3 validate_demoapp.py <demoapp-name> [--changed-since <git-ref>]
 Example:
   python3 validate_demoapp.py starwars
+  python3 validate_demoapp.py starwars --changed-since origin/main
+
+With --changed-since, the demo app is skipped when none of the paths changed
+since the given ref affect it (see demoapp_impact.py).
+
+With --prefetch, the demo app's dependencies are first resolved into a shared
+Gradle user home (GRADLE_USER_HOME, or build/demoapps-gradle-home) and the
+build then runs --offline against it. --repository replaces every repository
+with the given one (e.g. a local file:// stand-in) while prefetching.
+
+With --build-cache-server, the build pushes to and pulls from a local Gradle
+HTTP build cache under build/demoapps-build-cache that lives for the run.
+
+With --daemon, the builds run on a Gradle daemon with a capped heap instead of
+--no-daemon, and the daemon is stopped at the end (see gradle_runner.py).
+
+With --task-timings, the duration of every task of the build is recorded and
+written as a report into the given directory (see task_timings.py).
 """
 
+import argparse
+import os
 import sys
-import subprocess
 import re
 from pathlib import Path
 
+from build_cache_server import start_shared_build_cache
+from demoapp_impact import affected_demoapps, changed_paths_since
+from git_meta import current_branch
+from gradle_runner import (
+    GradleRunner,
+    configuration_cache_summary,
+    prefetch_dependencies,
+    shared_gradle_user_home,
+    start_daemon_pool,
+)
+from log_signatures import BUILD_LOG, report_failed_build
+from run_locks import project_lock
+from task_timings import TIMINGS_DIR_ENV, run_timed_build
+from version_index import build_index
+
 
 def get_current_branch():
     """Get the current git branch name."""
-    result = subprocess.run(
-        ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-        capture_output=True,
-        text=True,
-        check=True,
-    )
-    return result.stdout.strip()
-
-
-def read_version_file():
-    script_dir = Path(__file__).parent.resolve()
-    version_file = script_dir.parent.parent / "VERSION"
-    return version_file.read_text().strip()
+    return current_branch(Path(__file__).parent)
 
 
 def extract_version_from_branch(branch_name):
@@ -44,9 +66,10 @@ def extract_version_from_branch(branch_name):
     return match.group(1)
 
 
-def verify_release_branch():
+def verify_release_branch(branch_name=None):
     """Verify we're on a release branch and return the version."""
-    branch_name = get_current_branch()
+    if branch_name is None:
+        branch_name = get_current_branch()
 
     version = extract_version_from_branch(branch_name)
     if not version:
@@ -65,22 +88,23 @@ def is_release_branch_matches_with_version_file(version_from_file, branch_name):
     return match.group(1) == version_from_file
 
 
-def verify_demoapp_version(demoapp_dir, expected_version):
-    """Verify the demo app's viaductVersion matches the expected version."""
+def verify_demoapp_version(demoapp_dir, expected_version, branch_name=None, index=None):
+    """Verify the demo app's viaductVersion and the VERSION file match the expected version."""
     props_file = demoapp_dir / "gradle.properties"
 
     if not props_file.exists():
         print(f"❌ gradle.properties not found at {props_file}")
         return False
 
-    content = props_file.read_text()
-    version_match = re.search(r"^viaductVersion=(.+)$", content, re.MULTILINE)
+    if index is None:
+        index = build_index(demoapp_dir.parent.parent)
 
-    if not version_match:
+    declarations = index.for_path(props_file)
+    if not declarations:
         print(f"❌ viaductVersion not found in {props_file}")
         return False
 
-    demoapp_version = version_match.group(1)
+    demoapp_version = declarations[0].value
 
     if demoapp_version != expected_version:
         print(f"❌ Version mismatch!")
@@ -88,45 +112,74 @@ def verify_demoapp_version(demoapp_dir, expected_version):
         print(f"   Demo app version: {demoapp_version}")
         return False
 
-    if not is_release_branch_matches_with_version_file(read_version_file(), get_current_branch()):
+    if branch_name is None:
+        branch_name = get_current_branch()
+    version_file = index.version_file()
+    version_from_file = version_file.value if version_file else ""
+    if not is_release_branch_matches_with_version_file(version_from_file, branch_name):
       print(f"❌ Version mismatch!")
-      print(f"   Version file content: {expected_version}")
-      print(f"   Branch name         : {demoapp_version}")
+      print(f"   Version file content: {version_from_file}")
+      print(f"   Branch name         : {branch_name}")
       return False
 
     print(f"✅ Version matches: {expected_version}")
     return True
 
 
-def verify_build(demoapp_dir):
+def verify_build(demoapp_dir, runner=None):
     """Verify the demo app builds successfully."""
     print(f"Building demo app at {demoapp_dir}...")
 
-    result = subprocess.run(
-        ["./gradlew", "build", "--no-daemon"],
-        cwd=demoapp_dir,
-        capture_output=True,
-        text=True,
-    )
-
-    if result.returncode != 0:
-        print(f"❌ Build failed")
-        print(f"stdout: {result.stdout}")
-        print(f"stderr: {result.stderr}")
-        return False
+    if runner is None:
+        runner = GradleRunner.from_environment()
+    # Other runs may build the same demo app; its build/ and .gradle/ are not shareable
+    with project_lock(demoapp_dir):
+        result = run_timed_build(runner, ["build"], demoapp_dir)
+        if result.returncode != 0:
+            print(f"❌ Build failed")
+            report_failed_build(result, Path(demoapp_dir) / BUILD_LOG)
+            return False
 
     print(f"✅ Build successful")
     return True
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Error: Missing required argument")
-        print("Usage: validate_demoapp.py <demoapp-name>")
-        print("Example: validate_demoapp.py starwars")
-        return 1
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate a demo app before publishing.")
+    parser.add_argument("demoapp_name", help="Demo app directory name under demoapps/ (e.g., starwars)")
+    parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Skip validation when no change since this git ref affects the demo app",
+    )
+    parser.add_argument(
+        "--prefetch",
+        action="store_true",
+        help="Resolve dependencies into a shared Gradle user home first, then build --offline",
+    )
+    parser.add_argument(
+        "--repository",
+        metavar="URL",
+        help="Resolve all dependencies from this repository while prefetching (e.g. file:///tmp/m2)",
+    )
+    parser.add_argument(
+        "--build-cache-server",
+        action="store_true",
+        help="Serve a local HTTP build cache for the build (see build_cache_server.py)",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run the builds on a Gradle daemon that is stopped at the end of the run",
+    )
+    parser.add_argument(
+        "--task-timings",
+        metavar="DIR",
+        help="Record per-task build timings into DIR, compared against the previous report there",
+    )
+    args = parser.parse_args(argv)
 
-    demoapp_name = sys.argv[1]
+    demoapp_name = args.demoapp_name
 
     # Determine paths
     script_dir = Path(__file__).parent.resolve()
@@ -137,26 +190,58 @@ def main():
         print(f"❌ Demo app directory not found: {demoapp_dir}")
         return 1
 
+    if args.changed_since:
+        changed_paths = changed_paths_since(args.changed_since, cwd=repo_root)
+        if not affected_demoapps([demoapp_name], changed_paths):
+            print(f"⏭️  Skipping {demoapp_name}: not affected by changes since {args.changed_since}")
+            return 0
+
     print(f"=== Validating {demoapp_name} ===")
     print()
 
     # Step 1: Verify we're on a release branch
-    expected_version = verify_release_branch()
+    branch_name = get_current_branch()
+    expected_version = verify_release_branch(branch_name)
     if not expected_version:
         return 1
     print()
 
     # Step 2: Verify version matches
     print(f"Checking version in {demoapp_name}/gradle.properties...")
-    if not verify_demoapp_version(demoapp_dir, expected_version):
+    if not verify_demoapp_version(demoapp_dir, expected_version, branch_name, build_index(repo_root)):
         return 1
     print()
 
     # Step 3: Verify build
-    print(f"Verifying {demoapp_name} builds independently...")
-    if not verify_build(demoapp_dir):
-        return 1
-    print()
+    if args.task_timings:
+        os.environ[TIMINGS_DIR_ENV] = str(Path(args.task_timings).resolve())
+    cache_server = start_shared_build_cache(repo_root) if args.build_cache_server else None
+    daemon_pool = None
+    try:
+        if args.prefetch:
+            gradle_user_home = shared_gradle_user_home(repo_root)
+            runner, failed_dirs = prefetch_dependencies([demoapp_dir], gradle_user_home, args.repository)
+            if failed_dirs:
+                return 1
+            os.environ.update(runner.environment())
+            print()
+
+        if args.daemon:
+            daemon_pool = start_daemon_pool([demoapp_dir])
+
+        print(f"Verifying {demoapp_name} builds independently...")
+        if not verify_build(demoapp_dir):
+            return 1
+        print()
+    finally:
+        if daemon_pool:
+            daemon_pool.stop()
+        if cache_server:
+            print(f"Build cache: {cache_server.summary()}")
+            cache_server.stop()
+        configuration_cache = configuration_cache_summary()
+        if configuration_cache:
+            print(f"Configuration cache: {configuration_cache}")
 
     print(f"✅ {demoapp_name} validation successful!")
     return 0
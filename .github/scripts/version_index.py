@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Builds an in-memory index of every Viaduct version declaration in the repository.
+
+The index is built in a single pass over the version-bearing files:
+  - VERSION
+  - gradle.properties, build-test-plugins/gradle.properties and
+    demoapps/*/gradle.properties (viaductVersion=...)
+  - gradle/libs.versions.toml and demoapps/*/gradle/libs.versions.toml
+    (a literal `viaduct = "..."` entry in [versions])
+  - settings.gradle.kts and demoapps/*/settings.gradle.kts
+    (id("com.airbnb.viaduct...") version "..." plugin declarations)
+
+Used as a preflight so a release with inconsistent versions fails before any
+Gradle build starts.
+
+Usage:
+  python3 version_index.py [--expected <version>]
+Example:
+  python3 version_index.py --expected 0.7.0
+
+Without --expected, the version is taken from the current release branch name.
+"""
+
+import argparse
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+from git_meta import current_branch
+
+GRADLE_PROPERTIES_PATTERN = re.compile(r"^viaductVersion=(.*)$", re.MULTILINE)
+TOML_TABLE_PATTERN = re.compile(r"^\s*\[([^\]]+)\]\s*$")
+TOML_VIADUCT_VERSION_PATTERN = re.compile(r'^\s*viaduct\s*=\s*"([^"]*)"')
+SETTINGS_PLUGIN_PATTERN = re.compile(
+    r'id\(\s*"com\.airbnb\.viaduct[^"]*"\s*\)\s*version\s*"([^"]*)"'
+)
+
+
+@dataclass(frozen=True)
+class VersionLocation:
+    """A single version declaration: the file, its 1-based line and the value's column span."""
+
+    path: Path
+    kind: str
+    line: int
+    start: int
+    end: int
+    value: str
+
+
+class VersionIndex:
+    """All version declarations found under a repository root."""
+
+    def __init__(self, repo_root, locations):
+        self.repo_root = Path(repo_root)
+        self.locations = list(locations)
+
+    def relative(self, location):
+        return location.path.relative_to(self.repo_root)
+
+    def for_path(self, path):
+        path = Path(path)
+        return [loc for loc in self.locations if loc.path == path]
+
+    def under(self, directory):
+        """Return the locations in files below the given directory."""
+        directory = Path(directory)
+        return [loc for loc in self.locations if directory in loc.path.parents]
+
+    def version_file(self):
+        """Return the VERSION file location, or None if there is no VERSION file."""
+        for loc in self.locations:
+            if loc.kind == "VERSION":
+                return loc
+        return None
+
+    def mismatches(self, expected_version, locations=None):
+        """Return every location whose value differs from the expected version."""
+        if locations is None:
+            locations = self.locations
+        return [loc for loc in locations if loc.value != expected_version]
+
+
+def _line_spans(content, pattern, kind, path):
+    for match in pattern.finditer(content):
+        line_start = content.rfind("\n", 0, match.start(1)) + 1
+        yield VersionLocation(
+            path=path,
+            kind=kind,
+            line=content.count("\n", 0, match.start(1)) + 1,
+            start=match.start(1) - line_start,
+            end=match.end(1) - line_start,
+            value=match.group(1),
+        )
+
+
+def scan_version_file(path):
+    content = path.read_text()
+    value = content.strip()
+    start = content.find(value) if value else 0
+    return [VersionLocation(path, "VERSION", 1, start, start + len(value), value)]
+
+
+def scan_gradle_properties(path):
+    return list(_line_spans(path.read_text(), GRADLE_PROPERTIES_PATTERN, "gradle.properties", path))
+
+
+def scan_versions_toml(path):
+    """Find a literal viaduct version in the [versions] table of a version catalog."""
+    locations = []
+    table = None
+    for number, line in enumerate(path.read_text().splitlines(), start=1):
+        table_match = TOML_TABLE_PATTERN.match(line)
+        if table_match:
+            table = table_match.group(1).strip()
+            continue
+        if table != "versions":
+            continue
+        match = TOML_VIADUCT_VERSION_PATTERN.match(line)
+        if match:
+            locations.append(
+                VersionLocation(path, "libs.versions.toml", number, match.start(1), match.end(1), match.group(1))
+            )
+    return locations
+
+
+def scan_settings(path):
+    return list(_line_spans(path.read_text(), SETTINGS_PLUGIN_PATTERN, "settings.gradle.kts", path))
+
+
+def version_bearing_files(repo_root):
+    """Yield (scanner, path) pairs for every version-bearing file that exists."""
+    repo_root = Path(repo_root)
+    demoapps = sorted(p for p in (repo_root / "demoapps").glob("*") if p.is_dir())
+
+    candidates = [(scan_version_file, repo_root / "VERSION")]
+    for directory in [repo_root, repo_root / "build-test-plugins"] + demoapps:
+        candidates.append((scan_gradle_properties, directory / "gradle.properties"))
+    for directory in [repo_root] + demoapps:
+        candidates.append((scan_versions_toml, directory / "gradle" / "libs.versions.toml"))
+        candidates.append((scan_settings, directory / "settings.gradle.kts"))
+
+    for scanner, path in candidates:
+        if path.is_file():
+            yield scanner, path
+
+
+def build_index(repo_root):
+    """Scan every version-bearing file once and return a VersionIndex."""
+    locations = []
+    for scanner, path in version_bearing_files(repo_root):
+        locations.extend(scanner(path))
+    return VersionIndex(repo_root, locations)
+
+
+def extract_version_from_branch(branch_name):
+    """Extract version from a release branch name (e.g., release/v0.7.0 -> 0.7.0)."""
+    match = re.match(r"^release/v(.+)$", branch_name)
+    if not match:
+        return None
+    return match.group(1)
+
+
+def report_mismatches(index, expected_version, locations=None):
+    """Print every mismatching declaration and return True when there are none."""
+    mismatches = index.mismatches(expected_version, locations)
+    if not mismatches:
+        print(f"✅ All version declarations match {expected_version}")
+        return True
+
+    print(f"❌ {len(mismatches)} version declaration(s) do not match {expected_version}:")
+    for loc in mismatches:
+        print(f"   {index.relative(loc)}:{loc.line}: {loc.kind} declares {loc.value or '<empty>'}")
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check every version declaration in the repository.")
+    parser.add_argument("--expected", help="Expected version (defaults to the release branch version)")
+    args = parser.parse_args(argv)
+
+    repo_root = Path(__file__).parent.resolve().parent.parent
+
+    expected_version = args.expected
+    if not expected_version:
+        branch_name = current_branch(repo_root)
+        expected_version = extract_version_from_branch(branch_name)
+        if not expected_version:
+            print(f"❌ Not on a release branch. Current branch: {branch_name}")
+            print("   Pass --expected <version> or run on release/v[major].[minor].[patch]")
+            return 1
+
+    index = build_index(repo_root)
+    for loc in index.locations:
+        print(f"   {index.relative(loc)}:{loc.line}: {loc.value}")
+    return 0 if report_mismatches(index, expected_version) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Rewrites Viaduct version declarations across the repository in one pass.
+
+Targets come from the version index (see version_index.py), so only the exact
+column span of each known declaration is replaced. Every changed file is first
+written to a temporary file next to it; the temporary files are then renamed over
+the originals, so a failure part way through never leaves a half-written file.
+
+Usage:
+  python3 version_rewrite.py <new-version> [--dry-run] [--path <file> ...]
+Example:
+  python3 version_rewrite.py 0.8.0-SNAPSHOT
+  python3 version_rewrite.py 0.8.0 --dry-run --path demoapps/starwars/gradle.properties
+"""
+
+import argparse
+import contextlib
+import difflib
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from run_locks import resource_lock
+from version_index import build_index
+
+
+def plan_rewrite(locations, new_version):
+    """
+    Compute the new content of every file touched by the given locations.
+
+    Returns a dict of path -> (old_content, new_content), containing only files
+    whose content actually changes.
+    """
+    by_path = {}
+    for loc in locations:
+        by_path.setdefault(loc.path, []).append(loc)
+
+    plan = {}
+    for path, path_locations in by_path.items():
+        old_content = path.read_text()
+        lines = old_content.splitlines(keepends=True) or [""]
+        # Replace right-most spans first so earlier columns on the same line stay valid
+        for loc in sorted(path_locations, key=lambda l: (l.line, l.start), reverse=True):
+            line = lines[loc.line - 1]
+            lines[loc.line - 1] = line[:loc.start] + new_version + line[loc.end:]
+        new_content = "".join(lines)
+        if new_content != old_content:
+            plan[path] = (old_content, new_content)
+    return plan
+
+
+def render_diff(plan, repo_root):
+    """Render a unified diff of a rewrite plan."""
+    chunks = []
+    for path, (old_content, new_content) in sorted(plan.items()):
+        name = str(Path(path).relative_to(repo_root))
+        chunks.extend(
+            difflib.unified_diff(
+                old_content.splitlines(keepends=True),
+                new_content.splitlines(keepends=True),
+                fromfile=f"a/{name}",
+                tofile=f"b/{name}",
+            )
+        )
+    return "".join(chunks)
+
+
+def apply_rewrite(plan):
+    """Write every planned file to a sibling temp file, then rename them all into place."""
+    staged = []
+    try:
+        for path, (_, new_content) in plan.items():
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(new_content)
+            os.chmod(tmp_name, path.stat().st_mode & 0o7777)
+            staged.append((tmp_name, path))
+    except Exception:
+        for tmp_name, _ in staged:
+            os.unlink(tmp_name)
+        raise
+
+    for tmp_name, path in staged:
+        os.replace(tmp_name, path)
+    return [path for _, path in staged]
+
+
+def rewrite_versions(repo_root, new_version, locations=None, dry_run=False, lock=True):
+    """
+    Rewrite the given locations (default: every indexed declaration) to new_version.
+
+    Returns the rewrite plan. With dry_run, the plan is computed but nothing is written.
+    Writes hold the "versions" lock, so concurrent runs never interleave rewrites;
+    lock=False skips it for a tree private to the caller (e.g. an export checkout).
+    """
+    if dry_run:
+        if locations is None:
+            locations = build_index(repo_root).locations
+        return plan_rewrite(locations, new_version)
+    with resource_lock("versions", repo_root=repo_root) if lock else contextlib.nullcontext():
+        if locations is None:
+            locations = build_index(repo_root).locations
+        plan = plan_rewrite(locations, new_version)
+        apply_rewrite(plan)
+    return plan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rewrite Viaduct version declarations.")
+    parser.add_argument("version", help="New version to write")
+    parser.add_argument("--dry-run", action="store_true", help="Print a diff instead of writing files")
+    parser.add_argument(
+        "--path",
+        action="append",
+        default=[],
+        help="Only rewrite declarations in this file (relative to the repository root, repeatable)",
+    )
+    args = parser.parse_args(argv)
+
+    repo_root = Path(__file__).parent.resolve().parent.parent
+    index = build_index(repo_root)
+
+    locations = index.locations
+    if args.path:
+        locations = [loc for path in args.path for loc in index.for_path(repo_root / path)]
+        if not locations:
+            print(f"❌ No version declarations found in: {', '.join(args.path)}")
+            return 1
+
+    plan = rewrite_versions(repo_root, args.version, locations, dry_run=args.dry_run)
+
+    if args.dry_run:
+        print(render_diff(plan, repo_root), end="")
+        print(f"{len(plan)} file(s) would be updated to {args.version}")
+        return 0
+
+    for path in sorted(plan):
+        print(f"✅ Updated {path.relative_to(repo_root)}")
+    if not plan:
+        print(f"All version declarations already at {args.version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
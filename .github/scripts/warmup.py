@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Speculative warm-up of the Gradle builds a release run is about to use.
+
+The cold starts of a run (downloading the wrapper's Gradle distribution,
+starting a JVM, resolving plugins and compiling the build logic of every
+build, resolving the copybara jar) used to be paid one after the other, after
+the cheap checks. The warm-ups start them in the background instead: one
+configuration-only Gradle invocation (`help`) per build the selected steps
+use, in the order the steps use them, plus `:tools:downloadCopybara` instead
+of `help` in the root build when sync needs a copybara jar that is not
+there yet.
+
+A warm-up holds its build's project lock (see run_locks.py) while it runs,
+so the step that builds the project waits for the warm-up rather than
+racing it, and a warm-up whose build is already busy is skipped. Warm-ups
+run in their own process groups and are cancelled (terminated, then
+killed) as soon as a check fails or the run ends, so a failing run stops
+right away. Their output goes to warmup-<build>.log in the run's workspace.
+
+Usage:
+  python3 warmup.py [--steps validate,publish,sync] [--daemon] [--jobs <n>]
+Example:
+  python3 warmup.py --steps validate,sync --jobs 2
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from copybara_runner import CopybaraRunner
+from gradle_runner import GradleRunner
+from run_locks import ResourceLock, project_lock_name, run_workspace
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+
+STEPS = ("validate", "publish", "sync")
+# Warm-ups running at once; more mostly compete with the steps for CPU
+DEFAULT_JOBS = 2
+# A warm-up running longer than this is cancelled
+WARMUP_TIMEOUT = 900
+# Seconds a cancelled warm-up gets to exit before it is killed
+KILL_GRACE_PERIOD = 5
+
+
+class Warmup:
+    """One background command in a Gradle project directory, cancellable at any point."""
+
+    def __init__(self, name, args, cwd, timeout=WARMUP_TIMEOUT):
+        self.name = name
+        self.args = list(args)
+        self.cwd = Path(cwd)
+        self.timeout = timeout
+        # pending -> running -> done / failed / cancelled / skipped
+        self.status = "pending"
+        self.detail = ""
+        self.elapsed = 0.0
+        self.process = None
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+
+    @property
+    def log_path(self):
+        return run_workspace() / f"warmup-{self.name}.log"
+
+    def run(self):
+        """Run the warm-up to completion, unless it is cancelled or its project is busy."""
+        project = ResourceLock(project_lock_name(self.cwd))
+        if self.cancelled.is_set():
+            self.status = "cancelled"
+            return self
+        if not project.try_acquire():
+            self.status, self.detail = "skipped", f"{project.name} is busy"
+            return self
+        start = time.monotonic()
+        try:
+            with open(self.log_path, "w") as log, self.lock:
+                if self.cancelled.is_set():
+                    self.status = "cancelled"
+                    return self
+                self.process = subprocess.Popen(
+                    self.args,
+                    cwd=self.cwd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    # Its own process group, so cancel() reaches the Gradle wrapper's JVM too
+                    start_new_session=True,
+                )
+                self.status = "running"
+            try:
+                returncode = self.process.wait(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                self.kill()
+                self.status, self.detail = "cancelled", f"timed out after {self.timeout}s"
+                return self
+            if self.cancelled.is_set():
+                self.status = "cancelled"
+            elif returncode:
+                self.status, self.detail = "failed", f"exit code {returncode}, see {self.log_path}"
+            else:
+                self.status = "done"
+        except OSError as e:
+            self.status, self.detail = "failed", str(e)
+        finally:
+            self.elapsed = time.monotonic() - start
+            project.release()
+        return self
+
+    def kill(self):
+        """Terminate the process group, then kill it if it is still alive after the grace period."""
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(self.process.pid, sig)
+            except ProcessLookupError:
+                return
+            try:
+                self.process.wait(timeout=KILL_GRACE_PERIOD)
+                return
+            except subprocess.TimeoutExpired:
+                continue
+
+    def cancel(self):
+        """Stop the warm-up: it does not start if it is pending, and is killed if it is running."""
+        self.cancelled.set()
+        with self.lock:
+            if self.process is not None and self.process.poll() is None:
+                self.kill()
+
+    def describe(self):
+        if self.status in ("done", "failed", "cancelled") and self.elapsed:
+            timing = f" after {self.elapsed:.1f}s" if self.status == "cancelled" else f" in {self.elapsed:.1f}s"
+        else:
+            timing = ""
+        detail = f" ({self.detail})" if self.detail else ""
+        return f"{self.name} {self.status}{timing}{detail}"
+
+
+class WarmupPool:
+    """Runs warm-ups in the background, at most jobs at a time, until they finish or are cancelled."""
+
+    def __init__(self, warmups, jobs=DEFAULT_JOBS):
+        self.warmups = list(warmups)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="warmup")
+        self.futures = []
+
+    def start(self):
+        for warmup in self.warmups:
+            print(f"🔥 Warming up {warmup.name} in the background: {' '.join(warmup.args)}")
+            self.futures.append(self.executor.submit(warmup.run))
+        return self
+
+    def wait(self):
+        """Wait for every warm-up to finish."""
+        for future in self.futures:
+            future.result()
+        self.executor.shutdown()
+
+    def cancel(self):
+        """Cancel every warm-up that has not finished and wait for them to stop."""
+        unfinished = [warmup for warmup in self.warmups if warmup.status in ("pending", "running")]
+        if unfinished:
+            print(f"🛑 Cancelling {len(unfinished)} warm-up(s): {', '.join(w.name for w in unfinished)}")
+        for warmup in self.warmups:
+            warmup.cancel()
+        self.wait()
+
+    def summary(self):
+        return ", ".join(warmup.describe() for warmup in self.warmups) or "none"
+
+
+def warmup_projects(steps, repo_root, demo_apps):
+    """The Gradle builds the steps use, in the order they use them."""
+    repo_root = Path(repo_root)
+    demoapp_dirs = [repo_root / "demoapps" / name for name, _ in demo_apps]
+    projects = []
+    for step in steps:
+        if step == "validate":
+            projects += demoapp_dirs
+        elif step == "publish":
+            projects.append(repo_root)
+        elif step == "sync":
+            # Copybara runs from the root build, then the demo apps are built
+            projects += [repo_root] + demoapp_dirs
+    return list(dict.fromkeys(projects))
+
+
+def plan_warmups(steps, repo_root, demo_apps, runner=None):
+    """One warm-up per build the steps use."""
+    repo_root = Path(repo_root)
+    runner = runner or GradleRunner.from_environment()
+    warmups = []
+    for project_dir in warmup_projects(steps, repo_root, demo_apps):
+        if not (project_dir / "gradlew").exists():
+            continue
+        name = "root" if project_dir == repo_root else project_dir.name
+        if project_dir == repo_root and "sync" in steps and not CopybaraRunner(repo_root).jar.exists():
+            # Configures the root build just as `help` would, and resolves the jar
+            tasks = [":tools:downloadCopybara", "--console=plain", "--quiet"]
+        else:
+            tasks = ["help", "--quiet"]
+        warmups.append(Warmup(f"gradle-{name}", runner.command(tasks, project_dir), project_dir))
+    return warmups
+
+
+def start_warmups(steps, repo_root=None, demo_apps=None, daemon=False, jobs=DEFAULT_JOBS):
+    """Start warming up the builds of the given steps in the background; the caller cancels the returned pool."""
+    repo_root = Path(repo_root or REPO_ROOT)
+    if demo_apps is None:
+        from demoapp_registry import demo_apps as registered_demo_apps
+        demo_apps = registered_demo_apps(repo_root)
+    runner = GradleRunner.from_environment()
+    if daemon:
+        # The daemons the steps' daemon pools would start, so they find them running
+        runner.daemon = True
+    return WarmupPool(plan_warmups(steps, repo_root, demo_apps, runner), jobs).start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm up the Gradle builds of the release steps.")
+    parser.add_argument(
+        "--steps",
+        default=",".join(STEPS),
+        help=f"Comma-separated steps to warm up for (default: {','.join(STEPS)})",
+    )
+    parser.add_argument("--daemon", action="store_true", help="Leave a Gradle daemon running for each build")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"Warm-ups to run at once (default: {DEFAULT_JOBS})")
+    args = parser.parse_args(argv)
+
+    steps = [step.strip() for step in args.steps.split(",") if step.strip()]
+    unknown = [step for step in steps if step not in STEPS]
+    if unknown:
+        parser.error(f"unknown steps: {', '.join(unknown)}")
+
+    start = time.monotonic()
+    pool = start_warmups(steps, daemon=args.daemon, jobs=args.jobs)
+    try:
+        pool.wait()
+    except KeyboardInterrupt:
+        pool.cancel()
+        return 130
+    print(f"⏱ Warm-ups took {time.monotonic() - start:.1f}s: {pool.summary()}")
+    return 1 if any(warmup.status == "failed" for warmup in pool.warmups) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,17 +4,19 @@
  * In ANY build it’s applied to:
  *   - Creates local subproject aggregates (no cycles with root tasks):
  *       :orchestrationBuildAll         -> all subprojects' `build`
+ *       :orchestrationAssembleAll      -> all subprojects' `assemble`
  *       :orchestrationCheckAll         -> all subprojects' `check`
  *       :orchestrationCleanAll         -> all subprojects' `clean`
  *       :orchestrationTestAll          -> all subprojects' `Test` tasks
  *       :orchestrationPublishAllToMavenLocal
  *       :orchestrationPublishAllToMavenCentral
  *   - In INCLUDED BUILDS (gradle.parent != null), exposes conventional task names that
- *     delegate to the aggregates: `build`, `check`, `clean`, `test`, `publishToMavenLocal`, `publishToMavenCentral`.
+ *     delegate to the aggregates: `build`, `assemble`, `check`, `clean`, `test`, `publishToMavenLocal`,
+ *     `publishToMavenCentral`.
  *
  * In the TOP-LEVEL ROOT ONLY (gradle.parent == null):
  *   - Adds repo-wide tasks spanning root subprojects + selected included builds’ aggregates:
- *       build, check, clean, test, dokka, jacoco, ci
+ *       build, assemble, check, clean, test, dokka, jacoco, ci
  *       publishToMavenLocal, publishToMavenCentral
  *
  * Root configuration:
@@ -157,6 +159,11 @@ registerSubprojectAggregate(
     description = "[orchestration] Builds all SUBPROJECTS in THIS build.",
     taskNames = setOf("build")
 )
+registerSubprojectAggregate(
+    aggregateName = "orchestrationAssembleAll",
+    description = "[orchestration] Assembles all SUBPROJECTS in THIS build.",
+    taskNames = setOf("assemble")
+)
 registerSubprojectAggregate(
     aggregateName = "orchestrationCheckAll",
     description = "[orchestration] Checks all SUBPROJECTS in THIS build.",
@@ -195,6 +202,12 @@ if (gradle.parent != null) {
         group = "build",
         description = "Builds all subprojects in this included build."
     )
+    aliasConventionalTaskToAggregate(
+        conventionalName = "assemble",
+        aggregateName = "orchestrationAssembleAll",
+        group = "build",
+        description = "Assembles the outputs of all subprojects in this included build."
+    )
     aliasConventionalTaskToAggregate(
         conventionalName = "check",
         aggregateName = "orchestrationCheckAll",
@@ -236,6 +249,12 @@ if (gradle.parent == null) {
         dependsOn(participatingIncludedBuilds().map { it.task(":orchestrationBuildAll") })
     }
 
+    // assemble: root subprojects + included builds' aggregate (the jars publishing uploads, without the checks)
+    ensureTask("assemble", "build", "Assembles root subprojects and participating included builds.") {
+        dependsOn(tasksNamedInSubprojects("assemble"))
+        dependsOn(participatingIncludedBuilds().map { it.task(":orchestrationAssembleAll") })
+    }
+
     // check: root subprojects + included builds' aggregate
     ensureTask("check", "verification", "Runs checks across root and participating included builds.") {
         dependsOn(tasksNamedInSubprojects("check"))
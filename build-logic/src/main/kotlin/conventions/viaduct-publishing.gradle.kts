@@ -22,6 +22,13 @@ abstract class ViaductPublishingExtension @Inject constructor(objects: ObjectFac
 
 val viaductPublishing = extensions.create<ViaductPublishingExtension>("viaductPublishing")
 
+// Byte-identical archives for identical inputs, so publish_release.py can tell that a
+// snapshot's jars did not change since the last publish
+tasks.withType<AbstractArchiveTask>().configureEach {
+    isPreserveFileTimestamps = false
+    isReproducibleFileOrder = true
+}
+
 mavenPublishing {
     val isRelease = providers.environmentVariable("RELEASE").orElse("false").get().toBoolean()
     publishToMavenCentral(automaticRelease = true)